@@ -6,6 +6,8 @@ from Office365_api import SharePoint  # Importação para integração com Share
 import json
 import os
 import uuid  # Adicionar esta linha
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # Importações das novas funcionalidades
 from navigation import criar_navegacao
@@ -16,7 +18,14 @@ from gamificacao import criar_sistema_gamificacao
 from notificacoes import criar_sistema_notificacoes
 from cadastro_ideias import criar_formulario_ideia, listar_ideias
 from mongodb_connection import mongo_manager
+from processamento_texto import calcular_features_texto
+from duplicatas import buscar_duplicatas
+from categorizacao import CONFIANCA_MINIMA, sugerir_categoria
 from auth import auth_manager  # Nova importação
+from relatorios import FORMATOS_RELATORIO, TIPOS_RELATORIO, solicitar_relatorio
+from relatorios import ler_arquivo as ler_arquivo_relatorio
+from tendencias_termos import listar_meses
+from outbox_sharepoint import PASTA_PADRAO, drenar_em_segundo_plano, enfileirar_upload, iniciar_drenagem_periodica
 
 # Configuração da página
 st.set_page_config(
@@ -31,6 +40,11 @@ st.set_page_config(
     }
 )
 
+# Salvamento: a ideia e a fila de envio ao SharePoint gravadas em paralelo, cada uma com seu prazo
+TIMEOUT_MONGODB = 15  # segundos
+TIMEOUT_SHAREPOINT = 15  # segundos (só o registro na fila; o upload roda em segundo plano)
+_executor_salvamento = ThreadPoolExecutor(max_workers=4)
+
 # Função para limpar todos os campos com confirmação
 def limpar_campos():
     # Resetar todos os campos do formulário
@@ -121,6 +135,9 @@ def inicializar_sessao():
         st.session_state.ideias_enviadas = []
     if 'notificacoes' not in st.session_state:
         st.session_state.notificacoes = []
+    # Inserts do MongoDB que passaram do prazo: (futuro, ideia) aguardando os observadores
+    if 'insercoes_atrasadas' not in st.session_state:
+        st.session_state.insercoes_atrasadas = []
     
     # Verificar conexão com SharePoint
     st.session_state.sharepoint_conectado = verificar_conexao_sharepoint()
@@ -129,6 +146,10 @@ def inicializar_sessao():
 def main():
     inicializar_sessao()
     
+    # Uploads pendentes do SharePoint são reenviados periodicamente (uma thread por processo)
+    iniciar_drenagem_periodica()
+    notificar_insercoes_atrasadas()
+    
     # Sistema de navegação
     pagina_selecionada = criar_navegacao()
     
@@ -163,6 +184,9 @@ def main():
     elif pagina_selecionada == "🎮 Gamificação":
         criar_sistema_gamificacao()
     
+    elif pagina_selecionada == "📈 Relatórios":
+        criar_relatorios()
+    
     elif pagina_selecionada == "🔔 Notificações":
         criar_sistema_notificacoes()
     
@@ -255,6 +279,18 @@ def criar_sidebar():
         st.sidebar.warning("⚠️ Sem conexão com SharePoint")
 
 # Função para criar o formulário principal
+def aplicar_sugestao_categoria(categorias):
+    """Callback do botão de sugestão: preenche a categoria antes do próximo rerun"""
+    try:
+        sugestoes = [(c, p) for c, p in sugerir_categoria(st.session_state.ideia_textarea) if c in categorias]
+    except Exception as e:
+        sugestoes = []
+        st.warning(f"⚠️ Não foi possível sugerir uma categoria: {str(e)}")
+    
+    st.session_state.sugestao_categoria = sugestoes
+    if sugestoes and sugestoes[0][1] >= CONFIANCA_MINIMA:
+        st.session_state.categoria_select = sugestoes[0][0]
+
 def criar_formulario_ideia():
     # Categorias disponíveis
     categorias = [
@@ -294,11 +330,115 @@ def criar_formulario_ideia():
         else:
             st.write(f"Você escreveu {caracteres} caracteres")
     
+    # Sugestão de categoria pelo modelo treinado com as ideias já cadastradas
+    st.button(
+        "✨ Sugerir categoria",
+        key="sugerir_categoria",
+        disabled=caracteres == 0,
+        on_click=aplicar_sugestao_categoria,
+        args=(categorias,)
+    )
+    if 'sugestao_categoria' in st.session_state:
+        sugestoes = st.session_state.sugestao_categoria
+        if sugestoes and sugestoes[0][1] >= CONFIANCA_MINIMA:
+            alternativas = ", ".join(f"{c} ({p:.0%})" for c, p in sugestoes[1:])
+            st.caption(f"Categoria sugerida: **{sugestoes[0][0]}** ({sugestoes[0][1]:.0%})"
+                       + (f" · outras: {alternativas}" if alternativas else ""))
+        else:
+            st.caption("Não há sugestão confiável para este texto; escolha a categoria manualmente.")
+    
     # Botão para salvar a ideia
     if st.button("Enviar ideia", type="primary", key="Salvar_ideia"):
         processar_salvamento()
 
 # Função para processar o salvamento da ideia
+def enviar_sharepoint(filename, conteudo, id_unico):
+    # O documento fica na fila até o SharePoint confirmar o upload
+    return enfileirar_upload(filename, conteudo, id_unico, PASTA_PADRAO)
+
+def relatar_salvamento(sistema, futuro):
+    """Mostra o resultado de um dos salvamentos assim que ele termina"""
+    try:
+        resposta = futuro.result()
+    except Exception as e:
+        st.error(f"❌ Erro ao salvar no {sistema}: {str(e)}")
+        return False
+    
+    if not resposta:
+        if sistema == "MongoDB":
+            st.error("❌ Erro ao salvar no MongoDB")
+        else:
+            st.warning("⚠️ Não foi possível registrar o envio ao SharePoint")
+        return False
+    
+    if sistema == "MongoDB":
+        st.success(f"✅ Ideia salva no MongoDB! ID: {resposta}")
+    else:
+        st.success("✅ Documento na fila de envio ao SharePoint!")
+    return True
+
+def salvar_em_paralelo(ideia_data, filename, conteudo):
+    """Grava a ideia e enfileira o documento do SharePoint ao mesmo tempo; retorna o sucesso de cada um
+    
+    As gravações são independentes, então a espera é a da mais lenta,
+    limitada pelo prazo de cada uma. O upload em si fica com o worker da
+    fila (outbox_sharepoint), e o usuário não espera pelo SharePoint.
+    
+    As threads não têm o contexto do Streamlit, então só executam funções
+    que devolvem valores ou lançam exceções (inserir_ideia, enfileirar_upload);
+    as mensagens saem daqui, na ordem em que os resultados chegam. O prazo
+    do MongoDB cobre só o insert: os observadores (índices e dados
+    derivados) rodam depois, nesta thread, fora do tempo medido. Se o
+    insert passar do prazo, eles ficam para a próxima execução da página
+    (notificar_insercoes_atrasadas).
+    """
+    # A conexão é aberta aqui, onde eventuais erros de conexão aparecem na página
+    if mongo_manager.collection is None:
+        mongo_manager.connect()
+    
+    inicio = time.monotonic()
+    prazos = {
+        _executor_salvamento.submit(mongo_manager.inserir_ideia, ideia_data): ("MongoDB", TIMEOUT_MONGODB),
+        _executor_salvamento.submit(enviar_sharepoint, filename, conteudo, ideia_data["id_unico"]): ("SharePoint", TIMEOUT_SHAREPOINT),
+    }
+    resultados = {sistema: False for sistema, _ in prazos.values()}
+    
+    pendentes = set(prazos)
+    while pendentes:
+        restante = min(prazos[futuro][1] for futuro in pendentes) - (time.monotonic() - inicio)
+        concluidos, pendentes = wait(pendentes, timeout=max(restante, 0), return_when=FIRST_COMPLETED)
+        for futuro in concluidos:
+            sistema = prazos[futuro][0]
+            resultados[sistema] = relatar_salvamento(sistema, futuro)
+        
+        decorrido = time.monotonic() - inicio
+        for futuro in [f for f in pendentes if prazos[f][1] <= decorrido]:
+            sistema, prazo = prazos[futuro]
+            # A thread não pode ser interrompida: a gravação ainda pode terminar depois
+            st.error(f"❌ {sistema} não respondeu em {prazo}s")
+            pendentes.discard(futuro)
+            if sistema == "MongoDB":
+                # Os observadores rodam na próxima execução da página, não na thread do insert
+                st.session_state.insercoes_atrasadas.append((futuro, ideia_data))
+    
+    if resultados["MongoDB"]:
+        with st.spinner("Atualizando índices da ideia..."):
+            mongo_manager.notificar_insercao(ideia_data)
+    
+    # Tenta o upload logo, já com a ideia gravada para receber a confirmação
+    drenar_em_segundo_plano()
+    return resultados
+
+def notificar_insercoes_atrasadas():
+    """Roda, nesta thread, os observadores das ideias cujo insert terminou depois do prazo"""
+    pendentes = []
+    for futuro, ideia_data in st.session_state.insercoes_atrasadas:
+        if not futuro.done():
+            pendentes.append((futuro, ideia_data))
+        elif futuro.exception() is None:
+            mongo_manager.notificar_insercao(ideia_data)
+    st.session_state.insercoes_atrasadas = pendentes
+
 def processar_salvamento():
     # Obter valores atuais dos campos
     anonimato = st.session_state.anonimato_checkbox
@@ -354,43 +494,40 @@ def processar_salvamento():
         "comentarios": [],
         "data_submissao": datetime.datetime.now().isoformat(),
         "arquivo_sharepoint": filename,
+        "sharepoint_enviado": False,  # Marcado pelo worker quando o upload é confirmado
         "anonimo": anonimato
     }
     
-    # Variáveis para controlar o sucesso das operações
-    sharepoint_sucesso = False
-    mongodb_sucesso = False
-    
-    # 1. SALVAR NO MONGODB
-    with st.spinner("Salvando ideia no MongoDB..."):
-        try:
-            ideia_id = mongo_manager.salvar_ideia(ideia_data)
-            if ideia_id:
-                mongodb_sucesso = True
-                st.success(f"✅ Ideia salva no MongoDB! ID: {ideia_id}")
-            else:
-                st.error("❌ Erro ao salvar no MongoDB")
-        except Exception as e:
-            st.error(f"❌ Erro ao salvar no MongoDB: {str(e)}")
-    
-    # 2. SALVAR NO SHAREPOINT
-    with st.spinner("Salvando ideia no SharePoint..."):
-        try:
-            # Definir a pasta do SharePoint onde o arquivo será salvo
-            sharepoint_folder = "Banco_de_Ideias"  # Pasta no SharePoint para armazenar as ideias
-            
-            # Fazer upload do arquivo para o SharePoint
-            sharepoint = SharePoint()
-            response = sharepoint.upload_file(filename, sharepoint_folder, doc_bytes.getvalue())
-            
-            # Verificar se o upload foi bem-sucedido
-            if response:
-                sharepoint_sucesso = True
-                st.success(f"✅ Ideia salva no SharePoint!")
-            else:
-                st.warning("⚠️ Não foi possível salvar no SharePoint")
-        except Exception as e:
-            st.error(f"❌ Erro ao salvar no SharePoint: {str(e)}")
+    # Features de texto calculadas uma única vez, no momento do cadastro
+    ideia_data["features_texto"] = calcular_features_texto(ideia_data["titulo"], ideia_data["descricao"])
+    
+    # Ideias parecidas já cadastradas (consulta LSH, não percorre o banco)
+    try:
+        duplicatas = buscar_duplicatas(ideia)
+    except Exception as e:
+        duplicatas = []
+        st.warning(f"⚠️ Não foi possível verificar ideias duplicadas: {str(e)}")
+    
+    # Sugestão do modelo gravada junto, para medir acertos e revisar categorias
+    try:
+        sugestoes = sugerir_categoria(ideia, limite=1)
+    except Exception:
+        sugestoes = []
+    if sugestoes:
+        ideia_data["categoria_sugerida"], confianca = sugestoes[0]
+        ideia_data["confianca_categoria"] = round(confianca, 4)
+    
+    if duplicatas:
+        ideia_data["possivel_duplicata"] = [d['_id'] for d in duplicatas]
+        st.warning("⚠️ Encontramos ideias muito parecidas já cadastradas. Sua ideia será salva e sinalizada para a equipe avaliar:")
+        for d in duplicatas:
+            st.write(f"• **{d['titulo']}** — {d['unidade']} ({d['status']}) · {d['similaridade']:.0%} de similaridade")
+    
+    # 1 e 2. SALVAR NO MONGODB E NO SHAREPOINT AO MESMO TEMPO
+    with st.spinner("Salvando ideia no MongoDB e no SharePoint..."):
+        resultados = salvar_em_paralelo(ideia_data, filename, doc_bytes.getvalue())
+    mongodb_sucesso = resultados["MongoDB"]
+    sharepoint_sucesso = resultados["SharePoint"]
     
     # 3. RESUMO DO SALVAMENTO
     st.write("---")
@@ -405,9 +542,9 @@ def processar_salvamento():
     
     with col2:
         if sharepoint_sucesso:
-            st.success("✅ SharePoint: Salvo com sucesso")
+            st.success("✅ SharePoint: Na fila de envio (upload em segundo plano)")
         else:
-            st.error("❌ SharePoint: Falha no salvamento")
+            st.error("❌ SharePoint: Falha ao registrar o envio")
     
     # 4. OFERECER DOWNLOAD LOCAL
     st.download_button(
@@ -420,30 +557,54 @@ def processar_salvamento():
     
     # 5. MENSAGEM FINAL
     if mongodb_sucesso and sharepoint_sucesso:
-        st.success("🎉 Ideia salva com sucesso em ambos os sistemas!")
+        st.success("🎉 Ideia salva! O documento está na fila e será enviado ao SharePoint em instantes.")
         st.balloons()
     elif mongodb_sucesso or sharepoint_sucesso:
         st.warning("⚠️ Ideia salva parcialmente. Verifique os detalhes acima.")
     else:
         st.error("❌ Falha ao salvar a ideia. Você ainda pode baixar o arquivo localmente.")
 
-# Executar o aplicativo
-if __name__ == "__main__":
-    main()
-
-
 def criar_relatorios():
     st.header("📈 Relatórios")
     
+    # Meses com ideias; relatórios de meses fechados ficam prontos no cache
+    meses = listar_meses() or [datetime.datetime.now().strftime('%Y-%m')]
+    periodo = st.selectbox("Período:", meses, key="periodo_relatorios")
+    
     col1, col2 = st.columns(2)
     
-    with col1:
-        if st.button("📊 Relatório Mensal"):
-            st.success("Relatório mensal gerado!")
+    for coluna, (tipo, nome) in zip((col1, col2), TIPOS_RELATORIO.items()):
+        with coluna:
+            st.subheader(f"{'📊' if tipo == 'mensal' else '📈'} {nome}")
+            relatorio = solicitar_relatorio(tipo, periodo)
+            
+            if relatorio and relatorio.get('arquivos'):
+                st.caption(f"Gerado em {relatorio['gerado_em']:%d/%m/%Y %H:%M}")
+                for formato, mime in FORMATOS_RELATORIO.items():
+                    st.download_button(
+                        label=f"📥 Baixar {formato.upper()}",
+                        data=ler_arquivo_relatorio(relatorio, formato),
+                        file_name=f"relatorio_{tipo}_{periodo}.{formato}",
+                        mime=mime,
+                        key=f"baixar_{tipo}_{formato}"
+                    )
+            elif relatorio and relatorio.get('status') == 'erro':
+                st.error(f"❌ Erro ao gerar o relatório: {relatorio.get('erro')}")
+            else:
+                st.info("⏳ Relatório em geração. Atualize em alguns instantes.")
+            
+            if relatorio and relatorio.get('status') == 'pronto':
+                if st.button("🔄 Gerar Novamente", key=f"regerar_{tipo}"):
+                    solicitar_relatorio(tipo, periodo, forcar=True)
+                    st.rerun()
     
-    with col2:
-        if st.button("📈 Relatório de Tendências"):
-            st.success("Relatório de tendências gerado!")
+    if st.button("🔄 Atualizar", key="atualizar_relatorios"):
+        st.rerun()
+
+# Executar o aplicativo
+if __name__ == "__main__":
+    main()
+
 
 def criar_configuracoes():
     st.header("⚙️ Configurações")
@@ -66,10 +66,10 @@ class SharePoint:
             st.error(f"❌ Erro ao baixar arquivo {file_name}: {str(e)}")
             raise Exception(f"Erro ao baixar arquivo {file_name}: {str(e)}")
 
-    def upload_file(self, file_name, folder_name, content):
-        """Faz upload de um arquivo para o SharePoint"""
+    def upload_file(self, file_name, folder_name, content, conexao=None):
+        """Faz upload de um arquivo para o SharePoint (reaproveita `conexao` em envios em lote)"""
         try:
-            conn = self._auth()
+            conn = conexao or self._auth()
             target_folder_url = f'/sites/{self.sharepoint_site_name}/{self.sharepoint_doc}/{folder_name}'
             target_folder = conn.web.get_folder_by_server_relative_path(target_folder_url)
             response = target_folder.upload_file(file_name, content).execute_query()
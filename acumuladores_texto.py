@@ -0,0 +1,95 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from processamento_texto import obter_features_texto
+
+class AcumuladorTexto:
+    """Agregados da página de análise de texto, alimentados ideia a ideia
+
+    Guarda apenas contadores (tamanho proporcional ao vocabulário e ao número
+    de categorias/meses, nunca ao corpus), então a página pode percorrer o
+    banco em lotes sem manter cópias dos textos em memória. Acumuladores
+    parciais podem ser combinados com ``mesclar``.
+
+    ``contar_palavras=False`` dispensa os contadores de palavras quando o
+    índice de termos já responde às frequências.
+    """
+
+    def __init__(self, contar_palavras: bool = True):
+        self.contar_palavras = contar_palavras
+        self.total_ideias = 0
+        self.total_textos = 0
+        self.total_palavras = 0
+        self.sentimentos = Counter()
+        self.palavras = Counter()
+        self.por_categoria: Dict[str, Dict] = {}
+        self.por_mes: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _novo_grupo(contar_palavras: bool) -> Dict:
+        grupo = {'textos': 0, 'total_palavras': 0, 'positivos': 0}
+        if contar_palavras:
+            grupo['palavras'] = Counter()
+        return grupo
+
+    def adicionar(self, ideia: Dict):
+        """Incorpora uma ideia (usa as features gravadas, calculando-as se ausentes)"""
+        textos = obter_features_texto(ideia)['textos']
+        self.total_ideias += 1
+
+        categoria = ideia.get('categoria', 'Não categorizada')
+        grupo_categoria = self.por_categoria.setdefault(categoria, self._novo_grupo(self.contar_palavras))
+
+        grupo_mes = None
+        data_criacao = ideia.get('data_criacao')
+        if isinstance(data_criacao, datetime):
+            grupo_mes = self.por_mes.setdefault(data_criacao.strftime('%Y-%m'), self._novo_grupo(False))
+
+        for texto in textos:
+            positivo = texto['sentimento'] == 'positivo'
+            self.total_textos += 1
+            self.total_palavras += texto['total_palavras']
+            if texto['sentimento']:
+                self.sentimentos[texto['sentimento']] += 1
+
+            for grupo in (grupo_categoria, grupo_mes):
+                if grupo is None:
+                    continue
+                grupo['textos'] += 1
+                grupo['total_palavras'] += texto['total_palavras']
+                grupo['positivos'] += positivo
+
+            if self.contar_palavras:
+                self.palavras.update(texto['tokens'])
+                grupo_categoria['palavras'].update(texto['tokens'])
+
+    def adicionar_lote(self, ideias: Iterable[Dict]):
+        for ideia in ideias:
+            self.adicionar(ideia)
+
+    def mesclar(self, outro: 'AcumuladorTexto') -> 'AcumuladorTexto':
+        """Soma outro acumulador a este (mesma configuração de contar_palavras)"""
+        self.total_ideias += outro.total_ideias
+        self.total_textos += outro.total_textos
+        self.total_palavras += outro.total_palavras
+        self.sentimentos.update(outro.sentimentos)
+        self.palavras.update(outro.palavras)
+
+        for destino, origem in ((self.por_categoria, outro.por_categoria), (self.por_mes, outro.por_mes)):
+            for chave, grupo in origem.items():
+                atual = destino.setdefault(chave, self._novo_grupo('palavras' in grupo))
+                for campo in ('textos', 'total_palavras', 'positivos'):
+                    atual[campo] += grupo[campo]
+                if 'palavras' in grupo:
+                    atual['palavras'].update(grupo['palavras'])
+
+        return self
+
+def acumular_ideias(lotes: Iterable[Iterable[Dict]], contar_palavras: bool = True,
+                    acumulador: Optional[AcumuladorTexto] = None) -> AcumuladorTexto:
+    """Percorre lotes de ideias (ex.: mongo_manager.iterar_ideias) somando tudo em um acumulador"""
+    acumulador = acumulador or AcumuladorTexto(contar_palavras)
+    for lote in lotes:
+        acumulador.adicionar_lote(lote)
+    return acumulador
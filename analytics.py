@@ -7,6 +7,7 @@ from collections import Counter
 import re
 from datetime import datetime, timedelta
 from mongodb_connection import mongo_manager
+from eventos_ideias import ETAPAS, ESCOPOS_CICLO, listar_chaves_ciclo, obter_estatisticas_ciclo
 import numpy as np
 
 # Importação opcional da WordCloud
@@ -17,6 +18,52 @@ except ImportError:
     WORDCLOUD_AVAILABLE = False
     st.warning("⚠️ WordCloud não está instalada. Instale com: pip install wordcloud")
 
+def criar_secao_ciclo():
+    """Tempos de ciclo lidos das estatísticas pré-agregadas (sem reprocessar o histórico)"""
+    st.subheader("⏱️ Tempo de Ciclo")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        escopo = st.selectbox("Agrupar por", ESCOPOS_CICLO, format_func=str.capitalize, key="escopo_ciclo")
+    with col2:
+        chave = ''
+        if escopo != 'global':
+            chaves = listar_chaves_ciclo(escopo)
+            chave = st.selectbox(escopo.capitalize(), chaves, key="chave_ciclo") if chaves else ''
+    
+    estatisticas = {e['metrica']: e for e in obter_estatisticas_ciclo(escopo, chave)}
+    if not estatisticas:
+        st.info("📭 Ainda não há mudanças de status registradas para calcular o ciclo.")
+        return
+    
+    col1, col2 = st.columns(2)
+    for coluna, metrica, rotulo in ((col1, 'ate_decisao', "Tempo até a decisão"),
+                                    (col2, 'ate_implementacao', "Tempo até a implementação")):
+        with coluna:
+            estatistica = estatisticas.get(metrica)
+            if estatistica:
+                st.metric(rotulo, f"{estatistica['media_dias']:.1f} dias",
+                          f"{estatistica['quantidade']} ideias", delta_color="off")
+            else:
+                st.metric(rotulo, "—")
+    
+    # Permanência média em cada etapa do fluxo
+    linhas = [
+        {
+            'Etapa': etapa,
+            'Média (dias)': round(estatisticas[f"tempo_em:{etapa}"]['media_dias'], 1),
+            'Mediana (até, dias)': estatisticas[f"tempo_em:{etapa}"]['mediana_ate_dias'],
+            'P90 (até, dias)': estatisticas[f"tempo_em:{etapa}"]['p90_ate_dias'],
+            'Transições': estatisticas[f"tempo_em:{etapa}"]['quantidade']
+        }
+        for etapa in ETAPAS if f"tempo_em:{etapa}" in estatisticas
+    ]
+    if linhas:
+        df_ciclo = pd.DataFrame(linhas)
+        fig_ciclo = px.bar(df_ciclo, x='Etapa', y='Média (dias)', title='Permanência Média por Etapa')
+        st.plotly_chart(fig_ciclo, use_container_width=True)
+        st.dataframe(df_ciclo, use_container_width=True, hide_index=True)
+
 def criar_dashboard_analytics():
     st.header("📊 Dashboard de Analytics - Banco de Ideias")
     
@@ -253,6 +300,8 @@ def criar_dashboard_analytics():
             porcentagem = (count / total_ideias * 100) if total_ideias > 0 else 0
             st.write(f"• {categoria}: {count} ({porcentagem:.1f}%)")
     
+    criar_secao_ciclo()
+    
     # Botão para atualizar dados
     if st.button("🔄 Atualizar Dashboard"):
         st.rerun()
\ No newline at end of file
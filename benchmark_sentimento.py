@@ -0,0 +1,75 @@
+# Benchmark: TextBlob por texto (implementação anterior) x pontuador léxico vetorizado
+#
+# Uso: python benchmark_sentimento.py [--mongo] [--repeticoes N]
+#   --mongo          usa títulos/descrições reais do banco em vez do corpus sintético
+#   --repeticoes N   replica o corpus N vezes (padrão: 200)
+import random
+import sys
+import time
+
+from textblob import TextBlob
+
+from sentimento_lexico import obter_pontuador, tokenizar_sentimento, classificar_polaridade
+
+FRASES_EXEMPLO = [
+    "Criar um aplicativo para facilitar a comunicação entre pais e professores",
+    "O sistema de matrícula é muito lento e gera reclamações dos responsáveis",
+    "Melhorar a iluminação das salas de aula do segundo andar",
+    "Não temos espaço adequado para as aulas de educação física",
+    "Excelente oportunidade de engajamento dos alunos com projetos de sustentabilidade",
+    "Reduzir o desperdício de papel digitalizando os formulários",
+    "A falta de manutenção nos banheiros é um problema recorrente",
+    "Feira de ciências integrada entre as unidades da rede",
+]
+
+def sentimento_textblob(texto):
+    """Implementação anterior de analisar_sentimento (um TextBlob por texto)"""
+    try:
+        return classificar_polaridade(TextBlob(texto).sentiment.polarity)
+    except Exception:
+        return 'neutro'
+
+def carregar_corpus(usar_mongo, repeticoes):
+    if usar_mongo:
+        from mongodb_connection import mongo_manager
+        ideias = mongo_manager.buscar_ideias(projecao={'titulo': 1, 'descricao': 1})
+        base = [texto for ideia in ideias for texto in (ideia.get('titulo'), ideia.get('descricao')) if texto]
+    else:
+        base = FRASES_EXEMPLO
+
+    corpus = base * repeticoes
+    random.Random(42).shuffle(corpus)
+    return corpus
+
+def medir(nome, funcao, corpus):
+    inicio = time.perf_counter()
+    resultado = funcao(corpus)
+    duracao = time.perf_counter() - inicio
+    print(f"{nome:<35} {duracao:8.3f}s  ({len(corpus) / duracao:,.0f} textos/s)")
+    return duracao, resultado
+
+if __name__ == "__main__":
+    repeticoes = 200
+    if '--repeticoes' in sys.argv:
+        repeticoes = int(sys.argv[sys.argv.index('--repeticoes') + 1])
+
+    corpus = carregar_corpus('--mongo' in sys.argv, repeticoes)
+    pontuador = obter_pontuador()
+    print(f"Corpus: {len(corpus)} textos\n")
+
+    tempo_textblob, rotulos_textblob = medir(
+        "TextBlob (um objeto por texto)",
+        lambda textos: [sentimento_textblob(t) for t in textos],
+        corpus
+    )
+    tempo_lexico, rotulos_lexico = medir(
+        "Léxico PT vetorizado (lote único)",
+        lambda textos: pontuador.classificar_lote([tokenizar_sentimento(t) for t in textos]),
+        corpus
+    )
+
+    print(f"\nGanho de velocidade: {tempo_textblob / tempo_lexico:.1f}x")
+
+    for nome, rotulos in (("TextBlob", rotulos_textblob), ("Léxico PT", rotulos_lexico)):
+        distribuicao = {r: rotulos.count(r) for r in ('positivo', 'neutro', 'negativo')}
+        print(f"{nome:<10} {distribuicao}")
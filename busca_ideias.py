@@ -0,0 +1,98 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from mongodb_connection import mongo_manager
+
+# Sugestões devolvidas por consulta no seletor de ideias
+MAX_SUGESTOES = 20
+
+# Campos exibidos nas sugestões
+PROJECAO_SUGESTOES = {"titulo": 1, "autor": 1, "status": 1}
+
+_HEXADECIMAL = re.compile(r'[0-9a-f]{1,24}')
+
+_indices_criados = False
+
+def _garantir_indices() -> bool:
+    """Índice multikey nas palavras do título (prefixos ancorados usam o índice)"""
+    global _indices_criados
+    if mongo_manager.collection is None and not mongo_manager.connect():
+        return False
+    if not _indices_criados:
+        mongo_manager.collection.create_index([("palavras_titulo", ASCENDING)])
+        _indices_criados = True
+    return True
+
+def normalizar(texto: str) -> List[str]:
+    """Palavras em minúsculas e sem acentos ("Horta Orgânica" -> ["horta", "organica"])"""
+    sem_acentos = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return re.findall(r'[a-z0-9]+', sem_acentos.lower())
+
+def palavras_do_titulo(ideia: Dict) -> List[str]:
+    return sorted(set(normalizar(ideia.get('titulo', ''))))
+
+def _filtro_id(termo: str) -> Optional[Dict]:
+    """Intervalo de ObjectId que começa com o prefixo hexadecimal (busca no índice de _id)"""
+    termo = termo.lower()
+    if not _HEXADECIMAL.fullmatch(termo):
+        return None
+    faltam = 24 - len(termo)
+    return {"_id": {"$gte": ObjectId(termo + '0' * faltam), "$lte": ObjectId(termo + 'f' * faltam)}}
+
+def _filtro_titulo(termo: str) -> Optional[Dict]:
+    """Palavras completas seguidas do prefixo da última, todas presentes no título"""
+    palavras = normalizar(termo)
+    if not palavras:
+        return None
+    condicoes = [{"palavras_titulo": palavra} for palavra in palavras[:-1]]
+    condicoes.append({"palavras_titulo": {"$regex": f"^{re.escape(palavras[-1])}"}})
+    return {"$and": condicoes}
+
+def buscar_sugestoes(termo: str, limite: int = MAX_SUGESTOES) -> List[Dict]:
+    """Até `limite` ideias cujo ID começa com `termo` ou cujo título contém as palavras digitadas
+
+    As duas consultas percorrem apenas o trecho do índice que casa com o
+    prefixo, então o custo não depende do total de ideias.
+    """
+    termo = (termo or '').strip()
+    if not termo or not _garantir_indices():
+        return []
+
+    sugestoes: Dict[str, Dict] = {}
+    for filtro in (_filtro_id(termo), _filtro_titulo(termo)):
+        if filtro is None or len(sugestoes) >= limite:
+            continue
+        for ideia in mongo_manager.collection.find(filtro, PROJECAO_SUGESTOES).limit(limite):
+            sugestoes.setdefault(str(ideia['_id']), {**ideia, '_id': str(ideia['_id'])})
+
+    return list(sugestoes.values())[:limite]
+
+def indexar_titulo(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: grava as palavras do título em ideias novas ou renomeadas"""
+    if evento == 'deletar' or (evento == 'atualizar' and antes.get('titulo') == depois.get('titulo')):
+        return
+    mongo_manager.atualizar_ideias_em_lote({str(depois['_id']): {"palavras_titulo": palavras_do_titulo(depois)}})
+
+def indexar_titulos(tamanho_lote: int = 1000) -> int:
+    """Preenche palavras_titulo nas ideias que ainda não têm o campo"""
+    if not _garantir_indices():
+        return 0
+
+    total = 0
+    filtro = {"palavras_titulo": {"$exists": False}}
+    for lote in mongo_manager.iterar_ideias(filtro, {"titulo": 1}, tamanho_lote):
+        total += mongo_manager.atualizar_ideias_em_lote({
+            ideia['_id']: {"palavras_titulo": palavras_do_titulo(ideia)} for ideia in lote
+        })
+    return total
+
+mongo_manager.registrar_observador(indexar_titulo)
+
+# Preenchimento inicial: python busca_ideias.py
+if __name__ == "__main__":
+    print("Indexando títulos das ideias...")
+    print(f"✅ {indexar_titulos()} ideias indexadas")
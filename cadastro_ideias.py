@@ -1,5 +1,6 @@
 import streamlit as st
 from mongodb_connection import mongo_manager
+from processamento_texto import calcular_features_texto
 from datetime import datetime
 import uuid
 
@@ -113,7 +114,8 @@ def criar_formulario_ideia():
                 "status": "Pendente",
                 "votos": 0,
                 "comentarios": [],
-                "data_submissao": datetime.now().isoformat()
+                "data_submissao": datetime.now().isoformat(),
+                "features_texto": calcular_features_texto(titulo, descricao)
             }
             
             # Salvar no MongoDB
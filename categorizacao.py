@@ -0,0 +1,63 @@
+from typing import Dict, List, Tuple
+
+from mongodb_connection import mongo_manager
+from modelos_ml import GerenciadorModelo
+
+# Nome do modelo na coleção de modelos
+MODELO_CATEGORIA = "categoria"
+
+# Abaixo desta confiança a sugestão é gravada, mas não oferecida no formulário
+CONFIANCA_MINIMA = 0.4
+
+gerenciador_categoria = GerenciadorModelo(MODELO_CATEGORIA, "categoria")
+
+def sugerir_categoria(descricao: str, limite: int = 3) -> List[Tuple[str, float]]:
+    """Categorias mais prováveis para a descrição; lista vazia se o modelo não foi treinado"""
+    classificador, _ = gerenciador_categoria.obter()
+    if classificador is None:
+        return []
+    return classificador.sugerir(descricao, limite)
+
+def treinar_modelo_categoria(incremental: bool = True) -> Dict:
+    """(Re)treina o classificador de categorias com as ideias já categorizadas"""
+    return gerenciador_categoria.treinar(incremental)
+
+def reclassificar_backlog(apenas_sem_sugestao: bool = False, tamanho_lote: int = 1000) -> Dict[str, int]:
+    """Grava categoria_sugerida e confianca_categoria em todas as ideias
+
+    As ideias são classificadas em lotes (uma predição vetorizada por lote) e
+    gravadas com um bulk_write por lote. Retorna quantas foram processadas e
+    quantas têm sugestão diferente da categoria atual.
+    """
+    classificador, _ = gerenciador_categoria.obter()
+    if classificador is None:
+        return {'processadas': 0, 'divergentes': 0}
+
+    filtro = {"categoria_sugerida": {"$exists": False}} if apenas_sem_sugestao else {}
+    projecao = {"categoria": 1, "descricao": 1, "features_texto": 1}
+    processadas = divergentes = 0
+
+    for lote in mongo_manager.iterar_ideias(filtro, projecao, tamanho_lote):
+        atualizacoes = {}
+        for ideia, (sugestao, confianca) in zip(lote, classificador.classificar_lote(lote)):
+            if sugestao is None:
+                continue
+            atualizacoes[ideia['_id']] = {"categoria_sugerida": sugestao, "confianca_categoria": round(confianca, 4)}
+            divergentes += sugestao != ideia.get('categoria')
+        mongo_manager.atualizar_ideias_em_lote(atualizacoes)
+        processadas += len(atualizacoes)
+
+    return {'processadas': processadas, 'divergentes': divergentes}
+
+# Retreino periódico (ex.: cron diário): python categorizacao.py [--completo] [--reclassificar]
+if __name__ == "__main__":
+    import sys
+
+    metadados = treinar_modelo_categoria(incremental='--completo' not in sys.argv)
+    acuracia = metadados.get('acuracia')
+    print(f"✅ Modelo de categorias treinado ({metadados['modo']}): {metadados['exemplos']} exemplos, "
+          f"acurácia {'n/d' if acuracia is None else f'{acuracia:.1%}'}")
+
+    if '--reclassificar' in sys.argv:
+        resultado = reclassificar_backlog()
+        print(f"🏷️ {resultado['processadas']} ideias reclassificadas, {resultado['divergentes']} com sugestão diferente")
@@ -1,8 +1,248 @@
 import streamlit as st
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pymongo import ASCENDING
 from mongodb_connection import mongo_manager
 from bson import ObjectId
+from similaridade import ideias_relacionadas
+from busca_ideias import MAX_SUGESTOES, buscar_sugestoes
+from eventos_ideias import historico_ideia
+from exportacao import formatos_disponiveis, iniciar_exportacao, listar_exportacoes, publicar_arquivo
+from roteamento import (
+    CONFIANCA_PADRAO, NAO_ATRIBUIDO, RESPONSAVEIS, aceitar_sugestoes, contar_sugestoes_aceitaveis,
+    sugerir_responsaveis, treinar_modelo_responsavel
+)
+
+def formatar_sugestao_responsavel(ideia):
+    """Sugestão do modelo para ideias ainda sem responsável ("TI (87%)")"""
+    if ideia.get('responsavel') not in (None, "", NAO_ATRIBUIDO) or not ideia.get('responsavel_sugerido'):
+        return ""
+    return f"{ideia['responsavel_sugerido']} ({ideia.get('confianca_responsavel', 0):.0%})"
+
+# Colunas ordenáveis no servidor (rótulo -> campo da ideia)
+ORDENACOES = {
+    "Data": "data_criacao",
+    "Título": "titulo",
+    "Autor": "autor",
+    "Status": "status",
+    "Prioridade": "prioridade",
+    "Responsável": "responsavel",
+}
+
+TAMANHOS_PAGINA = [25, 50, 100, 200]
+
+# Colunas editáveis na tabela (rótulo -> campo da ideia)
+COLUNAS_EDITAVEIS = {"Status": "status", "Prioridade": "prioridade", "Responsável": "responsavel"}
+
+# Ações em lote que alteram um campo (rótulo -> campo, valores possíveis)
+ACOES_LOTE = {
+    "Alterar status": ("status", ["Pendente", "Em Análise", "Aprovada", "Implementada", "Rejeitada"]),
+    "Alterar prioridade": ("prioridade", ["Baixa", "Média", "Alta", "Crítica"]),
+    "Atribuir responsável": ("responsavel", [NAO_ATRIBUIDO] + RESPONSAVEIS),
+}
+
+# Campos lidos para a tabela; a descrição só é buscada no detalhe da ideia
+PROJECAO_TABELA = {
+    campo: 1 for campo in (
+        'titulo', 'autor', 'categoria', 'status', 'data_criacao', 'prioridade',
+        'responsavel', 'responsavel_sugerido', 'confianca_responsavel'
+    )
+}
+
+# Busca antecipada da próxima página enquanto a atual é exibida
+_executor = ThreadPoolExecutor(max_workers=2)
+_indices_criados = False
+
+def _garantir_indices():
+    """Índices (campo, _id) que servem a ordenação e a paginação por chave"""
+    global _indices_criados
+    if _indices_criados or (mongo_manager.collection is None and not mongo_manager.connect()):
+        return
+    for campo in ORDENACOES.values():
+        mongo_manager.collection.create_index([(campo, ASCENDING), ("_id", ASCENDING)])
+    _indices_criados = True
+
+def linha_da_ideia(ideia):
+    return {
+        'ID': str(ideia['_id'])[:8],  # Primeiros 8 caracteres do ObjectId
+        'Título': ideia.get('titulo', 'Sem título'),
+        'Autor': ideia.get('autor', 'Anônimo'),
+        'Categoria': ideia.get('categoria', 'Não categorizada'),
+        'Status': ideia.get('status', 'Pendente'),
+        'Data': ideia.get('data_criacao', datetime.now()).strftime('%Y-%m-%d') if isinstance(ideia.get('data_criacao'), datetime) else str(ideia.get('data_criacao', ''))[:10],
+        'Prioridade': ideia.get('prioridade', 'Média'),
+        'Responsável': ideia.get('responsavel', 'Não atribuído'),
+        'Sugestão': formatar_sugestao_responsavel(ideia),
+        '_id_completo': str(ideia['_id'])  # Para referência interna
+    }
+
+def obter_pagina(estado, filtros, campo_ordem, decrescente, tamanho):
+    """Página atual (cache da sessão ou busca antecipada) e agenda a busca da próxima"""
+    apos = estado['cursores'][estado['pagina']]
+    chave = repr(apos)
+    
+    if chave not in estado['cache']:
+        futura = estado['antecipadas'].pop(chave, None)
+        try:
+            pagina = futura.result() if futura else None
+        except Exception:
+            # A busca antecipada falhou fora da página: repete aqui, onde o erro aparece
+            pagina = None
+        if pagina is None:
+            pagina = mongo_manager.buscar_pagina(filtros, campo_ordem, decrescente, apos, tamanho, PROJECAO_TABELA)
+        estado['cache'] = {chave: pagina}
+    
+    ideias, proximo = estado['cache'][chave]
+    if proximo is not None and repr(proximo) not in estado['antecipadas']:
+        # consultar_pagina não chama o Streamlit (a thread não tem o contexto da página)
+        estado['antecipadas'] = {repr(proximo): _executor.submit(
+            mongo_manager.consultar_pagina, filtros, campo_ordem, decrescente, proximo, tamanho, PROJECAO_TABELA
+        )}
+    return ideias, proximo
+
+def chave_tabela(estado):
+    """Chave do data_editor: muda com filtros/ordenação e página, para as edições
+    de um conjunto de resultados não serem reaplicadas em outro"""
+    return f"tabela_ideias_{estado['assinatura']}_{estado['pagina']}"
+
+def contar_por_status(filtros):
+    """Totais por status das ideias filtradas, agregados no servidor"""
+    if mongo_manager.collection is None and not mongo_manager.connect():
+        return {}
+    resultado = mongo_manager.collection.aggregate([
+        {"$match": filtros},
+        {"$group": {"_id": "$status", "total": {"$sum": 1}}}
+    ])
+    return {item["_id"]: item["total"] for item in resultado}
+
+def mudar_pagina(deslocamento, proximo=None):
+    estado = st.session_state["paginacao_ideias"]
+    if deslocamento > 0 and estado['pagina'] + 1 == len(estado['cursores']):
+        estado['cursores'].append(proximo)
+    estado['pagina'] = max(estado['pagina'] + deslocamento, 0)
+
+def criar_triagem_responsaveis():
+    st.subheader("🧭 Triagem de Responsáveis")
+    st.write("Sugestões do modelo treinado com as atribuições anteriores, aceitas de uma só vez.")
+    
+    confianca_minima = st.slider(
+        "Confiança mínima para aceitar",
+        min_value=0.3, max_value=1.0, value=CONFIANCA_PADRAO, step=0.05,
+        key="confianca_triagem"
+    )
+    aceitaveis = contar_sugestoes_aceitaveis(confianca_minima)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("🧠 Treinar Modelo", key="treinar_responsavel"):
+            with st.spinner("Treinando com as atribuições existentes..."):
+                try:
+                    metadados = treinar_modelo_responsavel(incremental=False)
+                    acuracia = metadados.get('acuracia')
+                    st.success(f"✅ Modelo treinado com {metadados['exemplos']} ideias"
+                               + ("" if acuracia is None else f" (acurácia {acuracia:.0%})"))
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+    
+    with col2:
+        if st.button("🧭 Gerar Sugestões", key="gerar_sugestoes_responsavel"):
+            with st.spinner("Classificando ideias não atribuídas..."):
+                total = sugerir_responsaveis()
+            st.success(f"✅ {total} ideias receberam sugestão")
+    
+    with col3:
+        if st.button(f"✅ Aceitar Sugestões ({aceitaveis})", key="aceitar_sugestoes", disabled=aceitaveis == 0):
+            atribuidas = aceitar_sugestoes(confianca_minima)
+            st.success(f"✅ {atribuidas} ideia(s) atribuída(s)")
+            st.rerun()
+
+def criar_acoes_lote(filtros, total_filtrado, selecionadas):
+    """Mudanças de status, prioridade ou responsável e exclusão para várias ideias de uma vez"""
+    st.subheader("⚡ Ações em Lote")
+    
+    alvo = st.radio(
+        "Aplicar a:",
+        [f"Ideias selecionadas ({len(selecionadas)})", f"Todas as ideias dos filtros ({total_filtrado})"],
+        horizontal=True,
+        key="alvo_lote"
+    )
+    por_filtro = alvo.startswith("Todas")
+    
+    # O filtro vai direto ao servidor: as ideias não são carregadas
+    filtro_lote = filtros if por_filtro else {"_id": {"$in": [ObjectId(i) for i in selecionadas]}}
+    quantidade = total_filtrado if por_filtro else len(selecionadas)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        acao = st.selectbox("Ação", list(ACOES_LOTE) + ["Excluir"], key="acao_lote")
+    
+    with col2:
+        if acao in ACOES_LOTE:
+            campo, opcoes = ACOES_LOTE[acao]
+            valor = st.selectbox("Novo valor", opcoes, key=f"valor_lote_{campo}")
+        else:
+            confirmado = st.checkbox(f"Confirmo a exclusão de {quantidade} ideia(s)", key="confirmar_exclusao_lote")
+    
+    if st.button(f"⚡ Aplicar a {quantidade} ideia(s)", key="aplicar_lote", disabled=quantidade == 0):
+        if acao in ACOES_LOTE:
+            with st.spinner("Atualizando ideias..."):
+                alteradas = mongo_manager.atualizar_ideias_por_filtro(filtro_lote, {campo: valor})
+            st.success(f"✅ {alteradas} ideia(s) atualizada(s)")
+        elif not confirmado:
+            st.warning("⚠️ Confirme a exclusão antes de aplicar.")
+            return
+        else:
+            with st.spinner("Excluindo ideias..."):
+                excluidas = mongo_manager.deletar_ideias_por_filtro(filtro_lote)
+            st.success(f"✅ {excluidas} ideia(s) excluída(s)")
+        
+        selecionadas.clear()
+        st.session_state.pop("paginacao_ideias", None)
+        st.rerun()
+
+def criar_secao_exportacao(filtros):
+    """Exportações em segundo plano com todos os campos, baixadas quando prontas"""
+    st.subheader("📊 Relatórios")
+    
+    col1, col2 = st.columns([1, 2])
+    
+    with col1:
+        formato = st.selectbox("Formato", formatos_disponiveis(), format_func=str.upper, key="formato_exportacao")
+    
+    with col2:
+        st.write("")
+        if st.button("📤 Exportar Ideias Filtradas", key="iniciar_exportacao"):
+            if iniciar_exportacao(filtros, formato):
+                st.success("✅ Exportação iniciada. O arquivo aparece abaixo quando estiver pronto.")
+            else:
+                st.error("❌ Não foi possível iniciar a exportação.")
+    
+    for exportacao in listar_exportacoes(limite=5):
+        criada_em = f"{exportacao['criada_em']:%d/%m/%Y %H:%M}"
+        if exportacao['status'] == 'em_andamento':
+            st.write(f"⏳ {exportacao['formato'].upper()} de {criada_em} — {exportacao['linhas']} ideias até agora")
+        elif exportacao['status'] == 'erro':
+            st.write(f"❌ {exportacao['formato'].upper()} de {criada_em} — {exportacao.get('erro', 'erro desconhecido')}")
+        else:
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                st.write(f"✅ {exportacao['nome_arquivo']} — {exportacao['linhas']} ideias, "
+                         f"{exportacao['tamanho'] / 1024:.0f} KB")
+            with col2:
+                # O arquivo só sai do banco quando o download é pedido, e é
+                # servido do disco pelo servidor estático (sem passar pela memória)
+                chave = f"download_{exportacao['_id']}"
+                if st.session_state.get(chave):
+                    st.markdown(
+                        f'<a href="{st.session_state[chave]}" download="{exportacao["nome_arquivo"]}">📥 Baixar</a>',
+                        unsafe_allow_html=True
+                    )
+                elif st.button("📦 Preparar Download", key=f"preparar_{exportacao['_id']}"):
+                    st.session_state[chave] = publicar_arquivo(exportacao)
+                    st.rerun()
 
 def criar_sistema_controle():
     st.header("📋 Sistema de Controle de Ideias")
@@ -45,8 +285,37 @@ def criar_sistema_controle():
         
         filtros_mongo["data_criacao"] = {"$gte": data_limite}
     
-    # Buscar ideias do MongoDB
-    ideias = mongo_manager.buscar_ideias(filtros_mongo)
+    # Ordenação e tamanho da página (aplicados no servidor)
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        ordenar_por = st.selectbox("Ordenar por", list(ORDENACOES))
+    
+    with col2:
+        decrescente = st.selectbox("Ordem", ["Decrescente", "Crescente"]) == "Decrescente"
+    
+    with col3:
+        tamanho_pagina = st.selectbox("Ideias por página", TAMANHOS_PAGINA, index=1)
+    
+    _garantir_indices()
+    campo_ordem = ORDENACOES[ordenar_por]
+    
+    # Paginação por chave: cursores das páginas visitadas, reiniciados quando a consulta muda
+    assinatura = repr((status_filter, categoria_filter, periodo_filter, campo_ordem, decrescente, tamanho_pagina))
+    estado = st.session_state.get("paginacao_ideias")
+    if estado is None or estado['assinatura'] != assinatura:
+        estado = st.session_state["paginacao_ideias"] = {
+            'assinatura': assinatura, 'cursores': [None], 'pagina': 0, 'cache': {}, 'antecipadas': {}
+        }
+    
+    # Alterações ainda não salvas, por id (mantidas ao trocar de página ou de filtro)
+    pendentes = st.session_state.setdefault("alteracoes_pendentes", {})
+    
+    # Ideias marcadas para as ações em lote, em qualquer página
+    selecionadas = st.session_state.setdefault("ideias_selecionadas", set())
+    
+    ideias, proximo = obter_pagina(estado, filtros_mongo, campo_ordem, decrescente, tamanho_pagina)
+    total_filtrado = mongo_manager.contar_ideias(filtros_mongo)
     
     # Tabela de ideias com controle
     st.subheader("📊 Lista de Ideias")
@@ -56,25 +325,18 @@ def criar_sistema_controle():
         return
     
     # Converter dados do MongoDB para DataFrame
-    dados_para_tabela = []
-    for ideia in ideias:
-        dados_para_tabela.append({
-            'ID': str(ideia['_id'])[:8],  # Primeiros 8 caracteres do ObjectId
-            'Título': ideia.get('titulo', 'Sem título'),
-            'Autor': ideia.get('autor', 'Anônimo'),
-            'Categoria': ideia.get('categoria', 'Não categorizada'),
-            'Status': ideia.get('status', 'Pendente'),
-            'Data': ideia.get('data_criacao', datetime.now()).strftime('%Y-%m-%d') if isinstance(ideia.get('data_criacao'), datetime) else str(ideia.get('data_criacao', ''))[:10],
-            'Prioridade': ideia.get('prioridade', 'Média'),
-            'Responsável': ideia.get('responsavel', 'Não atribuído'),
-            '_id_completo': str(ideia['_id'])  # Para referência interna
-        })
-    
-    dados_ideias = pd.DataFrame(dados_para_tabela)
+    dados_ideias = pd.DataFrame([linha_da_ideia(ideia) for ideia in ideias])
+    
+    # Reaplicar as alterações pendentes desta página
+    dados_exibidos = dados_ideias.copy()
+    dados_exibidos.insert(0, 'Selecionar', dados_ideias['_id_completo'].isin(selecionadas))
+    for posicao, id_completo in enumerate(dados_ideias['_id_completo']):
+        for coluna, valor in pendentes.get(id_completo, {}).items():
+            dados_exibidos.at[posicao, coluna] = valor
     
     # Exibir tabela editável
     edited_df = st.data_editor(
-        dados_ideias.drop('_id_completo', axis=1),  # Não mostrar o ID completo
+        dados_exibidos.drop('_id_completo', axis=1),  # Não mostrar o ID completo
         column_config={
             "Status": st.column_config.SelectboxColumn(
                 "Status",
@@ -86,42 +348,82 @@ def criar_sistema_controle():
             ),
             "Responsável": st.column_config.SelectboxColumn(
                 "Responsável",
-                options=["Não atribuído", "TI", "Infraestrutura", "Pedagógico", "RH", "Direção"]
+                options=[NAO_ATRIBUIDO] + RESPONSAVEIS
+            ),
+            "Selecionar": st.column_config.CheckboxColumn(
+                "✔",
+                help="Marque para incluir a ideia nas ações em lote"
+            ),
+            "Sugestão": st.column_config.TextColumn(
+                "Sugestão",
+                help="Responsável sugerido pelo modelo de triagem",
+                disabled=True
             )
         },
+        disabled=[coluna for coluna in dados_exibidos.columns if coluna not in COLUNAS_EDITAVEIS and coluna != 'Selecionar'],
         hide_index=True,
         use_container_width=True,
-        key="tabela_ideias"
+        num_rows="fixed",
+        key=chave_tabela(estado)
     )
     
-    # Detectar mudanças e atualizar no MongoDB
-    if st.button("💾 Salvar Alterações", type="primary"):
+    # Guardar as diferenças em relação ao banco como alterações pendentes
+    for index, row in edited_df.iterrows():
+        dados_originais = dados_ideias.iloc[index]
+        if row['Selecionar']:
+            selecionadas.add(dados_originais['_id_completo'])
+        else:
+            selecionadas.discard(dados_originais['_id_completo'])
+        
+        mudancas = {
+            coluna: row[coluna] for coluna in COLUNAS_EDITAVEIS
+            if row[coluna] != dados_originais[coluna]
+        }
+        if mudancas:
+            pendentes[dados_originais['_id_completo']] = mudancas
+        else:
+            pendentes.pop(dados_originais['_id_completo'], None)
+    
+    # Navegação entre páginas
+    total_paginas = max((total_filtrado + tamanho_pagina - 1) // tamanho_pagina, 1)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        st.button("⬅️ Anterior", disabled=estado['pagina'] == 0,
+                  on_click=mudar_pagina, args=(-1,), key="pagina_anterior")
+    
+    with col2:
+        st.caption(f"Página {estado['pagina'] + 1} de {total_paginas} · {total_filtrado} ideias"
+                   + (f" · {len(pendentes)} alteração(ões) não salva(s)" if pendentes else ""))
+    
+    with col3:
+        st.button("Próxima ➡️", disabled=proximo is None,
+                  on_click=mudar_pagina, args=(1, proximo), key="pagina_proxima")
+    
+    # Salvar as alterações de todas as páginas
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        salvar = st.button("💾 Salvar Alterações", type="primary")
+    
+    with col2:
+        if st.button("↩️ Descartar Alterações", disabled=not pendentes):
+            pendentes.clear()
+            st.session_state.pop(chave_tabela(estado), None)
+            st.rerun()
+    
+    if salvar:
         alteracoes_salvas = 0
         
-        for index, row in edited_df.iterrows():
-            if index < len(dados_ideias):
-                id_original = dados_ideias.iloc[index]['_id_completo']
-                
-                # Verificar se houve mudanças
-                dados_originais = dados_ideias.iloc[index]
-                mudancas = {}
-                
-                if row['Status'] != dados_originais['Status']:
-                    mudancas['status'] = row['Status']
-                
-                if row['Prioridade'] != dados_originais['Prioridade']:
-                    mudancas['prioridade'] = row['Prioridade']
-                
-                if row['Responsável'] != dados_originais['Responsável']:
-                    mudancas['responsavel'] = row['Responsável']
-                
-                # Se houver mudanças, atualizar no MongoDB
-                if mudancas:
-                    if mongo_manager.atualizar_ideia(id_original, mudancas):
-                        alteracoes_salvas += 1
+        for id_original, mudancas in list(pendentes.items()):
+            dados = {COLUNAS_EDITAVEIS[coluna]: valor for coluna, valor in mudancas.items()}
+            if mongo_manager.atualizar_ideia(id_original, dados):
+                alteracoes_salvas += 1
+                del pendentes[id_original]
         
         if alteracoes_salvas > 0:
             st.success(f"✅ {alteracoes_salvas} ideia(s) atualizada(s) com sucesso!")
+            estado['cache'], estado['antecipadas'] = {}, {}
             st.rerun()  # Recarregar a página para mostrar as mudanças
         else:
             st.info("ℹ️ Nenhuma alteração detectada.")
@@ -129,67 +431,60 @@ def criar_sistema_controle():
     # Estatísticas rápidas
     st.subheader("📈 Estatísticas Rápidas")
     
+    por_status = contar_por_status(filtros_mongo)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_ideias = len(ideias)
-        st.metric("Total de Ideias", total_ideias)
+        st.metric("Total de Ideias", total_filtrado)
     
     with col2:
-        pendentes = len([i for i in ideias if i.get('status') == 'Pendente'])
-        st.metric("Pendentes", pendentes)
+        st.metric("Pendentes", por_status.get('Pendente', 0))
     
     with col3:
-        aprovadas = len([i for i in ideias if i.get('status') == 'Aprovada'])
-        st.metric("Aprovadas", aprovadas)
+        st.metric("Aprovadas", por_status.get('Aprovada', 0))
     
     with col4:
-        implementadas = len([i for i in ideias if i.get('status') == 'Implementada'])
-        st.metric("Implementadas", implementadas)
+        st.metric("Implementadas", por_status.get('Implementada', 0))
     
-    # Ações em lote
-    st.subheader("⚡ Ações em Lote")
+    criar_acoes_lote(filtros_mongo, total_filtrado, selecionadas)
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("📧 Enviar Feedback"):
-            st.success("Feedback enviado para os autores selecionados!")
+    criar_secao_exportacao(filtros_mongo)
     
-    with col2:
-        if st.button("📊 Gerar Relatório"):
-            # Gerar relatório em CSV
-            csv_data = dados_ideias.drop('_id_completo', axis=1).to_csv(index=False)
-            st.download_button(
-                label="📥 Baixar Relatório CSV",
-                data=csv_data,
-                file_name=f"relatorio_ideias_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+    if st.button("🔄 Atualizar Dados"):
+        estado['cache'], estado['antecipadas'] = {}, {}
+        st.rerun()
     
-    with col3:
-        if st.button("🔄 Atualizar Dados"):
-            st.rerun()
+    criar_triagem_responsaveis()
     
     # Seção de detalhes da ideia selecionada
     if not dados_ideias.empty:
         st.subheader("🔍 Detalhes da Ideia")
         
-        # Seletor de ideia
-        opcoes_ideias = [f"{row['ID']} - {row['Título']}" for _, row in dados_ideias.iterrows()]
-        ideia_selecionada = st.selectbox("Selecione uma ideia para ver detalhes:", opcoes_ideias)
+        # Busca por prefixo do ID ou palavras do título (no máximo MAX_SUGESTOES opções)
+        termo_busca = st.text_input(
+            "Buscar ideia por ID ou título:",
+            placeholder="Ex.: 65f1a2b3 ou horta escola",
+            help=f"Sem busca, a lista mostra as ideias da página atual; com busca, até {MAX_SUGESTOES} resultados."
+        )
+        if termo_busca.strip():
+            opcoes_ideias = {
+                ideia['_id']: f"{ideia['_id'][:8]} - {ideia.get('titulo', 'Sem título')}"
+                for ideia in buscar_sugestoes(termo_busca)
+            }
+            if not opcoes_ideias:
+                st.info("🔍 Nenhuma ideia encontrada para a busca.")
+        else:
+            opcoes_ideias = {row['_id_completo']: f"{row['ID']} - {row['Título']}" for _, row in dados_ideias.iterrows()}
         
-        if ideia_selecionada:
-            # Encontrar a ideia selecionada
-            index_selecionado = opcoes_ideias.index(ideia_selecionada)
-            id_completo = dados_ideias.iloc[index_selecionado]['_id_completo']
-            
-            # Buscar detalhes completos da ideia
-            ideia_detalhada = None
-            for ideia in ideias:
-                if str(ideia['_id']) == id_completo:
-                    ideia_detalhada = ideia
-                    break
+        id_completo = st.selectbox(
+            "Selecione uma ideia para ver detalhes:",
+            list(opcoes_ideias),
+            format_func=opcoes_ideias.get
+        )
+        
+        if id_completo:
+            # Buscar detalhes completos da ideia pelo _id (a tabela não carrega a descrição)
+            ideia_detalhada = mongo_manager.buscar_ideia_por_id(id_completo)
             
             if ideia_detalhada:
                 col1, col2 = st.columns(2)
@@ -211,6 +506,23 @@ def criar_sistema_controle():
                 st.write(f"**Descrição:**")
                 st.write(ideia_detalhada.get('descricao', 'Sem descrição disponível'))
                 
+                # Mudanças de status, prioridade e responsável registradas
+                historico = historico_ideia(id_completo)
+                if historico:
+                    with st.expander(f"🕓 Histórico ({len(historico)})"):
+                        for evento in historico:
+                            st.write(f"{evento['data']:%d/%m/%Y %H:%M} · **{evento['campo'].capitalize()}:** "
+                                     f"{evento.get('de') or '—'} → {evento['para']}")
+                
+                # Ideias parecidas, pelo índice vetorial (cosseno entre descrições)
+                relacionadas = ideias_relacionadas(id_completo, k=5)
+                if relacionadas:
+                    with st.expander(f"🔗 Ideias Relacionadas ({len(relacionadas)})"):
+                        for relacionada in relacionadas:
+                            st.write(f"**{relacionada.get('titulo', 'N/A')}** — {relacionada.get('unidade', 'N/A')} "
+                                     f"· {relacionada.get('status', 'N/A')} · {relacionada['similaridade']:.0%} de similaridade")
+                            st.caption(relacionada.get('descricao', '')[:200])
+                
                 # Botão para deletar ideia
                 if st.button("🗑️ Deletar Ideia", type="secondary", key=f"delete_{id_completo}"):
                     if st.session_state.get(f"confirm_delete_{id_completo}", False):
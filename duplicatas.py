@@ -0,0 +1,265 @@
+import hashlib
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from mongodb_connection import mongo_manager
+from processamento_texto import limpar_texto
+
+# Assinaturas MinHash das descrições, com as chaves das bandas LSH indexadas
+COLECAO_ASSINATURAS = "assinaturas_minhash"
+
+# Shingles de caracteres sobre o texto limpo (robustos a pequenas edições)
+TAMANHO_SHINGLE = 5
+
+# 128 permutações em 32 bandas de 4 linhas: pares com Jaccard acima de ~0,42
+# caem no mesmo balde com alta probabilidade; a similaridade estimada filtra o resto
+NUM_PERMUTACOES = 128
+NUM_BANDAS = 32
+LINHAS_POR_BANDA = NUM_PERMUTACOES // NUM_BANDAS
+
+# Similaridade de Jaccard estimada a partir da qual duas ideias são consideradas duplicatas
+LIMIAR_DUPLICATA = 0.5
+
+_PRIMO = np.uint64((1 << 61) - 1)
+_MASCARA_32 = np.uint64(0xFFFFFFFF)
+
+# Coeficientes fixos: as assinaturas precisam ser idênticas entre processos e reinícios
+_gerador = np.random.RandomState(20240601)
+_COEF_A = _gerador.randint(1, 1 << 31, size=NUM_PERMUTACOES, dtype=np.int64).astype(np.uint64)
+_COEF_B = _gerador.randint(0, 1 << 31, size=NUM_PERMUTACOES, dtype=np.int64).astype(np.uint64)
+
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    assinaturas = mongo_manager.obter_colecao(COLECAO_ASSINATURAS)
+    if assinaturas is None:
+        return None
+
+    if not _indices_criados:
+        assinaturas.create_index([("ideia_id", ASCENDING)], unique=True)
+        # Índice multikey: a consulta por bandas só visita os baldes da ideia consultada
+        assinaturas.create_index([("bandas", ASCENDING)])
+        _indices_criados = True
+
+    return assinaturas
+
+def gerar_shingles(texto: str) -> np.ndarray:
+    """Hashes (32 bits) dos shingles de caracteres do texto limpo"""
+    texto = limpar_texto(texto)
+    if not texto:
+        return np.empty(0, dtype=np.uint64)
+    if len(texto) <= TAMANHO_SHINGLE:
+        shingles = {texto}
+    else:
+        shingles = {texto[i:i + TAMANHO_SHINGLE] for i in range(len(texto) - TAMANHO_SHINGLE + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def calcular_assinatura(texto: str) -> Optional[np.ndarray]:
+    """Assinatura MinHash (NUM_PERMUTACOES valores uint32); None para texto vazio"""
+    hashes = gerar_shingles(texto)
+    if hashes.size == 0:
+        return None
+
+    # (a*x + b) mod p para todas as permutações de uma vez: matriz permutações x shingles
+    permutados = (np.outer(_COEF_A, hashes) + _COEF_B[:, None]) % _PRIMO & _MASCARA_32
+    return permutados.min(axis=1).astype(np.uint32)
+
+def chaves_bandas(assinatura: np.ndarray) -> List[str]:
+    """Uma chave por banda ("banda:hash"), usada como balde do LSH"""
+    bandas = assinatura.reshape(NUM_BANDAS, LINHAS_POR_BANDA)
+    return [
+        f"{i}:{hashlib.blake2b(banda.tobytes(), digest_size=8).hexdigest()}"
+        for i, banda in enumerate(bandas)
+    ]
+
+def similaridade_estimada(assinatura: np.ndarray, outras: np.ndarray) -> np.ndarray:
+    """Jaccard estimado entre uma assinatura e uma matriz de assinaturas (uma por linha)"""
+    return (outras == assinatura).mean(axis=1)
+
+def indexar_ideia(ideia: Dict):
+    """Grava (ou remove, se a descrição estiver vazia) a assinatura de uma ideia"""
+    assinaturas = _obter_colecao()
+    if assinaturas is None:
+        return
+
+    ideia_id = str(ideia['_id'])
+    assinatura = calcular_assinatura(ideia.get('descricao', ''))
+    if assinatura is None:
+        assinaturas.delete_one({"ideia_id": ideia_id})
+        return
+
+    assinaturas.update_one(
+        {"ideia_id": ideia_id},
+        {"$set": {"assinatura": assinatura.tolist(), "bandas": chaves_bandas(assinatura)}},
+        upsert=True
+    )
+
+def atualizar_indice_duplicatas(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: mantém as assinaturas em dia a cada escrita"""
+    if evento == 'deletar':
+        assinaturas = _obter_colecao()
+        if assinaturas is not None:
+            assinaturas.delete_one({"ideia_id": str(antes['_id'])})
+        return
+
+    if evento == 'atualizar' and antes.get('descricao') == depois.get('descricao'):
+        return
+
+    indexar_ideia(depois)
+
+def buscar_duplicatas(descricao: str, limite: int = 5, limiar: float = LIMIAR_DUPLICATA,
+                      excluir_id: Optional[str] = None) -> List[Dict]:
+    """Ideias com descrição parecida, consultando apenas os baldes LSH da descrição
+
+    Retorna dicionários com _id, titulo, autor, unidade, status e similaridade,
+    da mais parecida para a menos parecida.
+    """
+    assinaturas = _obter_colecao()
+    assinatura = calcular_assinatura(descricao)
+    if assinaturas is None or assinatura is None:
+        return []
+
+    candidatos = list(assinaturas.find(
+        {"bandas": {"$in": chaves_bandas(assinatura)}, "ideia_id": {"$ne": excluir_id}},
+        {"_id": 0, "ideia_id": 1, "assinatura": 1}
+    ))
+    if not candidatos:
+        return []
+
+    matriz = np.array([doc["assinatura"] for doc in candidatos], dtype=np.uint32)
+    similaridades = similaridade_estimada(assinatura, matriz)
+    selecionados = [i for i in np.argsort(-similaridades) if similaridades[i] >= limiar][:limite]
+    if not selecionados:
+        return []
+
+    ids = [candidatos[i]["ideia_id"] for i in selecionados]
+    detalhes = {
+        str(doc["_id"]): doc
+        for doc in mongo_manager.collection.find(
+            {"_id": {"$in": [ObjectId(i) for i in ids]}},
+            {"titulo": 1, "autor": 1, "unidade": 1, "status": 1}
+        )
+    }
+
+    return [
+        {
+            '_id': ideia_id,
+            'titulo': detalhes.get(ideia_id, {}).get('titulo', ''),
+            'autor': detalhes.get(ideia_id, {}).get('autor', ''),
+            'unidade': detalhes.get(ideia_id, {}).get('unidade', ''),
+            'status': detalhes.get(ideia_id, {}).get('status', ''),
+            'similaridade': float(similaridades[i]),
+        }
+        for ideia_id, i in zip(ids, selecionados)
+        if ideia_id in detalhes
+    ]
+
+def _raiz(pais: Dict[str, str], item: str) -> str:
+    while pais[item] != item:
+        pais[item] = pais[pais[item]]
+        item = pais[item]
+    return item
+
+def agrupar_duplicatas(limiar: float = LIMIAR_DUPLICATA) -> List[List[Tuple[str, float]]]:
+    """Agrupa as ideias já cadastradas em grupos de duplicatas (relatório em lote)
+
+    Só compara pares que compartilham algum balde LSH; os pares confirmados
+    pela similaridade estimada são unidos (union-find). Cada grupo traz os ids
+    e a maior similaridade de cada ideia com outra do grupo, maiores grupos primeiro.
+    """
+    assinaturas = _obter_colecao()
+    if assinaturas is None:
+        return []
+
+    ids: List[str] = []
+    vetores: List[List[int]] = []
+    baldes: Dict[str, List[int]] = {}
+    for doc in assinaturas.find({}, {"_id": 0, "ideia_id": 1, "assinatura": 1, "bandas": 1}).batch_size(5000):
+        posicao = len(ids)
+        ids.append(doc["ideia_id"])
+        vetores.append(doc["assinatura"])
+        for chave in doc["bandas"]:
+            baldes.setdefault(chave, []).append(posicao)
+
+    if not ids:
+        return []
+
+    matriz = np.array(vetores, dtype=np.uint32)
+    pais = {ideia_id: ideia_id for ideia_id in ids}
+    melhor = {}
+    comparados = set()
+
+    for membros in baldes.values():
+        if len(membros) < 2:
+            continue
+        for posicao, atual in enumerate(membros[:-1]):
+            outros = [m for m in membros[posicao + 1:] if (atual, m) not in comparados]
+            if not outros:
+                continue
+            comparados.update((atual, m) for m in outros)
+            similaridades = similaridade_estimada(matriz[atual], matriz[outros])
+            for outro, similaridade in zip(outros, similaridades):
+                if similaridade < limiar:
+                    continue
+                a, b = ids[atual], ids[outro]
+                pais[_raiz(pais, a)] = _raiz(pais, b)
+                melhor[a] = max(melhor.get(a, 0.0), float(similaridade))
+                melhor[b] = max(melhor.get(b, 0.0), float(similaridade))
+
+    grupos: Dict[str, List[Tuple[str, float]]] = {}
+    for ideia_id in melhor:
+        grupos.setdefault(_raiz(pais, ideia_id), []).append((ideia_id, melhor[ideia_id]))
+
+    return sorted(
+        (sorted(grupo, key=lambda item: -item[1]) for grupo in grupos.values()),
+        key=len, reverse=True
+    )
+
+def reconstruir_assinaturas(tamanho_lote: int = 1000) -> int:
+    """Recalcula as assinaturas de todas as ideias (carga inicial ou mudança de parâmetros)"""
+    assinaturas = _obter_colecao()
+    if assinaturas is None:
+        return 0
+
+    assinaturas.delete_many({})
+    total = 0
+    for lote in mongo_manager.iterar_ideias(projecao={"descricao": 1}, tamanho_lote=tamanho_lote):
+        operacoes = []
+        for ideia in lote:
+            assinatura = calcular_assinatura(ideia.get('descricao', ''))
+            if assinatura is None:
+                continue
+            operacoes.append(UpdateOne(
+                {"ideia_id": ideia['_id']},
+                {"$set": {"assinatura": assinatura.tolist(), "bandas": chaves_bandas(assinatura)}},
+                upsert=True
+            ))
+        if operacoes:
+            assinaturas.bulk_write(operacoes, ordered=False)
+            total += len(operacoes)
+    return total
+
+def preparar_exclusao_duplicatas(filtros: Dict, ids: List[str]) -> Optional[Callable]:
+    """Observador de exclusão: remove as assinaturas das ideias excluídas em um delete_many"""
+    assinaturas = _obter_colecao()
+    if assinaturas is None:
+        return None
+
+    def remover():
+        assinaturas.delete_many({"ideia_id": {"$in": ids}})
+    return remover
+
+mongo_manager.registrar_observador(atualizar_indice_duplicatas)
+mongo_manager.registrar_observador_exclusao(preparar_exclusao_duplicatas)
+
+# Reconstrução manual: python duplicatas.py
+if __name__ == "__main__":
+    print("Recalculando assinaturas MinHash...")
+    print(f"✅ {reconstruir_assinaturas()} ideias indexadas")
+    grupos = agrupar_duplicatas()
+    print(f"🔁 {len(grupos)} grupos de possíveis duplicatas")
@@ -0,0 +1,129 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from regras_gamificacao import avaliar_regras, montar_tabela, obter_regras, pontos_da_ideia
+
+# Datas de criação mais recentes guardadas por autor (badges por período)
+MAX_ULTIMAS_DATAS = 10
+
+# Campos da ideia lidos para a gamificação
+CAMPOS_GAMIFICACAO = {'autor': 1, 'status': 1, 'prioridade': 1, 'data_criacao': 1, 'categoria': 1}
+
+def autor_identificado(ideia: Dict) -> Optional[str]:
+    """Nome do autor, ou None para ideias anônimas"""
+    autor = ideia.get('autor', 'Anônimo')
+    return None if not autor or autor == 'Anônimo' else autor
+
+def obter_titulo_badge(pontos: int) -> str:
+    """Retorna o título baseado nos pontos"""
+    titulos = obter_regras()['titulos']
+    return next((t['nome'] for t in reversed(titulos) if pontos >= t['minimo']), titulos[0]['nome'])
+
+def obter_proximo_titulo(pontos: int) -> Optional[Tuple[int, str]]:
+    """(pontos necessários, título) do próximo nível, ou None no nível máximo"""
+    proximo = next((t for t in obter_regras()['titulos'] if t['minimo'] > pontos), None)
+    return (proximo['minimo'], proximo['nome']) if proximo else None
+
+@dataclass
+class EstatisticasAutor:
+    """Resumo de um colaborador: contagens por status, prioridade, categoria e mês, e pontos
+
+    Montado em uma única passada pelas ideias (``adicionar``) ou lido do
+    documento do ranking persistido (``de_documento``).
+    """
+    autor: str
+    total_ideias: int = 0
+    pontos: int = 0
+    por_status: Counter = field(default_factory=Counter)
+    por_prioridade: Counter = field(default_factory=Counter)
+    por_categoria: Counter = field(default_factory=Counter)
+    por_mes: Counter = field(default_factory=Counter)
+    ultimas_datas: List[datetime] = field(default_factory=list)
+
+    def adicionar(self, ideia: Dict):
+        self.total_ideias += 1
+        self.pontos += pontos_da_ideia(ideia)
+        self.por_status[ideia.get('status', 'Pendente')] += 1
+        self.por_prioridade[ideia.get('prioridade', 'Média')] += 1
+        self.por_categoria[ideia.get('categoria') or 'Não categorizada'] += 1
+
+        data_criacao = ideia.get('data_criacao')
+        if isinstance(data_criacao, datetime):
+            self.por_mes[data_criacao.strftime('%Y-%m')] += 1
+            if len(self.ultimas_datas) < MAX_ULTIMAS_DATAS or data_criacao > self.ultimas_datas[-1]:
+                self.ultimas_datas = sorted(self.ultimas_datas + [data_criacao], reverse=True)[:MAX_ULTIMAS_DATAS]
+
+    @property
+    def implementadas(self) -> int:
+        return self.por_status['Implementada']
+
+    @property
+    def ideias_semana(self) -> int:
+        uma_semana_atras = datetime.now() - timedelta(days=7)
+        return sum(1 for data in self.ultimas_datas if data >= uma_semana_atras)
+
+    @property
+    def ideias_mes(self) -> int:
+        return self.por_mes[datetime.now().strftime('%Y-%m')]
+
+    @property
+    def titulo(self) -> str:
+        return obter_titulo_badge(self.pontos)
+
+    @property
+    def badges(self) -> List[str]:
+        return avaliar_regras(montar_tabela([self]))['badges'].iloc[0]
+
+    def para_documento(self) -> Dict:
+        """Documento da coleção de ranking (contagens, pontos, título e badges)"""
+        return {
+            'autor': self.autor,
+            'total_ideias': self.total_ideias,
+            'pontos': self.pontos,
+            'por_status': dict(self.por_status),
+            'por_prioridade': dict(self.por_prioridade),
+            'por_categoria': dict(self.por_categoria),
+            'por_mes': dict(self.por_mes),
+            'ultimas_datas': self.ultimas_datas,
+            'titulo': self.titulo,
+            'badges': self.badges,
+        }
+
+    @classmethod
+    def de_documento(cls, documento: Dict) -> 'EstatisticasAutor':
+        return cls(
+            autor=documento['autor'],
+            total_ideias=documento.get('total_ideias', 0),
+            pontos=documento.get('pontos', 0),
+            por_status=Counter(documento.get('por_status', {})),
+            por_prioridade=Counter(documento.get('por_prioridade', {})),
+            por_categoria=Counter(documento.get('por_categoria', {})),
+            por_mes=Counter(documento.get('por_mes', {})),
+            ultimas_datas=list(documento.get('ultimas_datas', [])),
+        )
+
+@dataclass
+class ResumoGamificacao:
+    """Estatísticas por autor e agregados gerais das ideias"""
+    autores: Dict[str, EstatisticasAutor] = field(default_factory=dict)
+    categorias: Counter = field(default_factory=Counter)
+    total_ideias: int = 0
+
+def calcular_estatisticas(ideias: Iterable[Dict]) -> ResumoGamificacao:
+    """Dobra cada ideia no registro do seu autor (ideias anônimas só entram nos agregados)"""
+    resumo = ResumoGamificacao()
+    for ideia in ideias:
+        resumo.total_ideias += 1
+        resumo.categorias[ideia.get('categoria', 'Geral')] += 1
+
+        autor = autor_identificado(ideia)
+        if autor is None:
+            continue
+        estatisticas = resumo.autores.get(autor)
+        if estatisticas is None:
+            estatisticas = resumo.autores[autor] = EstatisticasAutor(autor)
+        estatisticas.adicionar(ideia)
+
+    return resumo
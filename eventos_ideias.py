@@ -0,0 +1,326 @@
+import uuid
+from bisect import bisect_right
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from mongodb_connection import mongo_manager
+
+# Histórico de mudanças (só inserções) e tempos de ciclo agregados
+COLECAO_EVENTOS = "eventos_ideias"
+COLECAO_CICLO = "estatisticas_ciclo"
+
+# Eventos de atualizações em massa aguardando o update_many; os de lotes
+# cuja escrita falhou expiram sozinhos (índice TTL)
+COLECAO_EVENTOS_PENDENTES = "eventos_ideias_pendentes"
+EXPIRACAO_PENDENTES_SEGUNDOS = 86400
+
+# Campos cujas mudanças viram eventos
+CAMPOS_EVENTOS = ('status', 'prioridade', 'responsavel')
+
+# Etapas do fluxo, na ordem
+ETAPAS = ["Pendente", "Em Análise", "Aprovada", "Implementada"]
+DECISOES = ("Aprovada", "Rejeitada")
+
+# Limites (em dias) das contagens acumuladas usadas para estimar percentis
+FAIXAS_DIAS = (1, 3, 7, 14, 30, 60, 90, 180, 365)
+
+# Escopos das estatísticas; 'global' usa chave vazia
+ESCOPOS_CICLO = ('global', 'categoria', 'unidade')
+
+MILISSEGUNDOS_POR_DIA = 86400000
+
+_indices_criados = False
+
+def _obter_colecoes():
+    global _indices_criados
+    eventos = mongo_manager.obter_colecao(COLECAO_EVENTOS)
+    ciclo = mongo_manager.obter_colecao(COLECAO_CICLO)
+    if eventos is None or ciclo is None:
+        return None, None
+
+    if not _indices_criados:
+        eventos.create_index([("ideia_id", ASCENDING), ("data", ASCENDING)])
+        eventos.create_index([("campo", ASCENDING), ("para", ASCENDING), ("data", DESCENDING)])
+        eventos.create_index([("lote", ASCENDING)], sparse=True)
+        ciclo.create_index([("escopo", ASCENDING), ("chave", ASCENDING), ("metrica", ASCENDING)], unique=True)
+        pendentes = mongo_manager.obter_colecao(COLECAO_EVENTOS_PENDENTES)
+        pendentes.create_index([("lote", ASCENDING)])
+        pendentes.create_index([("data", ASCENDING)], expireAfterSeconds=EXPIRACAO_PENDENTES_SEGUNDOS)
+        _indices_criados = True
+
+    return eventos, ciclo
+
+def _dias(inicio, fim: datetime) -> Optional[float]:
+    return (fim - inicio).total_seconds() / 86400 if isinstance(inicio, datetime) else None
+
+def metricas_da_transicao(de: Optional[str], para: str) -> List[str]:
+    """Métricas de ciclo alimentadas por uma mudança de status
+
+    tempo_em:<status> mede a permanência no status que terminou;
+    ate_decisao e ate_implementacao contam desde a criação da ideia.
+    """
+    metricas = [f"tempo_em:{de or 'Pendente'}"]
+    if para in DECISOES and de not in DECISOES + ('Implementada',):
+        metricas.append("ate_decisao")
+    if para == "Implementada":
+        metricas.append("ate_implementacao")
+    return metricas
+
+def _parcela(metrica: str, categoria: str, unidade: str, quantidade: int, soma: float,
+             minimo: float, maximo: float, ate: Dict[str, int]) -> Dict:
+    return {"metrica": metrica, "categoria": categoria, "unidade": unidade, "quantidade": quantidade,
+            "soma_dias": soma, "minimo": minimo, "maximo": maximo, "ate": ate}
+
+def _parcela_de_duracao(metrica: str, documento: Dict, dias: float) -> Dict:
+    indice = bisect_right(FAIXAS_DIAS, dias)
+    ate = {str(limite): 1 for limite in FAIXAS_DIAS[indice:]}
+    return _parcela(metrica, documento['categoria'], documento['unidade'], 1, dias, dias, dias, ate)
+
+def _gravar_parcelas(ciclo, parcelas: List[Dict]):
+    """Soma as parcelas nos escopos global, categoria e unidade (um bulk_write)"""
+    operacoes = []
+    for parcela in parcelas:
+        incrementos = {"quantidade": parcela['quantidade'], "soma_dias": parcela['soma_dias']}
+        incrementos.update({f"ate.{limite}": total for limite, total in parcela['ate'].items() if total})
+        for escopo, chave in (('global', ''), ('categoria', parcela['categoria']), ('unidade', parcela['unidade'])):
+            operacoes.append(UpdateOne(
+                {"escopo": escopo, "chave": chave, "metrica": parcela['metrica']},
+                {"$inc": incrementos, "$min": {"minimo": parcela['minimo']}, "$max": {"maximo": parcela['maximo']}},
+                upsert=True
+            ))
+    if operacoes:
+        ciclo.bulk_write(operacoes, ordered=False)
+
+def registrar_evento(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: registra as mudanças de status, prioridade e responsável
+
+    status_desde já é gravado pelo próprio atualizar_ideia, na mesma escrita.
+    """
+    if evento != 'atualizar':
+        return
+    mudancas = [c for c in CAMPOS_EVENTOS if antes.get(c) != depois.get(c)]
+    if not mudancas:
+        return
+
+    eventos, ciclo = _obter_colecoes()
+    if eventos is None:
+        return
+
+    agora = depois.get('data_atualizacao', datetime.now())
+    base = {
+        "ideia_id": str(depois['_id']),
+        "data": agora,
+        "categoria": depois.get('categoria') or 'Não categorizada',
+        "unidade": depois.get('unidade') or 'Não informada',
+        "dias_desde_criacao": _dias(depois.get('data_criacao'), agora),
+    }
+    documentos = [{**base, "campo": campo, "de": antes.get(campo), "para": depois.get(campo)} for campo in mudancas]
+
+    parcelas = []
+    for documento in documentos:
+        if documento['campo'] != 'status':
+            continue
+        documento['dias_no_status'] = _dias(antes.get('status_desde') or antes.get('data_criacao'), agora)
+        duracoes = {"ate_decisao": documento['dias_desde_criacao'], "ate_implementacao": documento['dias_desde_criacao']}
+        for metrica in metricas_da_transicao(documento['de'], documento['para']):
+            dias = duracoes.get(metrica, documento['dias_no_status'])
+            if dias is not None:
+                parcelas.append(_parcela_de_duracao(metrica, documento, dias))
+
+    eventos.insert_many(documentos)
+    _gravar_parcelas(ciclo, parcelas)
+
+def _duracao_em_dias(inicio, agora: datetime) -> Dict:
+    """Dias entre `inicio` e `agora`, calculados no servidor (null se `inicio` não for data)
+
+    `agora` vem do cliente (datetime.now(), horário local como as demais
+    datas das ideias); $$NOW seria UTC.
+    """
+    return {"$cond": [
+        {"$eq": [{"$type": inicio}, "date"]},
+        {"$divide": [{"$subtract": [{"$literal": agora}, inicio]}, MILISSEGUNDOS_POR_DIA]},
+        None
+    ]}
+
+def _agrupar_parcelas(eventos, filtro: Dict, campo_dias: str, metrica: str) -> List[Dict]:
+    """Parcelas de ciclo agregadas no servidor a partir dos eventos do filtro"""
+    grupos = eventos.aggregate([
+        {"$match": {**filtro, campo_dias: {"$type": "number"}}},
+        {"$group": {
+            "_id": {"categoria": "$categoria", "unidade": "$unidade",
+                    **({"de": "$de"} if metrica == 'tempo_em' else {})},
+            "quantidade": {"$sum": 1},
+            "soma": {"$sum": f"${campo_dias}"},
+            "minimo": {"$min": f"${campo_dias}"},
+            "maximo": {"$max": f"${campo_dias}"},
+            **{f"ate_{limite}": {"$sum": {"$cond": [{"$lt": [f"${campo_dias}", limite]}, 1, 0]}}
+               for limite in FAIXAS_DIAS},
+        }}
+    ])
+    return [
+        _parcela(
+            f"tempo_em:{grupo['_id'].get('de') or 'Pendente'}" if metrica == 'tempo_em' else metrica,
+            grupo['_id']['categoria'], grupo['_id']['unidade'], grupo['quantidade'],
+            grupo['soma'], grupo['minimo'], grupo['maximo'],
+            {str(limite): grupo[f"ate_{limite}"] for limite in FAIXAS_DIAS}
+        )
+        for grupo in grupos
+    ]
+
+def registrar_eventos_lote(filtros: Dict, novos_dados: Dict) -> Optional[Callable]:
+    """Observador de lote: gera no servidor um evento por ideia que vai mudar
+
+    Um aggregate com $merge por campo alterado monta os eventos (com os
+    valores anteriores) antes do update_many, sem trazer as ideias ao
+    cliente, em uma coleção de pendentes. Só depois que a escrita der certo
+    eles passam para o histórico e entram nos tempos de ciclo; se ela
+    falhar, os pendentes expiram. status_desde vai no próprio update_many.
+    """
+    campos = [c for c in CAMPOS_EVENTOS if c in novos_dados]
+    eventos, ciclo = _obter_colecoes()
+    if not campos or eventos is None:
+        return None
+    pendentes = mongo_manager.obter_colecao(COLECAO_EVENTOS_PENDENTES)
+
+    # Mesmo horário gravado em data_atualizacao/status_desde pelo update_many
+    agora = novos_dados.get('data_atualizacao') or datetime.now()
+    lote = uuid.uuid4().hex
+    for campo in campos:
+        projecao = {
+            "_id": 0,
+            "ideia_id": {"$toString": "$_id"},
+            "campo": {"$literal": campo},
+            "de": f"${campo}",
+            "para": {"$literal": novos_dados[campo]},
+            "data": {"$literal": agora},
+            "categoria": {"$ifNull": ["$categoria", "Não categorizada"]},
+            "unidade": {"$ifNull": ["$unidade", "Não informada"]},
+            "dias_desde_criacao": _duracao_em_dias("$data_criacao", agora),
+            "lote": {"$literal": lote},
+        }
+        if campo == 'status':
+            projecao["dias_no_status"] = _duracao_em_dias({"$ifNull": ["$status_desde", "$data_criacao"]}, agora)
+        mongo_manager.collection.aggregate([
+            {"$match": {"$and": [filtros, {campo: {"$ne": novos_dados[campo]}}]}},
+            {"$project": projecao},
+            {"$merge": {"into": COLECAO_EVENTOS_PENDENTES, "whenNotMatched": "insert"}}
+        ])
+
+    def confirmar_eventos():
+        pendentes.aggregate([
+            {"$match": {"lote": lote}},
+            {"$merge": {"into": COLECAO_EVENTOS, "whenMatched": "keepExisting", "whenNotMatched": "insert"}}
+        ])
+        pendentes.delete_many({"lote": lote})
+        if 'status' not in campos:
+            return
+
+        para = novos_dados['status']
+        filtro_lote = {"lote": lote, "campo": "status"}
+        parcelas = _agrupar_parcelas(eventos, filtro_lote, "dias_no_status", "tempo_em")
+        if para in DECISOES:
+            parcelas += _agrupar_parcelas(
+                eventos, {**filtro_lote, "de": {"$nin": list(DECISOES) + ["Implementada"]}}, "dias_desde_criacao", "ate_decisao"
+            )
+        if para == "Implementada":
+            parcelas += _agrupar_parcelas(eventos, filtro_lote, "dias_desde_criacao", "ate_implementacao")
+        _gravar_parcelas(ciclo, parcelas)
+
+    return confirmar_eventos
+
+def historico_ideia(ideia_id: str) -> List[Dict]:
+    """Eventos da ideia em ordem cronológica"""
+    eventos, _ = _obter_colecoes()
+    if eventos is None:
+        return []
+    return list(eventos.find({"ideia_id": ideia_id}, {"_id": 0, "ideia_id": 0}).sort("data", ASCENDING))
+
+def contar_transicoes(inicio: datetime, fim: datetime, campo: str = 'status') -> Dict[str, int]:
+    """Mudanças de `campo` no período, por valor de destino (pelo índice campo/para/data)"""
+    eventos, _ = _obter_colecoes()
+    if eventos is None:
+        return {}
+    resultado = eventos.aggregate([
+        {"$match": {"campo": campo, "data": {"$gte": inicio, "$lt": fim}}},
+        {"$group": {"_id": "$para", "total": {"$sum": 1}}}
+    ])
+    return {item["_id"]: item["total"] for item in resultado}
+
+def ciclo_no_periodo(inicio: datetime, fim: datetime) -> Dict[str, Dict]:
+    """Tempo médio até a decisão e até a implementação das transições ocorridas no período"""
+    eventos, _ = _obter_colecoes()
+    if eventos is None:
+        return {}
+
+    filtros = {
+        "ate_decisao": {"para": {"$in": list(DECISOES)}, "de": {"$nin": list(DECISOES) + ["Implementada"]}},
+        "ate_implementacao": {"para": "Implementada"},
+    }
+    resultado = {}
+    for metrica, filtro in filtros.items():
+        grupo = next(eventos.aggregate([
+            {"$match": {"campo": "status", **filtro, "data": {"$gte": inicio, "$lt": fim},
+                        "dias_desde_criacao": {"$type": "number"}}},
+            {"$group": {"_id": None, "quantidade": {"$sum": 1}, "media_dias": {"$avg": "$dias_desde_criacao"}}}
+        ]), None)
+        if grupo:
+            resultado[metrica] = grupo
+    return resultado
+
+def percentil_aproximado(estatistica: Dict, fracao: float) -> Optional[float]:
+    """Menor limite de FAIXAS_DIAS que cobre a fração pedida (None se passar do último)"""
+    alvo = fracao * estatistica.get('quantidade', 0)
+    return next((limite for limite in FAIXAS_DIAS if estatistica.get('ate', {}).get(str(limite), 0) >= alvo), None)
+
+def obter_estatisticas_ciclo(escopo: str = 'global', chave: str = '') -> List[Dict]:
+    """Tempos de ciclo pré-agregados do escopo: quantidade, média, mínimo, máximo e mediana aproximada"""
+    _, ciclo = _obter_colecoes()
+    if ciclo is None:
+        return []
+
+    resultado = []
+    for estatistica in ciclo.find({"escopo": escopo, "chave": chave}, {"_id": 0}):
+        quantidade = estatistica.get('quantidade', 0)
+        if quantidade <= 0:
+            continue
+        resultado.append({
+            **estatistica,
+            "media_dias": estatistica['soma_dias'] / quantidade,
+            "mediana_ate_dias": percentil_aproximado(estatistica, 0.5),
+            "p90_ate_dias": percentil_aproximado(estatistica, 0.9),
+        })
+    return resultado
+
+def listar_chaves_ciclo(escopo: str) -> List[str]:
+    """Categorias ou unidades com estatísticas de ciclo"""
+    _, ciclo = _obter_colecoes()
+    if ciclo is None:
+        return []
+    return sorted(ciclo.distinct("chave", {"escopo": escopo}))
+
+def reconstruir_estatisticas_ciclo() -> int:
+    """Refaz as estatísticas de ciclo a partir do histórico de eventos (agregação no servidor)"""
+    eventos, ciclo = _obter_colecoes()
+    if eventos is None:
+        return 0
+
+    ciclo.delete_many({})
+    filtro = {"campo": "status"}
+    parcelas = _agrupar_parcelas(eventos, filtro, "dias_no_status", "tempo_em")
+    parcelas += _agrupar_parcelas(
+        eventos, {**filtro, "para": {"$in": list(DECISOES)}, "de": {"$nin": list(DECISOES) + ["Implementada"]}},
+        "dias_desde_criacao", "ate_decisao"
+    )
+    parcelas += _agrupar_parcelas(eventos, {**filtro, "para": "Implementada"}, "dias_desde_criacao", "ate_implementacao")
+    _gravar_parcelas(ciclo, parcelas)
+    return ciclo.count_documents({"escopo": "global"})
+
+mongo_manager.registrar_observador(registrar_evento)
+mongo_manager.registrar_observador_lote(registrar_eventos_lote)
+
+# Reconstrução manual: python eventos_ideias.py
+if __name__ == "__main__":
+    print("Reconstruindo estatísticas de ciclo a partir dos eventos...")
+    print(f"✅ {reconstruir_estatisticas_ciclo()} métricas globais")
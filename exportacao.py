@@ -0,0 +1,342 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from bson import Decimal128, ObjectId
+from gridfs import GridFS
+from pymongo import ASCENDING, DESCENDING
+
+from mongodb_connection import mongo_manager
+
+# Importações opcionais dos formatos binários
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    XLSX_DISPONIVEL = True
+except ImportError:
+    XLSX_DISPONIVEL = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIVEL = True
+except ImportError:
+    PARQUET_DISPONIVEL = False
+
+# Uma tarefa por exportação e o arquivo gerado no GridFS
+COLECAO_EXPORTACOES = "exportacoes"
+BUCKET_EXPORTACOES = "exportacoes_arquivos"
+
+FORMATOS = {
+    "csv": ("text/csv", True),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", XLSX_DISPONIVEL),
+    "parquet": ("application/vnd.apache.parquet", PARQUET_DISPONIVEL),
+}
+
+# Ideias lidas do cursor por vez (a memória usada não depende do total)
+TAMANHO_LOTE = 1000
+
+# Colunas exibidas primeiro; os demais campos seguem em ordem alfabética
+COLUNAS_PRINCIPAIS = (
+    '_id', 'titulo', 'descricao', 'autor', 'unidade', 'categoria', 'status', 'prioridade',
+    'responsavel', 'data_criacao', 'data_atualizacao'
+)
+
+# Limite de caracteres de uma célula do Excel
+MAX_CARACTERES_CELULA = 32767
+
+# Exportações concluídas há mais tempo que isto são removidas
+DIAS_RETENCAO = 7
+
+# Exportação sem progresso por mais que isto (processo encerrado no meio) vira erro;
+# enquanto roda, a tarefa renova atualizada_em a cada INTERVALO_SINAL_SEGUNDOS
+LIMITE_SEM_PROGRESSO_SEGUNDOS = 600
+INTERVALO_SINAL_SEGUNDOS = 60
+
+# Intervalo mínimo entre duas limpezas das exportações antigas
+INTERVALO_LIMPEZA_SEGUNDOS = 3600
+
+# Downloads servidos pelo servidor estático do Streamlit (server.enableStaticServing),
+# que lê o arquivo do disco em blocos; cada download fica em uma pasta de nome aleatório
+PASTA_DOWNLOADS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'exportacoes')
+URL_DOWNLOADS = "app/static/exportacoes"
+TAMANHO_BLOCO = 1024 * 1024
+
+TIPOS_NUMERICOS = {'int', 'long', 'double', 'decimal'}
+
+_executor = ThreadPoolExecutor(max_workers=2)
+_limpeza_em: Optional[float] = None
+_trava_limpeza = threading.Lock()
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    exportacoes = mongo_manager.obter_colecao(COLECAO_EXPORTACOES)
+    if exportacoes is None:
+        return None
+
+    if not _indices_criados:
+        exportacoes.create_index([("criada_em", DESCENDING)])
+        exportacoes.create_index([("status", ASCENDING), ("concluida_em", ASCENDING)])
+        _indices_criados = True
+
+    return exportacoes
+
+def formatos_disponiveis() -> List[str]:
+    return [formato for formato, (_, disponivel) in FORMATOS.items() if disponivel]
+
+def descobrir_colunas(filtros: Dict) -> List[Tuple[str, set]]:
+    """Todos os campos das ideias filtradas e os tipos BSON de cada um, agregados no servidor"""
+    campos = mongo_manager.collection.aggregate([
+        {"$match": filtros},
+        {"$project": {"campos": {"$objectToArray": "$$ROOT"}}},
+        {"$unwind": "$campos"},
+        {"$group": {"_id": "$campos.k", "tipos": {"$addToSet": {"$type": "$campos.v"}}}}
+    ], allowDiskUse=True)
+    tipos = {campo["_id"]: set(campo["tipos"]) - {"null", "missing"} for campo in campos}
+    ordem = [c for c in COLUNAS_PRINCIPAIS if c in tipos] + sorted(c for c in tipos if c not in COLUNAS_PRINCIPAIS)
+    return [(coluna, tipos[coluna]) for coluna in ordem]
+
+def converter_valor(valor):
+    """Valor exportável: ids e decimais como texto/número, subdocumentos e listas como JSON"""
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    if isinstance(valor, Decimal128):
+        return float(valor.to_decimal())
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    return valor
+
+def _lotes(filtros: Dict):
+    cursor = (mongo_manager.collection.find(filtros)
+              .sort("data_criacao", DESCENDING)
+              .batch_size(TAMANHO_LOTE))
+    while True:
+        lote = list(islice(cursor, TAMANHO_LOTE))
+        if not lote:
+            return
+        yield lote
+
+def _escrever_csv(destino: BinaryIO, colunas: List[Tuple[str, set]], filtros: Dict, progresso) -> int:
+    # utf-8-sig: o Excel reconhece a acentuação ao abrir o CSV
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto)
+    nomes = [coluna for coluna, _ in colunas]
+    escritor.writerow(nomes)
+
+    total = 0
+    for lote in _lotes(filtros):
+        escritor.writerows([converter_valor(ideia.get(coluna)) for coluna in nomes] for ideia in lote)
+        total += len(lote)
+        progresso(total)
+
+    texto.flush()
+    texto.detach()
+    return total
+
+def _valor_celula(valor):
+    valor = converter_valor(valor)
+    if isinstance(valor, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', valor)[:MAX_CARACTERES_CELULA]
+    return valor
+
+def _escrever_xlsx(destino: BinaryIO, colunas: List[Tuple[str, set]], filtros: Dict, progresso) -> int:
+    # write_only grava as linhas em arquivos temporários, sem manter a planilha em memória
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet("Ideias")
+    nomes = [coluna for coluna, _ in colunas]
+    aba.append(nomes)
+
+    total = 0
+    for lote in _lotes(filtros):
+        for ideia in lote:
+            aba.append([_valor_celula(ideia.get(coluna)) for coluna in nomes])
+        total += len(lote)
+        progresso(total)
+
+    planilha.save(destino)
+    return total
+
+def _tipo_parquet(tipos: set):
+    if tipos and tipos <= {'date'}:
+        return pa.timestamp('ms')
+    if tipos and tipos <= TIPOS_NUMERICOS:
+        return pa.float64()
+    if tipos and tipos <= {'bool'}:
+        return pa.bool_()
+    return pa.string()
+
+def _escrever_parquet(destino: BinaryIO, colunas: List[Tuple[str, set]], filtros: Dict, progresso) -> int:
+    # Um row group por lote: cada lote é convertido e descartado
+    esquema = pa.schema([(coluna, _tipo_parquet(tipos)) for coluna, tipos in colunas])
+    texto = {campo.name for campo in esquema if campo.type == pa.string()}
+
+    total = 0
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for lote in _lotes(filtros):
+            dados = {}
+            for coluna, _ in colunas:
+                valores = [converter_valor(ideia.get(coluna)) for ideia in lote]
+                if coluna in texto:
+                    valores = [None if v is None else str(v) for v in valores]
+                dados[coluna] = valores
+            escritor.write_table(pa.Table.from_pydict(dados, schema=esquema))
+            total += len(lote)
+            progresso(total)
+    return total
+
+ESCRITORES = {"csv": _escrever_csv, "xlsx": _escrever_xlsx, "parquet": _escrever_parquet}
+
+def exportar(filtros: Dict, formato: str, destino: BinaryIO, progresso=lambda total: None) -> int:
+    """Escreve as ideias do filtro, com todos os campos, no formato pedido
+
+    O cursor é lido em lotes de TAMANHO_LOTE e cada lote vai direto ao
+    escritor: a memória usada é a de um lote, qualquer que seja o total.
+    Retorna o número de ideias exportadas.
+    """
+    if formato not in formatos_disponiveis():
+        raise ValueError(f"Formato indisponível: {formato}")
+    if mongo_manager.collection is None and not mongo_manager.connect():
+        raise ConnectionError("Sem conexão com o MongoDB")
+    return ESCRITORES[formato](destino, descobrir_colunas(filtros), filtros, progresso)
+
+def _sinalizar_atividade(exportacoes, exportacao_id: ObjectId, parar: threading.Event):
+    """Renova atualizada_em enquanto a tarefa roda, inclusive nas etapas sem progresso por lote
+    (descobrir_colunas e o envio ao GridFS)"""
+    while not parar.wait(INTERVALO_SINAL_SEGUNDOS):
+        exportacoes.update_one({"_id": exportacao_id, "status": "em_andamento"},
+                               {"$set": {"atualizada_em": datetime.now()}})
+
+def _executar(exportacao_id: ObjectId, filtros: Dict, formato: str):
+    exportacoes = _obter_colecao()
+    em_andamento = {"_id": exportacao_id, "status": "em_andamento"}
+    parar = threading.Event()
+    threading.Thread(target=_sinalizar_atividade, args=(exportacoes, exportacao_id, parar), daemon=True).start()
+    descritor, caminho = tempfile.mkstemp(suffix=f".{formato}")
+    try:
+        def progresso(total):
+            exportacoes.update_one({"_id": exportacao_id}, {"$set": {"linhas": total, "atualizada_em": datetime.now()}})
+
+        with os.fdopen(descritor, 'wb') as arquivo:
+            linhas = exportar(filtros, formato, arquivo, progresso)
+
+        nome = f"ideias_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+        arquivos = GridFS(mongo_manager.db, collection=BUCKET_EXPORTACOES)
+        with open(caminho, 'rb') as arquivo:
+            arquivo_id = arquivos.put(arquivo, filename=nome)
+
+        # Só conclui a tarefa que ainda está em andamento (não a que já foi dada como interrompida)
+        resultado = exportacoes.update_one(em_andamento, {"$set": {
+            "status": "concluida", "linhas": linhas, "arquivo_id": arquivo_id, "nome_arquivo": nome,
+            "tamanho": os.path.getsize(caminho), "concluida_em": datetime.now()
+        }})
+        if not resultado.matched_count:
+            arquivos.delete(arquivo_id)
+    except Exception as e:
+        exportacoes.update_one(em_andamento, {"$set": {
+            "status": "erro", "erro": str(e), "concluida_em": datetime.now()
+        }})
+    finally:
+        parar.set()
+        os.remove(caminho)
+
+def iniciar_exportacao(filtros: Dict, formato: str) -> Optional[str]:
+    """Registra a exportação e a executa em segundo plano; retorna o id da tarefa"""
+    exportacoes = _obter_colecao()
+    if exportacoes is None:
+        return None
+
+    resultado = exportacoes.insert_one({
+        "formato": formato, "filtros": filtros, "status": "em_andamento", "linhas": 0,
+        "criada_em": datetime.now(), "atualizada_em": datetime.now()
+    })
+    _executor.submit(_executar, resultado.inserted_id, filtros, formato)
+    _agendar_limpeza()
+    return str(resultado.inserted_id)
+
+def _encerrar_interrompidas(exportacoes):
+    """Marca como erro as exportações em andamento sem progresso há mais de LIMITE_SEM_PROGRESSO_SEGUNDOS"""
+    limite = datetime.now() - timedelta(seconds=LIMITE_SEM_PROGRESSO_SEGUNDOS)
+    exportacoes.update_many(
+        {"status": "em_andamento", "atualizada_em": {"$lt": limite}},
+        {"$set": {"status": "erro", "erro": "Exportação interrompida (processo encerrado)", "concluida_em": datetime.now()}}
+    )
+
+def listar_exportacoes(limite: int = 10) -> List[Dict]:
+    """Exportações mais recentes (status, linhas, arquivo)"""
+    exportacoes = _obter_colecao()
+    if exportacoes is None:
+        return []
+    _encerrar_interrompidas(exportacoes)
+    _agendar_limpeza()
+    cursor = exportacoes.find({}, {"filtros": 0}).sort("criada_em", DESCENDING).limit(limite)
+    return [{**exportacao, "_id": str(exportacao["_id"])} for exportacao in cursor]
+
+def publicar_arquivo(exportacao: Dict) -> str:
+    """Copia o arquivo do GridFS para a pasta estática, bloco a bloco, e retorna a URL de download
+
+    O arquivo nunca fica inteiro em memória: nem aqui nem no servidor
+    estático, que o envia direto do disco.
+    """
+    token = uuid.uuid4().hex
+    pasta = os.path.join(PASTA_DOWNLOADS, token)
+    os.makedirs(pasta)
+    with open(os.path.join(pasta, exportacao["nome_arquivo"]), 'wb') as destino:
+        origem = GridFS(mongo_manager.db, collection=BUCKET_EXPORTACOES).get(exportacao["arquivo_id"])
+        shutil.copyfileobj(origem, destino, TAMANHO_BLOCO)
+    return f"{URL_DOWNLOADS}/{token}/{exportacao['nome_arquivo']}"
+
+def _remover_downloads_antigos(dias: int):
+    if not os.path.isdir(PASTA_DOWNLOADS):
+        return
+    limite = (datetime.now() - timedelta(days=dias)).timestamp()
+    for nome in os.listdir(PASTA_DOWNLOADS):
+        pasta = os.path.join(PASTA_DOWNLOADS, nome)
+        if os.path.getmtime(pasta) < limite:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+def remover_exportacoes_antigas(dias: int = DIAS_RETENCAO) -> int:
+    """Apaga as tarefas (e arquivos) concluídas há mais de `dias` dias"""
+    exportacoes = _obter_colecao()
+    if exportacoes is None:
+        return 0
+
+    _remover_downloads_antigos(dias)
+    arquivos = GridFS(mongo_manager.db, collection=BUCKET_EXPORTACOES)
+    filtro = {"status": {"$in": ["concluida", "erro"]}, "concluida_em": {"$lt": datetime.now() - timedelta(days=dias)}}
+    for exportacao in exportacoes.find(filtro, {"arquivo_id": 1}):
+        if exportacao.get("arquivo_id"):
+            arquivos.delete(exportacao["arquivo_id"])
+    return exportacoes.delete_many(filtro).deleted_count
+
+def _agendar_limpeza():
+    """Roda remover_exportacoes_antigas em segundo plano, no máximo uma vez por INTERVALO_LIMPEZA_SEGUNDOS"""
+    global _limpeza_em
+    with _trava_limpeza:
+        if _limpeza_em is not None and time.time() - _limpeza_em < INTERVALO_LIMPEZA_SEGUNDOS:
+            return
+        _limpeza_em = time.time()
+    _executor.submit(remover_exportacoes_antigas)
+
+# Exportação completa do banco: python exportacao.py [csv|xlsx|parquet] [arquivo]
+if __name__ == "__main__":
+    import sys
+
+    formato = sys.argv[1] if len(sys.argv) > 1 else "csv"
+    caminho = sys.argv[2] if len(sys.argv) > 2 else f"ideias_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    with open(caminho, 'wb') as arquivo:
+        total = exportar({}, formato, arquivo, lambda linhas: print(f"  {linhas} ideias...", end='\r'))
+    print(f"✅ {total} ideias exportadas em {caminho}")
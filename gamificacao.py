@@ -1,134 +1,152 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+import json
 from datetime import datetime, timedelta
 from mongodb_connection import mongo_manager
 from collections import Counter
+from estatisticas_autores import EstatisticasAutor, obter_titulo_badge
+from regras_gamificacao import (
+    avaliar_regras, badges_vigentes, montar_tabela, obter_regras, pontos_da_ideia, salvar_regras
+)
+from indice_termos import obter_totais
+from ranking_autores import iterar_estatisticas, listar_autores, obter_autor, obter_top, reconstruir_ranking
+from snapshots_ranking import desafio_do_mes, fechar_mes, listar_meses_fechados, mes_atual, obter_snapshot
+
+# Autores exibidos na tabela do ranking
+LIMITE_RANKING = 50
 
 def calcular_pontos_usuario(ideias_usuario):
     """Calcula pontos baseado nas atividades do usuário"""
-    pontos = 0
-    
-    for ideia in ideias_usuario:
-        # Pontos por enviar ideia
-        pontos += 10
-        
-        # Pontos extras por status
-        status = ideia.get('status', 'Pendente')
-        if status == 'Aprovada':
-            pontos += 20
-        elif status == 'Implementada':
-            pontos += 50
-        
-        # Pontos por prioridade
-        prioridade = ideia.get('prioridade', 'Média')
-        if prioridade == 'Alta':
-            pontos += 15
-        elif prioridade == 'Crítica':
-            pontos += 25
-    
-    return pontos
+    return sum(pontos_da_ideia(ideia) for ideia in ideias_usuario)
 
 def verificar_badges(ideias_usuario):
     """Verifica quais badges o usuário conquistou"""
-    badges = []
-    total_ideias = len(ideias_usuario)
-    ideias_implementadas = len([i for i in ideias_usuario if i.get('status') == 'Implementada'])
-    
-    # Badge: Primeira Ideia
-    if total_ideias >= 1:
-        badges.append('🚀 Primeira Ideia')
-    
-    # Badge: Inovador
-    if total_ideias >= 5:
-        badges.append('💡 Inovador')
-    
-    # Badge: Super Inovador
-    if total_ideias >= 10:
-        badges.append('🌟 Super Inovador')
-    
-    # Badge: Certeiro
-    if ideias_implementadas >= 1:
-        badges.append('🎯 Certeiro')
-    
-    # Badge: Master
-    if ideias_implementadas >= 3:
-        badges.append('🏆 Master')
-    
-    # Badge: Em Chamas (3 ideias na última semana)
-    uma_semana_atras = datetime.now() - timedelta(days=7)
-    ideias_semana = [i for i in ideias_usuario 
-                    if isinstance(i.get('data_criacao'), datetime) and 
-                    i.get('data_criacao') >= uma_semana_atras]
-    
-    if len(ideias_semana) >= 3:
-        badges.append('🔥 Em Chamas')
+    estatisticas = EstatisticasAutor('')
+    for ideia in ideias_usuario:
+        estatisticas.adicionar(ideia)
+    return estatisticas.badges
+
+def criar_card_badge(nome, descricao, conquistados):
+    st.markdown("""
+    **{}**
+    {}
     
-    return badges
+    *Conquistado por:* {}
+    """.format(nome, descricao, conquistados))
+
+def criar_editor_regras(regras):
+    """Regras de pontos, badges e títulos como JSON editável (campanhas sem mudar código)"""
+    with st.expander("⚙️ Regras de Pontuação e Badges"):
+        st.caption("Badges aceitam as métricas total_ideias, pontos, implementadas, ideias_semana, "
+                   "ideias_mes e contagens como \"status:Aprovada\", \"prioridade:Alta\" ou "
+                   "\"categoria:Gestão\"; \"inicio\"/\"fim\" (AAAA-MM-DD) limitam campanhas.")
+        texto = st.text_area(
+            "Regras (JSON)",
+            value=json.dumps(regras, ensure_ascii=False, indent=2),
+            height=300,
+            key="regras_gamificacao_json"
+        )
+        if st.button("💾 Salvar Regras", key="salvar_regras_gamificacao"):
+            try:
+                novas_regras = salvar_regras(json.loads(texto))
+                st.success("✅ Regras salvas!")
+                if novas_regras['pontos'] != regras['pontos']:
+                    st.warning("⚠️ A pontuação mudou: reconstrua o ranking para recalcular os pontos gravados.")
+            except (json.JSONDecodeError, ValueError) as e:
+                st.error(f"❌ Regras inválidas: {e}")
 
-def obter_titulo_badge(pontos):
-    """Retorna o título baseado nos pontos"""
-    if pontos >= 1000:
-        return '🥇 Inovador Master'
-    elif pontos >= 750:
-        return '🥈 Criativo Pro'
-    elif pontos >= 500:
-        return '🥉 Idealizador'
-    elif pontos >= 250:
-        return '🌟 Colaborador'
-    elif pontos >= 100:
-        return '💡 Iniciante'
+def formatar_movimento(posicao, posicao_anterior):
+    if posicao_anterior is None:
+        return "🆕"
+    if posicao < posicao_anterior:
+        return f"▲ {posicao_anterior - posicao}"
+    if posicao > posicao_anterior:
+        return f"▼ {posicao - posicao_anterior}"
+    return "="
+
+def criar_historico_mensal():
+    """Ranking de meses anteriores lido dos snapshots congelados (sem varrer ideias)"""
+    st.subheader("🗓️ Rankings Mensais")
+    
+    meses = listar_meses_fechados()
+    if not meses:
+        st.info("📭 Nenhum mês fechado ainda. O fechamento roda na virada do mês (python snapshots_ranking.py).")
     else:
-        return '🌱 Novato'
+        mes = st.selectbox("Mês:", meses, key="mes_snapshot_ranking")
+        snapshot = obter_snapshot(mes)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            destaque = snapshot.get('destaque')
+            st.metric("⭐ Destaque do Mês", destaque['autor'] if destaque else "—",
+                      f"{destaque['ideias']} ideias" if destaque else None)
+        with col2:
+            vencedor = snapshot.get('vencedor_desafio')
+            st.metric(f"🎯 Desafio: {snapshot['desafio']}", vencedor['autor'] if vencedor else "—",
+                      f"{vencedor['ideias']} ideias" if vencedor else None)
+        with col3:
+            st.metric("Participantes", snapshot['participantes'],
+                      f"{snapshot['ideias_desafio']} ideias no desafio")
+        
+        df_mes = pd.DataFrame([
+            {
+                'Posição': a['posicao'],
+                'Movimento': formatar_movimento(a['posicao'], a.get('posicao_anterior')),
+                'Colaborador': a['autor'],
+                'Pontos': a['pontos'],
+                'Pontos no Mês': a['pontos_mes'],
+                'Ideias no Mês': a['ideias_mes'],
+                'Ideias no Desafio': a['ideias_desafio']
+            }
+            for a in snapshot['autores']
+        ])
+        st.dataframe(df_mes, use_container_width=True, hide_index=True)
+    
+    if st.button("🔒 Fechar Mês Anterior", key="fechar_mes_ranking"):
+        with st.spinner("Congelando o ranking do mês anterior..."):
+            resultado = fechar_mes()
+        if resultado is None:
+            st.info("ℹ️ O mês anterior já está fechado.")
+        else:
+            st.success(f"✅ Ranking de {resultado['mes']} congelado")
+            st.rerun()
 
 def criar_sistema_gamificacao():
     st.header("🎮 Sistema de Gamificação")
     
-    # Buscar dados do MongoDB
-    ideias = mongo_manager.buscar_ideias()
-    
-    if not ideias:
-        st.warning("⚠️ Nenhuma ideia encontrada no banco de dados.")
-        st.info("💡 Cadastre algumas ideias primeiro para ver a gamificação.")
-        return
+    # Ranking persistido (ranking_autores), mantido a cada escrita de ideia
+    ranking = obter_top(LIMITE_RANKING)
     
-    # Agrupar ideias por autor
-    ideias_por_autor = {}
-    for ideia in ideias:
-        autor = ideia.get('autor', 'Anônimo')
-        if autor and autor != 'Anônimo':
-            if autor not in ideias_por_autor:
-                ideias_por_autor[autor] = []
-            ideias_por_autor[autor].append(ideia)
-    
-    if not ideias_por_autor:
-        st.info("👥 Nenhum colaborador identificado (todas as ideias são anônimas).")
+    if not ranking:
+        if mongo_manager.contar_ideias() == 0:
+            st.warning("⚠️ Nenhuma ideia encontrada no banco de dados.")
+            st.info("💡 Cadastre algumas ideias primeiro para ver a gamificação.")
+        else:
+            st.info("👥 Nenhum colaborador identificado no ranking.")
+            if st.button("🔁 Reconstruir Ranking", key="reconstruir_ranking_vazio"):
+                with st.spinner("Recalculando o ranking a partir das ideias..."):
+                    reconstruir_ranking()
+                st.rerun()
         return
     
-    # Calcular ranking
-    ranking_dados = []
-    for autor, ideias_usuario in ideias_por_autor.items():
-        pontos = calcular_pontos_usuario(ideias_usuario)
-        badges = verificar_badges(ideias_usuario)
-        titulo = obter_titulo_badge(pontos)
-        
-        ideias_implementadas = len([i for i in ideias_usuario if i.get('status') == 'Implementada'])
-        
-        ranking_dados.append({
-            'Colaborador': autor,
-            'Pontos': pontos,
-            'Ideias Enviadas': len(ideias_usuario),
-            'Ideias Implementadas': ideias_implementadas,
-            'Badge': titulo,
-            'Badges Conquistados': len(badges)
-        })
-    
-    # Ordenar por pontos
-    ranking_dados.sort(key=lambda x: x['Pontos'], reverse=True)
-    
-    # Adicionar posição
-    for i, dados in enumerate(ranking_dados):
-        dados['Posição'] = i + 1
+    # Todas as regras avaliadas de uma vez sobre a tabela autores x métricas
+    regras = obter_regras()
+    tabela = montar_tabela(list(iterar_estatisticas()))
+    avaliacao = avaliar_regras(tabela, regras)
+    
+    ranking_dados = [
+        {
+            'Posição': posicao,
+            'Colaborador': e.autor,
+            'Pontos': e.pontos,
+            'Ideias Enviadas': e.total_ideias,
+            'Ideias Implementadas': e.implementadas,
+            'Badge': avaliacao.at[e.autor, 'titulo'] if e.autor in avaliacao.index else e.titulo,
+            'Badges Conquistados': int(avaliacao.at[e.autor, 'total_badges']) if e.autor in avaliacao.index else 0
+        }
+        for posicao, e in enumerate(ranking, start=1)
+    ]
     
     # Ranking de colaboradores
     st.subheader("🏆 Ranking de Inovadores")
@@ -136,10 +154,6 @@ def criar_sistema_gamificacao():
     # Criar DataFrame para exibição
     df_ranking = pd.DataFrame(ranking_dados)
     
-    # Reordenar colunas
-    colunas_ordem = ['Posição', 'Colaborador', 'Pontos', 'Ideias Enviadas', 'Ideias Implementadas', 'Badge', 'Badges Conquistados']
-    df_ranking = df_ranking[colunas_ordem]
-    
     # Destacar top 3
     def destacar_top3(row):
         if row['Posição'] == 1:
@@ -165,121 +179,51 @@ def criar_sistema_gamificacao():
         fig_pontos.update_layout(xaxis_tickangle=-45)
         st.plotly_chart(fig_pontos, use_container_width=True)
     
-    # Sistema de badges
-    st.subheader("🏅 Sistema de Badges")
+    # Cards de badges montados a partir das regras (quantos autores conquistaram cada um)
+    conquistas = Counter(badge for badges in avaliacao['badges'] for badge in badges)
+    badges_comuns = [b for b in badges_vigentes(regras) if not b.get('especial')]
+    badges_especiais = [b for b in badges_vigentes(regras) if b.get('especial')]
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-        **🚀 Primeira Ideia**
-        Enviou sua primeira ideia
-        
-        *Conquistado por:* {}
-        """.format(len([u for u in ideias_por_autor if len(ideias_por_autor[u]) >= 1])))
+    destaque = tabela['ideias_mes'].idxmax()
+    participantes_mes = int((tabela['ideias_mes'] > 0).sum())
     
-    with col2:
-        st.markdown("""
-        **💡 Inovador**
-        5 ideias enviadas
-        
-        *Conquistado por:* {}
-        """.format(len([u for u in ideias_por_autor if len(ideias_por_autor[u]) >= 5])))
+    # Sistema de badges
+    st.subheader("🏅 Sistema de Badges")
     
-    with col3:
-        st.markdown("""
-        **🎯 Certeiro**
-        Ideia implementada
-        
-        *Conquistado por:* {}
-        """.format(len([u for u in ideias_por_autor 
-                       if len([i for i in ideias_por_autor[u] if i.get('status') == 'Implementada']) >= 1])))
-    
-    with col4:
-        uma_semana_atras = datetime.now() - timedelta(days=7)
-        usuarios_em_chamas = 0
-        for usuario, ideias_usuario in ideias_por_autor.items():
-            ideias_semana = [i for i in ideias_usuario 
-                           if isinstance(i.get('data_criacao'), datetime) and 
-                           i.get('data_criacao') >= uma_semana_atras]
-            if len(ideias_semana) >= 3:
-                usuarios_em_chamas += 1
-        
-        st.markdown("""
-        **🔥 Em Chamas**
-        3 ideias em uma semana
-        
-        *Conquistado por:* {}
-        """.format(usuarios_em_chamas))
+    for inicio in range(0, len(badges_comuns), 4):
+        for coluna, badge in zip(st.columns(4), badges_comuns[inicio:inicio + 4]):
+            with coluna:
+                criar_card_badge(badge['nome'], badge.get('descricao', ''), conquistas[badge['nome']])
     
     # Badges adicionais
     st.subheader("🌟 Badges Especiais")
     
-    col1, col2, col3 = st.columns(3)
+    colunas = st.columns(len(badges_especiais) + 1)
     
-    with col1:
-        super_inovadores = len([u for u in ideias_por_autor if len(ideias_por_autor[u]) >= 10])
-        st.markdown("""
-        **🌟 Super Inovador**
-        10+ ideias enviadas
-        
-        *Conquistado por:* {}
-        """.format(super_inovadores))
-    
-    with col2:
-        masters = len([u for u in ideias_por_autor 
-                      if len([i for i in ideias_por_autor[u] if i.get('status') == 'Implementada']) >= 3])
-        st.markdown("""
-        **🏆 Master**
-        3+ ideias implementadas
-        
-        *Conquistado por:* {}
-        """.format(masters))
+    for coluna, badge in zip(colunas, badges_especiais):
+        with coluna:
+            criar_card_badge(badge['nome'], badge.get('descricao', ''), conquistas[badge['nome']])
     
-    with col3:
+    with colunas[-1]:
         # Usuário mais ativo do mês
-        inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        ideias_mes_por_usuario = {}
-        
-        for usuario, ideias_usuario in ideias_por_autor.items():
-            ideias_mes = [i for i in ideias_usuario 
-                         if isinstance(i.get('data_criacao'), datetime) and 
-                         i.get('data_criacao') >= inicio_mes]
-            ideias_mes_por_usuario[usuario] = len(ideias_mes)
+        st.markdown("""
+        **⭐ Destaque do Mês**
+        Mais ativo em {}
         
-        if ideias_mes_por_usuario:
-            usuario_destaque = max(ideias_mes_por_usuario, key=ideias_mes_por_usuario.get)
-            ideias_destaque = ideias_mes_por_usuario[usuario_destaque]
-            
-            st.markdown("""
-            **⭐ Destaque do Mês**
-            Mais ativo em {}
-            
-            *{}* - {} ideias
-            """.format(datetime.now().strftime('%B'), usuario_destaque, ideias_destaque))
+        *{}* - {} ideias
+        """.format(datetime.now().strftime('%B'), destaque, int(tabela.at[destaque, 'ideias_mes'])))
     
     # Desafios mensais
     st.subheader("🎯 Desafios Mensais")
     
-    # Calcular estatísticas do mês atual
-    inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    ideias_mes = [i for i in ideias if isinstance(i.get('data_criacao'), datetime) and i.get('data_criacao') >= inicio_mes]
+    # Categoria do desafio fixada no início do mês; totais do mês vêm do índice de termos
+    categoria_popular = desafio_do_mes()
+    totais_mes = obter_totais('mes', mes_atual()) or {}
     
-    participantes_mes = set()
-    for ideia in ideias_mes:
-        autor = ideia.get('autor', 'Anônimo')
-        if autor and autor != 'Anônimo':
-            participantes_mes.add(autor)
-    
-    # Desafio baseado na categoria mais popular
-    categorias_count = Counter([i.get('categoria', 'Geral') for i in ideias])
-    categoria_popular = categorias_count.most_common(1)[0][0] if categorias_count else 'Sustentabilidade'
-    
-    mes_atual = datetime.now().strftime('%B')
-    ano_atual = datetime.now().year
+    nome_mes = datetime.now().strftime('%B')
     
     st.info(f"""
-    **Desafio de {mes_atual}: {categoria_popular}**
+    **Desafio de {nome_mes}: {categoria_popular}**
     
     Envie ideias relacionadas à categoria {categoria_popular}.
     
@@ -287,69 +231,61 @@ def criar_sistema_gamificacao():
     
     ⏰ Prazo: {datetime.now().replace(month=datetime.now().month+1 if datetime.now().month < 12 else 1, day=1) - timedelta(days=1):%d/%m/%Y}
     
-    📊 Participantes: {len(participantes_mes)} | Ideias: {len(ideias_mes)}
+    📊 Participantes: {participantes_mes} | Ideias: {totais_mes.get('total_ideias', 0)}
     """)
     
+    criar_historico_mensal()
+    
     # Progresso pessoal
     st.subheader("📈 Seu Progresso")
     
     # Seletor de usuário
-    usuarios_disponiveis = list(ideias_por_autor.keys())
-    if usuarios_disponiveis:
-        usuario_selecionado = st.selectbox("Selecione um colaborador:", usuarios_disponiveis)
+    usuario_selecionado = st.selectbox("Selecione um colaborador:", listar_autores())
+    documento_usuario = obter_autor(usuario_selecionado) if usuario_selecionado else None
+    
+    if documento_usuario:
+        estatisticas = EstatisticasAutor.de_documento(documento_usuario)
+        avaliacao_usuario = avaliar_regras(montar_tabela([estatisticas]), regras).iloc[0]
+        badges_usuario = avaliacao_usuario['badges']
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Pontos Totais", estatisticas.pontos)
+        
+        with col2:
+            st.metric("Ideias Enviadas", estatisticas.total_ideias)
+        
+        with col3:
+            st.metric("Ideias Implementadas", estatisticas.implementadas)
+        
+        st.write(f"**Título Atual:** {avaliacao_usuario['titulo']} · **Posição no ranking:** {documento_usuario['posicao']}º")
         
-        if usuario_selecionado:
-            ideias_usuario = ideias_por_autor[usuario_selecionado]
-            pontos_usuario = calcular_pontos_usuario(ideias_usuario)
-            badges_usuario = verificar_badges(ideias_usuario)
-            titulo_usuario = obter_titulo_badge(pontos_usuario)
-            
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Pontos Totais", pontos_usuario)
-            
-            with col2:
-                st.metric("Ideias Enviadas", len(ideias_usuario))
-            
-            with col3:
-                implementadas = len([i for i in ideias_usuario if i.get('status') == 'Implementada'])
-                st.metric("Ideias Implementadas", implementadas)
-            
-            st.write(f"**Título Atual:** {titulo_usuario}")
-            
-            if badges_usuario:
-                st.write("**Badges Conquistados:**")
-                for badge in badges_usuario:
-                    st.write(f"• {badge}")
-            else:
-                st.write("**Nenhum badge conquistado ainda.**")
-            
-            # Próximo objetivo
-            proximo_pontos = 0
-            proximo_titulo = ""
-            
-            if pontos_usuario < 100:
-                proximo_pontos = 100
-                proximo_titulo = "💡 Iniciante"
-            elif pontos_usuario < 250:
-                proximo_pontos = 250
-                proximo_titulo = "🌟 Colaborador"
-            elif pontos_usuario < 500:
-                proximo_pontos = 500
-                proximo_titulo = "🥉 Idealizador"
-            elif pontos_usuario < 750:
-                proximo_pontos = 750
-                proximo_titulo = "🥈 Criativo Pro"
-            elif pontos_usuario < 1000:
-                proximo_pontos = 1000
-                proximo_titulo = "🥇 Inovador Master"
-            
-            if proximo_pontos > 0:
-                pontos_faltantes = proximo_pontos - pontos_usuario
-                st.progress(pontos_usuario / proximo_pontos)
-                st.write(f"**Próximo objetivo:** {proximo_titulo} (faltam {pontos_faltantes} pontos)")
-    
-    # Botão para atualizar dados
-    if st.button("🔄 Atualizar Ranking"):
-        st.rerun()
\ No newline at end of file
+        if badges_usuario:
+            st.write("**Badges Conquistados:**")
+            for badge in badges_usuario:
+                st.write(f"• {badge}")
+        else:
+            st.write("**Nenhum badge conquistado ainda.**")
+        
+        # Próximo objetivo
+        if avaliacao_usuario['proximo_titulo']:
+            proximo_pontos = int(avaliacao_usuario['proximo_minimo'])
+            pontos_faltantes = proximo_pontos - estatisticas.pontos
+            st.progress(min(max(estatisticas.pontos / proximo_pontos, 0.0), 1.0))
+            st.write(f"**Próximo objetivo:** {avaliacao_usuario['proximo_titulo']} (faltam {pontos_faltantes} pontos)")
+    
+    # Botões para atualizar dados
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("🔄 Atualizar Ranking"):
+            st.rerun()
+    
+    with col2:
+        if st.button("🔁 Reconstruir Ranking", key="reconstruir_ranking"):
+            with st.spinner("Recalculando o ranking a partir das ideias..."):
+                total = reconstruir_ranking()
+            st.success(f"✅ Ranking reconstruído: {total} colaboradores")
+    
+    criar_editor_regras(regras)
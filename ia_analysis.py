@@ -1,14 +1,227 @@
 import streamlit as st
+import pandas as pd
+import plotly.express as px
+from bson import ObjectId
+
+from mongodb_connection import mongo_manager
+from duplicatas import LIMIAR_DUPLICATA, agrupar_duplicatas
+from categorizacao import gerenciador_categoria, reclassificar_backlog, treinar_modelo_categoria
+from similaridade import buscar_por_texto, obter_servico, reconstruir_indice_vetorial
+from topicos import obter_topicos, treinar_topicos
+
+def criar_secao_duplicatas():
+    st.subheader("🔁 Detecção de Duplicatas")
+    st.write("Grupos de ideias com descrições muito parecidas, encontrados pelo índice MinHash/LSH.")
+    
+    limiar = st.slider(
+        "Similaridade mínima",
+        min_value=0.3, max_value=1.0, value=LIMIAR_DUPLICATA, step=0.05,
+        key="limiar_duplicatas"
+    )
+    
+    if st.button("🔍 Gerar Relatório de Duplicatas", key="gerar_duplicatas"):
+        with st.spinner("Agrupando ideias parecidas..."):
+            st.session_state.grupos_duplicatas = agrupar_duplicatas(limiar)
+    
+    grupos = st.session_state.get('grupos_duplicatas')
+    if grupos is None:
+        return
+    
+    if not grupos:
+        st.success("✅ Nenhuma duplicata encontrada.")
+        return
+    
+    total_ideias = sum(len(grupo) for grupo in grupos)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Grupos de Duplicatas", len(grupos))
+    with col2:
+        st.metric("Ideias Envolvidas", total_ideias)
+    
+    ids = [ObjectId(ideia_id) for grupo in grupos for ideia_id, _ in grupo]
+    detalhes = {
+        ideia['_id']: ideia
+        for ideia in mongo_manager.buscar_ideias(
+            {"_id": {"$in": ids}},
+            {"titulo": 1, "autor": 1, "unidade": 1, "status": 1, "data_criacao": 1}
+        )
+    }
+    
+    for numero, grupo in enumerate(grupos, start=1):
+        with st.expander(f"Grupo {numero} — {len(grupo)} ideias"):
+            linhas = [
+                {
+                    'ID': ideia_id,
+                    'Título': detalhes.get(ideia_id, {}).get('titulo', ''),
+                    'Autor': detalhes.get(ideia_id, {}).get('autor', ''),
+                    'Unidade': detalhes.get(ideia_id, {}).get('unidade', ''),
+                    'Status': detalhes.get(ideia_id, {}).get('status', ''),
+                    'Similaridade': f"{similaridade:.0%}"
+                }
+                for ideia_id, similaridade in grupo
+            ]
+            st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+
+def criar_secao_categorizacao():
+    st.subheader("🏷️ Categorização Automática")
+    st.write("Classificador treinado localmente com as descrições das ideias já categorizadas.")
+    
+    _, metadados = gerenciador_categoria.obter()
+    if metadados:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Exemplos de Treino", metadados.get('exemplos', 0))
+        with col2:
+            acuracia = metadados.get('acuracia')
+            st.metric("Acurácia (validação)", "n/d" if acuracia is None else f"{acuracia:.1%}")
+        with col3:
+            st.metric("Categorias", len(metadados.get('classes', [])))
+        
+        atualizado_em = metadados.get('atualizado_em')
+        if atualizado_em:
+            st.caption(f"Último treino ({metadados.get('modo', '')}): {atualizado_em.strftime('%d/%m/%Y %H:%M')}")
+    else:
+        st.info("📝 O modelo ainda não foi treinado.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("🔄 Atualizar Modelo", key="treinar_incremental", disabled=not metadados):
+            with st.spinner("Treinando com as ideias novas..."):
+                try:
+                    treinar_modelo_categoria(incremental=True)
+                    st.success("✅ Modelo atualizado!")
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+    with col2:
+        if st.button("🧠 Treinar do Zero", key="treinar_completo"):
+            with st.spinner("Treinando com todas as ideias categorizadas..."):
+                try:
+                    treinar_modelo_categoria(incremental=False)
+                    st.success("✅ Modelo treinado!")
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+    with col3:
+        if st.button("🏷️ Reclassificar Ideias", key="reclassificar_backlog", disabled=not metadados):
+            with st.spinner("Classificando o banco de ideias..."):
+                resultado = reclassificar_backlog()
+            st.success(f"✅ {resultado['processadas']} ideias classificadas, "
+                       f"{resultado['divergentes']} com sugestão diferente da categoria atual.")
+    
+    divergentes = mongo_manager.buscar_ideias(
+        {"categoria_sugerida": {"$exists": True}, "$expr": {"$ne": ["$categoria", "$categoria_sugerida"]}},
+        {"titulo": 1, "categoria": 1, "categoria_sugerida": 1, "confianca_categoria": 1}
+    )
+    if divergentes:
+        st.write(f"**{len(divergentes)} ideias com categoria possivelmente incorreta:**")
+        df_divergentes = pd.DataFrame([
+            {
+                'ID': ideia['_id'],
+                'Título': ideia.get('titulo', ''),
+                'Categoria Atual': ideia.get('categoria', ''),
+                'Categoria Sugerida': ideia.get('categoria_sugerida', ''),
+                'Confiança': ideia.get('confianca_categoria', 0.0)
+            }
+            for ideia in divergentes
+        ]).sort_values('Confiança', ascending=False)
+        st.dataframe(df_divergentes, use_container_width=True, hide_index=True)
+
+def criar_secao_similaridade():
+    st.subheader("🔗 Ideias Relacionadas")
+    
+    _, indice = obter_servico()
+    if indice is None:
+        st.info("📝 O índice de similaridade ainda não foi construído.")
+    else:
+        st.caption(f"{len(indice.ids)} ideias no índice vetorial")
+    
+    if st.button("🧠 Reconstruir Índice de Similaridade", key="reconstruir_similaridade"):
+        with st.spinner("Ajustando o modelo e recalculando os vetores..."):
+            total = reconstruir_indice_vetorial()
+        st.success(f"✅ {total} ideias indexadas")
+    
+    if indice is None:
+        return
+    
+    texto = st.text_area("Descreva uma ideia para encontrar outras parecidas:", key="texto_similaridade")
+    if texto:
+        resultados = buscar_por_texto(texto, k=10)
+        if not resultados:
+            st.info("📝 Nenhuma ideia parecida encontrada.")
+        for resultado in resultados:
+            st.write(f"**{resultado.get('titulo', 'N/A')}** — {resultado.get('autor', 'N/A')}, "
+                     f"{resultado.get('unidade', 'N/A')} · {resultado['similaridade']:.0%}")
+            st.caption(resultado.get('descricao', '')[:200])
+
+def criar_secao_topicos():
+    st.subheader("🧩 Tópicos")
+    st.write("Agrupamento das ideias por assunto, mais fino que a categoria escolhida no cadastro.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 Atualizar Tópicos", key="atualizar_topicos"):
+            with st.spinner("Atribuindo tópicos às ideias novas..."):
+                try:
+                    resultado = treinar_topicos(completo=False)
+                    st.success(f"✅ {resultado['atribuidas']} ideias atribuídas")
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+    with col2:
+        if st.button("🧠 Recalcular Tópicos", key="recalcular_topicos"):
+            with st.spinner("Recalculando todos os tópicos..."):
+                try:
+                    resultado = treinar_topicos(completo=True)
+                    st.success(f"✅ {resultado['topicos']} tópicos, {resultado['atribuidas']} ideias atribuídas")
+                except ValueError as e:
+                    st.warning(f"⚠️ {e}")
+    
+    topicos = obter_topicos()
+    if not topicos:
+        st.info("📝 Os tópicos ainda não foram calculados.")
+        return
+    
+    df_topicos = pd.DataFrame([
+        {
+            'Tópico': f"T{t['topico'] + 1}: {', '.join(t['termos'][:3])}",
+            'Ideias': t['tamanho']
+        }
+        for t in topicos
+    ])
+    fig_topicos = px.bar(
+        df_topicos,
+        x='Ideias',
+        y='Tópico',
+        orientation='h',
+        title='Ideias por Tópico'
+    )
+    fig_topicos.update_layout(yaxis={'categoryorder': 'total ascending'})
+    st.plotly_chart(fig_topicos, use_container_width=True)
+    
+    ids = [ObjectId(i) for t in topicos for i in t.get('representantes', [])]
+    detalhes = {
+        ideia['_id']: ideia
+        for ideia in mongo_manager.buscar_ideias({"_id": {"$in": ids}}, {"titulo": 1, "descricao": 1, "unidade": 1})
+    }
+    
+    for topico in topicos:
+        with st.expander(f"T{topico['topico'] + 1} — {topico['tamanho']} ideias · {', '.join(topico['termos'])}"):
+            for ideia_id in topico.get('representantes', []):
+                ideia = detalhes.get(ideia_id)
+                if ideia:
+                    st.write(f"**{ideia.get('titulo', 'N/A')}** — {ideia.get('unidade', 'N/A')}")
+                    st.caption(ideia.get('descricao', '')[:200])
 
 def criar_analise_ia():
     st.header("🤖 Análise de IA")
-    st.info("🚧 Funcionalidade em desenvolvimento")
     
-    st.write("**Recursos planejados:**")
-    st.write("• Categorização automática de ideias")
-    st.write("• Análise de sentimentos")
-    st.write("• Detecção de duplicatas")
-    st.write("• Recomendações inteligentes")
-    st.write("• Análise de tendências")
+    criar_secao_categorizacao()
+    
+    st.markdown("---")
+    criar_secao_duplicatas()
+    
+    st.markdown("---")
+    criar_secao_similaridade()
+    
+    st.markdown("---")
+    criar_secao_topicos()
     
-    st.warning("Esta funcionalidade será implementada em uma versão futura.")
\ No newline at end of file
+    st.caption("Sentimento, palavras-chave e termos emergentes estão na página de Análise de Texto.")
@@ -0,0 +1,317 @@
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from mongodb_connection import mongo_manager
+from processamento_texto import gerar_bigramas, obter_features_texto
+
+# Coleções do índice de frequência de termos
+COLECAO_TERMOS = "indice_termos"
+COLECAO_TOTAIS = "indice_termos_totais"
+
+# Escopos mantidos pelo índice; 'global' usa chave vazia
+ESCOPOS = ('global', 'categoria', 'unidade', 'mes')
+
+# Cada termo guarda n=1 (palavra) ou n=2 (bigrama de palavras consecutivas do mesmo texto)
+UNIGRAMA = 1
+BIGRAMA = 2
+
+# Campos da ideia que, ao mudar, exigem reindexação
+CAMPOS_INDEXADOS = ('titulo', 'descricao', 'categoria', 'unidade', 'data_criacao', 'features_texto')
+
+_indices_criados = False
+
+def _obter_colecoes():
+    """Retorna as coleções do índice, criando os índices do MongoDB na primeira chamada"""
+    global _indices_criados
+    termos = mongo_manager.obter_colecao(COLECAO_TERMOS)
+    totais = mongo_manager.obter_colecao(COLECAO_TOTAIS)
+    if termos is None or totais is None:
+        return None, None
+
+    if not _indices_criados:
+        termos.create_index([("escopo", ASCENDING), ("chave", ASCENDING), ("termo", ASCENDING)], unique=True)
+        termos.create_index([("escopo", ASCENDING), ("chave", ASCENDING), ("n", ASCENDING), ("frequencia", DESCENDING)])
+        totais.create_index([("escopo", ASCENDING), ("chave", ASCENDING)], unique=True)
+        _indices_criados = True
+
+    return termos, totais
+
+def chaves_da_ideia(ideia: Dict) -> List[Tuple[str, str]]:
+    """Retorna os pares (escopo, chave) em que a ideia é contabilizada"""
+    chaves = [
+        ('global', ''),
+        ('categoria', ideia.get('categoria') or 'Não categorizada'),
+        ('unidade', ideia.get('unidade') or 'Não informada'),
+    ]
+    data_criacao = ideia.get('data_criacao')
+    if isinstance(data_criacao, datetime):
+        chaves.append(('mes', data_criacao.strftime('%Y-%m')))
+    return chaves
+
+def contar_termos_ideia(ideia: Dict) -> Tuple[Counter, Counter, int]:
+    """Conta palavras e bigramas da ideia e retorna também o número de textos"""
+    textos = obter_features_texto(ideia)['textos']
+    unigramas = Counter()
+    bigramas = Counter()
+    for texto in textos:
+        unigramas.update(texto['tokens'])
+        bigramas.update(gerar_bigramas(texto['tokens']))
+    return unigramas, bigramas, len(textos)
+
+def _aplicar(ideia: Dict, sinal: int):
+    """Soma (sinal=1) ou subtrai (sinal=-1) a contribuição da ideia em todos os escopos"""
+    termos, totais = _obter_colecoes()
+    if termos is None:
+        return
+
+    unigramas, bigramas, total_textos = contar_termos_ideia(ideia)
+    total_palavras = sum(unigramas.values())
+    chaves = chaves_da_ideia(ideia)
+
+    operacoes_termos = [
+        UpdateOne(
+            {"escopo": escopo, "chave": chave, "termo": termo},
+            {"$inc": {"frequencia": sinal * frequencia, "documentos": sinal}, "$set": {"n": n}},
+            upsert=True
+        )
+        for escopo, chave in chaves
+        for n, frequencias in ((UNIGRAMA, unigramas), (BIGRAMA, bigramas))
+        for termo, frequencia in frequencias.items()
+    ]
+    if operacoes_termos:
+        termos.bulk_write(operacoes_termos, ordered=False)
+
+    totais.bulk_write([
+        UpdateOne(
+            {"escopo": escopo, "chave": chave},
+            {"$inc": {"total_palavras": sinal * total_palavras,
+                      "total_textos": sinal * total_textos,
+                      "total_ideias": sinal}},
+            upsert=True
+        )
+        for escopo, chave in chaves
+    ], ordered=False)
+
+    if sinal < 0 and operacoes_termos:
+        # Termos que deixaram de ocorrer saem do índice (mantém o vocabulário exato)
+        termos.delete_many({
+            "$or": [{"escopo": escopo, "chave": chave} for escopo, chave in chaves],
+            "termo": {"$in": list(unigramas) + list(bigramas)},
+            "frequencia": {"$lte": 0}
+        })
+
+def atualizar_indice_termos(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: mantém o índice a cada inserção, atualização ou exclusão"""
+    if evento == 'atualizar' and all(antes.get(c) == depois.get(c) for c in CAMPOS_INDEXADOS):
+        return  # Mudanças de status, votos, etc. não afetam o índice
+
+    if antes is not None:
+        _aplicar(antes, -1)
+    if depois is not None:
+        _aplicar(depois, 1)
+
+def obter_termos_mais_frequentes(escopo: str = 'global', chave: str = '', limite: int = 20,
+                                 n: int = UNIGRAMA) -> List[Tuple[str, int]]:
+    """Top-N termos de um escopo, lidos pelo índice (escopo, chave, n, frequencia)"""
+    termos, _ = _obter_colecoes()
+    if termos is None:
+        return []
+
+    cursor = termos.find(
+        {"escopo": escopo, "chave": chave, "n": n},
+        {"_id": 0, "termo": 1, "frequencia": 1}
+    ).sort("frequencia", DESCENDING).limit(limite)
+    return [(doc["termo"], doc["frequencia"]) for doc in cursor]
+
+def obter_totais(escopo: str = 'global', chave: str = '') -> Optional[Dict]:
+    """Totais do escopo (palavras, textos, ideias) e tamanho do vocabulário"""
+    termos, totais = _obter_colecoes()
+    if termos is None:
+        return None
+
+    documento = totais.find_one({"escopo": escopo, "chave": chave}, {"_id": 0})
+    if not documento:
+        return None
+
+    documento['vocabulario'] = termos.count_documents({"escopo": escopo, "chave": chave, "n": UNIGRAMA})
+    return documento
+
+def listar_totais(escopo: str, limite: int = 0) -> List[Dict]:
+    """Totais de todas as chaves de um escopo, da que tem mais ideias para a que tem menos"""
+    _, totais = _obter_colecoes()
+    if totais is None:
+        return []
+    cursor = totais.find({"escopo": escopo, "total_ideias": {"$gt": 0}}, {"_id": 0}).sort("total_ideias", DESCENDING)
+    return list(cursor.limit(limite))
+
+# Bigramas de $textos.tokens calculados no servidor (equivalente a gerar_bigramas)
+_EXPRESSAO_BIGRAMAS = {
+    "$map": {
+        "input": {"$range": [0, {"$subtract": [{"$size": "$textos.tokens"}, 1]}]},
+        "as": "i",
+        "in": {"$concat": [
+            {"$arrayElemAt": ["$textos.tokens", "$$i"]},
+            " ",
+            {"$arrayElemAt": ["$textos.tokens", {"$add": ["$$i", 1]}]}
+        ]}
+    }
+}
+
+# Chave de cada escopo calculada no servidor (equivalente a chaves_da_ideia)
+_EXPRESSOES_CHAVE = {
+    'global': {"$literal": ""},
+    'categoria': {"$ifNull": ["$categoria", "Não categorizada"]},
+    'unidade': {"$ifNull": ["$unidade", "Não informada"]},
+    'mes': {"$dateToString": {"format": "%Y-%m", "date": "$data_criacao"}},
+}
+
+def _filtro_escopo(filtros: Dict, escopo: str) -> Dict:
+    filtro = {"$and": [filtros, {"features_texto": {"$exists": True}}]}
+    if escopo == 'mes':
+        filtro["$and"].append({"data_criacao": {"$type": "date"}})
+    return filtro
+
+def _estagios_termos(filtros: Dict, escopo: str) -> List[Dict]:
+    """Frequência de palavras e bigramas e número de ideias em que cada termo aparece, por chave"""
+    return [
+        {"$match": _filtro_escopo(filtros, escopo)},
+        {"$project": {"chave": _EXPRESSOES_CHAVE[escopo], "textos": "$features_texto.textos"}},
+        {"$unwind": "$textos"},
+        {"$project": {"chave": 1, "termos": {"$concatArrays": ["$textos.tokens", _EXPRESSAO_BIGRAMAS]}}},
+        {"$unwind": "$termos"},
+        {"$group": {
+            "_id": {"ideia": "$_id", "chave": "$chave", "termo": "$termos"},
+            "frequencia": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": {"escopo": {"$literal": escopo}, "chave": "$_id.chave", "termo": "$_id.termo"},
+            "frequencia": {"$sum": "$frequencia"},
+            "documentos": {"$sum": 1}
+        }},
+    ]
+
+def _estagios_totais(filtros: Dict, escopo: str) -> List[Dict]:
+    """Palavras, textos e ideias de cada chave do escopo"""
+    return [
+        {"$match": _filtro_escopo(filtros, escopo)},
+        {"$group": {
+            "_id": _EXPRESSOES_CHAVE[escopo],
+            "total_palavras": {"$sum": "$features_texto.total_palavras"},
+            "total_textos": {"$sum": {"$size": "$features_texto.textos"}},
+            "total_ideias": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": 0, "escopo": {"$literal": escopo}, "chave": "$_id",
+            "total_palavras": 1, "total_textos": 1, "total_ideias": 1
+        }},
+    ]
+
+def reconstruir_indice() -> int:
+    """Reconstrói o índice inteiro no servidor a partir das features gravadas nas ideias
+
+    Rode o backfill (python processamento_lote.py) antes, para que todas as
+    ideias tenham features_texto na versão atual; ele já chama esta função
+    ao final quando atualiza alguma ideia.
+    """
+    termos, totais = _obter_colecoes()
+    if termos is None:
+        return 0
+
+    termos.delete_many({})
+    totais.delete_many({})
+
+    for escopo in _EXPRESSOES_CHAVE:
+        mongo_manager.collection.aggregate(_estagios_termos({}, escopo) + [
+            {"$project": {
+                "_id": 0, "escopo": "$_id.escopo", "chave": "$_id.chave",
+                "termo": "$_id.termo", "frequencia": 1, "documentos": 1,
+                "n": {"$cond": [{"$regexMatch": {"input": "$_id.termo", "regex": " "}}, BIGRAMA, UNIGRAMA]}
+            }},
+            {"$merge": {"into": COLECAO_TERMOS, "on": ["escopo", "chave", "termo"], "whenMatched": "replace"}}
+        ], allowDiskUse=True)
+
+        mongo_manager.collection.aggregate(_estagios_totais({}, escopo) + [
+            {"$merge": {"into": COLECAO_TOTAIS, "on": ["escopo", "chave"], "whenMatched": "replace"}}
+        ], allowDiskUse=True)
+
+    return termos.count_documents({"escopo": "global", "n": UNIGRAMA})
+
+def preparar_exclusao_termos(filtros: Dict, ids: List[str]) -> Optional[Callable]:
+    """Observador de exclusão: calcula no servidor a contribuição das ideias que vão sair
+
+    Antes do delete_many, as frequências das ideias do filtro vão para uma
+    coleção temporária ($merge) e os totais por chave (poucos documentos)
+    para o cliente; depois da exclusão, tudo é subtraído do índice com um
+    $merge e um bulk_write. Ideias ainda sem features_texto (backfill
+    pendente) são descontadas uma a uma.
+    """
+    termos, totais = _obter_colecoes()
+    if termos is None:
+        return None
+
+    temporaria = mongo_manager.obter_colecao(f"{COLECAO_TERMOS}_exclusao_{uuid.uuid4().hex}")
+    saldos = []
+    for escopo in _EXPRESSOES_CHAVE:
+        mongo_manager.collection.aggregate(_estagios_termos(filtros, escopo) + [
+            {"$merge": {"into": temporaria.name, "whenMatched": "replace"}}
+        ], allowDiskUse=True)
+        saldos.extend(mongo_manager.collection.aggregate(_estagios_totais(filtros, escopo)))
+
+    sem_features = list(mongo_manager.collection.find(
+        {"$and": [filtros, {"features_texto": {"$exists": False}}]},
+        {"titulo": 1, "descricao": 1, "categoria": 1, "unidade": 1, "data_criacao": 1}
+    ))
+
+    def subtrair():
+        try:
+            temporaria.aggregate([
+                {"$project": {
+                    "_id": 0, "escopo": "$_id.escopo", "chave": "$_id.chave", "termo": "$_id.termo",
+                    "frequencia": 1, "documentos": 1
+                }},
+                {"$merge": {
+                    "into": COLECAO_TERMOS, "on": ["escopo", "chave", "termo"],
+                    "whenMatched": [{"$set": {
+                        "frequencia": {"$subtract": ["$frequencia", "$$new.frequencia"]},
+                        "documentos": {"$subtract": ["$documentos", "$$new.documentos"]}
+                    }}],
+                    "whenNotMatched": "discard"
+                }}
+            ], allowDiskUse=True)
+        finally:
+            temporaria.drop()
+
+        if saldos:
+            totais.bulk_write([
+                UpdateOne(
+                    {"escopo": saldo['escopo'], "chave": saldo['chave']},
+                    {"$inc": {"total_palavras": -saldo['total_palavras'],
+                              "total_textos": -saldo['total_textos'],
+                              "total_ideias": -saldo['total_ideias']}}
+                )
+                for saldo in saldos
+            ], ordered=False)
+            # Termos que deixaram de ocorrer saem do índice (pelo índice escopo/chave/n/frequencia)
+            termos.delete_many({"$or": [
+                {"escopo": saldo['escopo'], "chave": saldo['chave'], "n": n, "frequencia": {"$lte": 0}}
+                for saldo in saldos for n in (UNIGRAMA, BIGRAMA)
+            ]})
+
+        for ideia in sem_features:
+            _aplicar(ideia, -1)
+
+    return subtrair
+
+# O índice acompanha todas as escritas feitas pelo mongo_manager
+mongo_manager.registrar_observador(atualizar_indice_termos)
+mongo_manager.registrar_observador_exclusao(preparar_exclusao_termos)
+
+# Reconstrução manual: python indice_termos.py
+if __name__ == "__main__":
+    print("Reconstruindo índice de termos...")
+    vocabulario = reconstruir_indice()
+    print(f"✅ Índice reconstruído: {vocabulario} termos no vocabulário global")
@@ -0,0 +1,281 @@
+import copy
+import pickle
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from gridfs import GridFS
+from pymongo import ASCENDING
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from mongodb_connection import mongo_manager
+from processamento_texto import VERSAO_FEATURES, limpar_texto
+
+# Modelos treinados localmente: metadados em um documento por modelo e o
+# modelo serializado no GridFS (sem o limite de 16 MB por documento)
+COLECAO_MODELOS = "modelos"
+BUCKET_MODELOS = "modelos_arquivos"
+
+# Espaço do hashing: sem vocabulário para guardar ou atualizar entre treinos.
+# 2**16 colunas bastam para o vocabulário das ideias e mantêm o modelo pequeno
+NUM_FEATURES = 2 ** 16
+
+# Depois deste tempo o modelo em memória é relido do banco (retreinos de outros processos)
+IDADE_MAXIMA_SEGUNDOS = 3600
+
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    modelos = mongo_manager.obter_colecao(COLECAO_MODELOS)
+    if modelos is None:
+        return None
+
+    if not _indices_criados:
+        modelos.create_index([("nome", ASCENDING)], unique=True)
+        _indices_criados = True
+
+    return modelos
+
+def salvar_modelo(nome: str, modelo, metadados: Dict) -> bool:
+    """Serializa o modelo no GridFS e aponta o documento `nome` para a nova versão"""
+    modelos = _obter_colecao()
+    if modelos is None:
+        return False
+
+    arquivos = GridFS(mongo_manager.db, collection=BUCKET_MODELOS)
+    arquivo_id = arquivos.put(pickle.dumps(modelo, protocol=pickle.HIGHEST_PROTOCOL), filename=nome)
+
+    anterior = modelos.find_one_and_update(
+        {"nome": nome},
+        {"$set": {"arquivo_id": arquivo_id, "metadados": metadados, "salvo_em": datetime.now()},
+         "$inc": {"versao": 1}},
+        upsert=True
+    )
+    if anterior and anterior.get("arquivo_id"):
+        arquivos.delete(anterior["arquivo_id"])
+    return True
+
+def carregar_modelo(nome: str) -> Tuple[Optional[object], Dict]:
+    """Retorna (modelo, metadados) gravados, ou (None, {}) se o modelo ainda não existe"""
+    modelos = _obter_colecao()
+    if modelos is None:
+        return None, {}
+
+    documento = modelos.find_one({"nome": nome})
+    if not documento:
+        return None, {}
+
+    arquivos = GridFS(mongo_manager.db, collection=BUCKET_MODELOS)
+    modelo = pickle.loads(arquivos.get(documento["arquivo_id"]).read())
+    return modelo, {**documento.get("metadados", {}), "versao": documento.get("versao", 1)}
+
+def texto_da_descricao(ideia: Dict) -> str:
+    """Tokens da descrição já limpos (usa as features gravadas quando existem)
+
+    O título fica de fora: no formulário ele é gerado a partir da categoria.
+    """
+    features = ideia.get('features_texto')
+    if not features or features.get('versao') != VERSAO_FEATURES:
+        return limpar_texto(ideia.get('descricao', ''))
+    return ' '.join(
+        token
+        for texto in features['textos'] if texto['campo'] == 'descricao'
+        for token in texto['tokens']
+    )
+
+def _token_contexto(campo: str, valor) -> str:
+    """Valor de um campo categórico como um único token ("categoria__tecnologia_inovacao")"""
+    return f"{campo}__{re.sub(r'[^a-z0-9]+', '_', str(valor).lower()).strip('_')}"
+
+class ClassificadorTexto:
+    """Classificador linear leve sobre a descrição das ideias
+
+    HashingVectorizer (palavras e bigramas) + SGDClassifier com perda logística:
+    treina em segundos em CPU, prevê em menos de um milissegundo por ideia e
+    aceita atualização incremental (partial_fit) com ideias novas, desde que
+    não surjam rótulos inéditos — nesse caso é preciso um treino completo.
+
+    ``campos_contexto`` acrescenta campos categóricos da ideia (ex.: categoria,
+    unidade) ao texto, cada um como um token próprio.
+    """
+
+    def __init__(self, campo_rotulo: str, campos_contexto: Tuple[str, ...] = ()):
+        self.campo_rotulo = campo_rotulo
+        self.campos_contexto = tuple(campos_contexto)
+        self.vetorizador = HashingVectorizer(
+            n_features=NUM_FEATURES, ngram_range=(1, 2), alternate_sign=False, norm='l2'
+        )
+        self.modelo: Optional[SGDClassifier] = None
+        self.classes: List[str] = []
+
+    @staticmethod
+    def _novo_modelo() -> SGDClassifier:
+        return SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=20, tol=None, random_state=42)
+
+    def _texto(self, ideia: Dict) -> str:
+        texto = texto_da_descricao(ideia)
+        # Modelos gravados antes da existência de campos_contexto não têm o atributo
+        campos = getattr(self, 'campos_contexto', ())
+        if not texto or not campos:
+            return texto
+        contexto = ' '.join(_token_contexto(campo, ideia[campo]) for campo in campos if ideia.get(campo))
+        return f"{texto} {contexto}".strip()
+
+    def _exemplos(self, ideias: Iterable[Dict]) -> Tuple[List[str], List[str]]:
+        textos, rotulos = [], []
+        for ideia in ideias:
+            rotulo = ideia.get(self.campo_rotulo)
+            texto = self._texto(ideia)
+            if rotulo and texto:
+                textos.append(texto)
+                rotulos.append(rotulo)
+        return textos, rotulos
+
+    def treinar(self, ideias: Iterable[Dict]) -> Dict:
+        """Treino completo; mede a acurácia em 20% das ideias antes do ajuste final"""
+        textos, rotulos = self._exemplos(ideias)
+        classes = sorted(set(rotulos))
+        if len(classes) < 2:
+            raise ValueError(f"São necessários exemplos de pelo menos dois valores de '{self.campo_rotulo}'")
+
+        matriz = self.vetorizador.transform(textos)
+        rotulos = np.array(rotulos)
+
+        acuracia = None
+        teste = np.arange(len(rotulos)) % 5 == 0
+        if teste.sum() and len(set(rotulos[~teste])) == len(classes):
+            avaliacao = self._novo_modelo().fit(matriz[~teste], rotulos[~teste])
+            acuracia = float((avaliacao.predict(matriz[teste]) == rotulos[teste]).mean())
+
+        self.modelo = self._novo_modelo().fit(matriz, rotulos)
+        self.classes = [str(c) for c in self.modelo.classes_]
+        return {'exemplos': len(rotulos), 'classes': self.classes, 'acuracia': acuracia}
+
+    def atualizar(self, ideias: Iterable[Dict]) -> int:
+        """Treino incremental com ideias novas; retorna quantas foram usadas (-1 se há rótulo inédito)"""
+        textos, rotulos = self._exemplos(ideias)
+        if not textos:
+            return 0
+        if self.modelo is None or not set(rotulos) <= set(self.classes):
+            return -1
+
+        self.modelo.partial_fit(self.vetorizador.transform(textos), rotulos)
+        return len(textos)
+
+    def probabilidades(self, textos: List[str]) -> np.ndarray:
+        """Matriz textos x classes com as probabilidades previstas
+
+        Mesmo cálculo do predict_proba do SGDClassifier (um-contra-todos,
+        sigmoides normalizadas), feito direto sobre os coeficientes para
+        evitar as validações do scikit-learn a cada chamada.
+        """
+        matriz = self.vetorizador.transform(textos)
+        pontuacoes = np.asarray(matriz @ self.modelo.coef_.T) + self.modelo.intercept_
+        sigmoides = 1.0 / (1.0 + np.exp(-pontuacoes))
+        if sigmoides.shape[1] == 1:
+            return np.hstack([1.0 - sigmoides, sigmoides])
+        return sigmoides / sigmoides.sum(axis=1, keepdims=True)
+
+    def sugerir(self, descricao: str, limite: int = 3) -> List[Tuple[str, float]]:
+        """As `limite` classes mais prováveis para uma descrição livre"""
+        texto = limpar_texto(descricao)
+        if self.modelo is None or not texto:
+            return []
+        probabilidades = self.probabilidades([texto])[0]
+        ordem = np.argsort(-probabilidades)[:limite]
+        return [(self.classes[i], float(probabilidades[i])) for i in ordem]
+
+    def classificar_lote(self, ideias: List[Dict]) -> List[Tuple[Optional[str], float]]:
+        """(classe mais provável, confiança) de cada ideia; (None, 0.0) sem descrição"""
+        textos = [self._texto(ideia) for ideia in ideias]
+        posicoes = [i for i, texto in enumerate(textos) if texto]
+        resultado: List[Tuple[Optional[str], float]] = [(None, 0.0)] * len(ideias)
+        if self.modelo is None or not posicoes:
+            return resultado
+
+        probabilidades = self.probabilidades([textos[i] for i in posicoes])
+        melhores = probabilidades.argmax(axis=1)
+        for posicao, melhor, linha in zip(posicoes, melhores, probabilidades):
+            resultado[posicao] = (self.classes[melhor], float(linha[melhor]))
+        return resultado
+
+class GerenciadorModelo:
+    """Mantém um ClassificadorTexto por processo, sincronizado com a coleção de modelos"""
+
+    def __init__(self, nome: str, campo_rotulo: str, campos_contexto: Tuple[str, ...] = (),
+                 rotulos_ignorados: Tuple[str, ...] = ()):
+        self.nome = nome
+        self.campo_rotulo = campo_rotulo
+        self.campos_contexto = tuple(campos_contexto)
+        # Valores do campo que não são rótulos de verdade (ex.: "Não atribuído")
+        self.rotulos_ignorados = tuple(rotulos_ignorados)
+        self._trava = threading.Lock()
+        self._classificador: Optional[ClassificadorTexto] = None
+        self._metadados: Dict = {}
+        self._carregado_em: Optional[float] = None
+
+    def obter(self) -> Tuple[Optional[ClassificadorTexto], Dict]:
+        """Classificador atual (None se nunca foi treinado) e seus metadados"""
+        with self._trava:
+            if self._carregado_em is None or time.time() - self._carregado_em > IDADE_MAXIMA_SEGUNDOS:
+                self._classificador, self._metadados = carregar_modelo(self.nome)
+                self._carregado_em = time.time()
+            return self._classificador, dict(self._metadados)
+
+    def treinar(self, incremental: bool = True, tamanho_lote: int = 1000) -> Dict:
+        """Retreina a partir das ideias rotuladas
+
+        No modo incremental só as ideias criadas ou alteradas depois do último
+        treino são usadas (o rótulo costuma ser definido na triagem, em ideias
+        antigas); se não houver modelo ou aparecer um rótulo novo, faz treino
+        completo. O ajuste é feito em uma cópia do classificador, que só
+        substitui o atual ao final: as predições em andamento não veem um
+        modelo pela metade.
+        """
+        classificador, metadados = self.obter()
+        filtro = {self.campo_rotulo: {"$nin": [None, "", *self.rotulos_ignorados]}}
+        projecao = {self.campo_rotulo: 1, "titulo": 1, "descricao": 1, "features_texto": 1,
+                    **{campo: 1 for campo in self.campos_contexto}}
+        inicio = datetime.now()
+
+        if incremental and classificador is not None and metadados.get('treinado_ate'):
+            filtro_novas = {**filtro, "$or": [
+                {"data_criacao": {"$gt": metadados['treinado_ate']}},
+                {"data_atualizacao": {"$gt": metadados['treinado_ate']}},
+            ]}
+            classificador = copy.deepcopy(classificador)
+            usadas = 0
+            for lote in mongo_manager.iterar_ideias(filtro_novas, projecao, tamanho_lote):
+                resultado = classificador.atualizar(lote)
+                if resultado < 0:
+                    break
+                usadas += resultado
+            else:
+                metadados.update({
+                    'treinado_ate': inicio,
+                    'exemplos': metadados.get('exemplos', 0) + usadas,
+                    'atualizado_em': inicio,
+                    'modo': 'incremental'
+                })
+                metadados.pop('versao', None)
+                salvar_modelo(self.nome, classificador, metadados)
+                self._definir(classificador, metadados)
+                return metadados
+
+        ideias = [ideia for lote in mongo_manager.iterar_ideias(filtro, projecao, tamanho_lote) for ideia in lote]
+        classificador = ClassificadorTexto(self.campo_rotulo, self.campos_contexto)
+        metadados = classificador.treinar(ideias)
+        metadados.update({'treinado_ate': inicio, 'atualizado_em': inicio, 'modo': 'completo'})
+        salvar_modelo(self.nome, classificador, metadados)
+        self._definir(classificador, metadados)
+        return metadados
+
+    def _definir(self, classificador: ClassificadorTexto, metadados: Dict):
+        with self._trava:
+            self._classificador, self._metadados = classificador, metadados
+            self._carregado_em = time.time()
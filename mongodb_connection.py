@@ -1,8 +1,9 @@
 import pymongo
 import streamlit as st
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
 
 class MongoDBManager:
     def __init__(self):
@@ -14,6 +15,12 @@ class MongoDBManager:
         self.db = None
         self.collection = None
         self._initialized = False
+        # Funções chamadas após cada escrita de ideia (índices e dados derivados)
+        self._observadores: List[Callable] = []
+        # Funções chamadas antes de atualizações em massa (resumo das ideias no servidor)
+        self._observadores_lote: List[Callable] = []
+        # Funções chamadas antes de exclusões em massa (desfazem os derivados no servidor)
+        self._observadores_exclusao: List[Callable] = []
         
     def _initialize(self):
         """Inicializa as configurações apenas quando necessário"""
@@ -71,6 +78,72 @@ class MongoDBManager:
             st.error(f"❌ Erro ao conectar ao MongoDB: {e}")
             return False
     
+    def obter_colecao(self, nome: str):
+        """Retorna uma coleção auxiliar do mesmo banco (índices, rankings, filas)"""
+        if self.db is None:
+            if not self.connect():
+                return None
+        return self.db[nome]
+    
+    def registrar_observador(self, observador: Callable):
+        """Registra uma função observador(evento, antes, depois) chamada após cada escrita
+        
+        evento é 'inserir', 'atualizar' ou 'deletar'; antes/depois são os documentos
+        da ideia (None quando não se aplicam).
+        """
+        if observador not in self._observadores:
+            self._observadores.append(observador)
+    
+    def registrar_observador_lote(self, observador: Callable):
+        """Registra uma função observador(filtros, novos_dados) para atualizações em massa
+        
+        É chamada antes do update_many, com o mesmo filtro, para resumir as ideias
+        afetadas no servidor (aggregate) sem trazê-las ao cliente; pode devolver
+        uma função sem argumentos, executada depois que a escrita der certo.
+        novos_dados já traz o data_atualizacao que o update_many vai gravar.
+        """
+        if observador not in self._observadores_lote:
+            self._observadores_lote.append(observador)
+    
+    def registrar_observador_exclusao(self, observador: Callable):
+        """Registra uma função observador(filtros, ids) para exclusões em massa
+        
+        É chamada antes do delete_many; filtros seleciona exatamente as ideias
+        que serão excluídas e ids são os mesmos _id em texto. Como no lote de
+        atualização, pode devolver uma função sem argumentos, executada depois
+        que a exclusão der certo.
+        """
+        if observador not in self._observadores_exclusao:
+            self._observadores_exclusao.append(observador)
+    
+    def _notificar(self, evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+        """Repassa a escrita aos observadores sem deixar que falhas deles desfaçam a operação"""
+        for observador in self._observadores:
+            try:
+                observador(evento, antes, depois)
+            except Exception as e:
+                st.warning(f"⚠️ Falha ao atualizar dados derivados da ideia ({evento}): {e}")
+    
+    def inserir_ideia(self, ideia_data: Dict) -> str:
+        """Só o insert_one: sem observadores nem mensagens, erros sobem como exceção
+        
+        Pode rodar fora da thread do Streamlit (exige conexão já aberta);
+        depois, na thread da página, chame notificar_insercao para atualizar
+        os dados derivados.
+        """
+        if self.collection is None:
+            raise ConnectionError("Sem conexão com o MongoDB")
+        
+        # Adiciona timestamp se não existir
+        if 'data_criacao' not in ideia_data:
+            ideia_data['data_criacao'] = datetime.now()
+        
+        return str(self.collection.insert_one(ideia_data).inserted_id)
+    
+    def notificar_insercao(self, ideia_data: Dict):
+        """Repassa aos observadores uma ideia gravada por inserir_ideia"""
+        self._notificar('inserir', None, ideia_data)
+    
     def salvar_ideia(self, ideia_data: Dict) -> Optional[str]:
         """Salva uma nova ideia no MongoDB"""
         try:
@@ -78,20 +151,16 @@ class MongoDBManager:
                 if not self.connect():
                     return None
             
-            # Adiciona timestamp se não existir
-            if 'data_criacao' not in ideia_data:
-                ideia_data['data_criacao'] = datetime.now()
-            
-            # Insere o documento
-            resultado = self.collection.insert_one(ideia_data)
-            return str(resultado.inserted_id)
+            ideia_id = self.inserir_ideia(ideia_data)
+            self.notificar_insercao(ideia_data)
+            return ideia_id
             
         except Exception as e:
             st.error(f"❌ Erro ao salvar ideia: {e}")
             return None
     
-    def buscar_ideias(self, filtros: Dict = None) -> List[Dict]:
-        """Busca ideias no MongoDB com filtros opcionais"""
+    def buscar_ideias(self, filtros: Dict = None, projecao: Dict = None) -> List[Dict]:
+        """Busca ideias no MongoDB com filtros e projeção opcionais"""
         try:
             if self.collection is None:
                 if not self.connect():
@@ -101,7 +170,7 @@ class MongoDBManager:
                 filtros = {}
             
             # Busca os documentos
-            cursor = self.collection.find(filtros).sort("data_criacao", -1)
+            cursor = self.collection.find(filtros, projecao).sort("data_criacao", -1)
             ideias = list(cursor)
             
             # Converte ObjectId para string para compatibilidade
@@ -115,6 +184,114 @@ class MongoDBManager:
             st.error(f"❌ Erro ao buscar ideias: {e}")
             return []
     
+    def iterar_ideias(self, filtros: Dict = None, projecao: Dict = None,
+                      tamanho_lote: int = 1000) -> Iterator[List[Dict]]:
+        """Percorre as ideias em lotes, sem carregar o resultado inteiro em memória"""
+        try:
+            if self.collection is None:
+                if not self.connect():
+                    return
+            
+            cursor = (self.collection.find(filtros or {}, projecao)
+                      .sort("data_criacao", -1)
+                      .batch_size(tamanho_lote))
+            
+            lote = []
+            for ideia in cursor:
+                ideia['_id'] = str(ideia['_id'])
+                lote.append(ideia)
+                if len(lote) >= tamanho_lote:
+                    yield lote
+                    lote = []
+            
+            if lote:
+                yield lote
+            
+        except Exception as e:
+            st.error(f"❌ Erro ao percorrer ideias: {e}")
+    
+    @staticmethod
+    def _filtro_apos(campo: str, chave: Tuple[Any, str], decrescente: bool) -> Dict:
+        """Ideias depois de (valor, id) na ordem (campo, _id); valores ausentes contam como null"""
+        valor, ideia_id = chave
+        mesmo_valor = {campo: valor, "_id": {"$lt" if decrescente else "$gt": ObjectId(ideia_id)}}
+        if decrescente:
+            # null é o menor valor: vem por último na ordem decrescente
+            condicoes = [mesmo_valor] if valor is None else [{campo: {"$lt": valor}}, mesmo_valor, {campo: None}]
+        else:
+            condicoes = [{campo: {"$ne": None}} if valor is None else {campo: {"$gt": valor}}, mesmo_valor]
+        return {"$or": condicoes}
+    
+    def buscar_pagina(self, filtros: Dict = None, campo_ordem: str = "data_criacao", decrescente: bool = True,
+                      apos: Optional[Tuple[Any, str]] = None, limite: int = 50,
+                      projecao: Dict = None) -> Tuple[List[Dict], Optional[Tuple[Any, str]]]:
+        """Busca uma página de ideias por paginação por chave (keyset)
+        
+        A ordem é (campo_ordem, _id) e `apos` é a chave (valor, id) da última
+        ideia da página anterior. Retorna as ideias e a chave da próxima página
+        (None na última). Ao contrário de skip(), o custo de cada página não
+        cresce com a posição.
+        """
+        try:
+            if self.collection is None:
+                if not self.connect():
+                    return [], None
+            
+            return self.consultar_pagina(filtros, campo_ordem, decrescente, apos, limite, projecao)
+            
+        except Exception as e:
+            st.error(f"❌ Erro ao buscar página de ideias: {e}")
+            return [], None
+    
+    def consultar_pagina(self, filtros: Dict = None, campo_ordem: str = "data_criacao", decrescente: bool = True,
+                         apos: Optional[Tuple[Any, str]] = None, limite: int = 50,
+                         projecao: Dict = None) -> Tuple[List[Dict], Optional[Tuple[Any, str]]]:
+        """Mesma consulta de buscar_pagina, sem mensagens: erros sobem como exceção
+        
+        Pode rodar fora da thread do Streamlit (exige conexão já aberta).
+        """
+        if self.collection is None:
+            raise ConnectionError("Sem conexão com o MongoDB")
+        
+        consulta = dict(filtros or {})
+        if apos is not None:
+            consulta = {"$and": [consulta, self._filtro_apos(campo_ordem, apos, decrescente)]}
+        if projecao is not None:
+            projecao = {**projecao, campo_ordem: 1}
+        
+        direcao = -1 if decrescente else 1
+        cursor = (self.collection.find(consulta, projecao)
+                  .sort([(campo_ordem, direcao), ("_id", direcao)])
+                  .limit(limite + 1))
+        ideias = list(cursor)
+        
+        proximo = None
+        if len(ideias) > limite:
+            ideias = ideias[:limite]
+            proximo = (ideias[-1].get(campo_ordem), str(ideias[-1]['_id']))
+        
+        for ideia in ideias:
+            ideia['_id'] = str(ideia['_id'])
+        
+        return ideias, proximo
+    
+    @staticmethod
+    def _atualizacao(novos_dados: Dict):
+        """$set dos novos dados; com mudança de status, status_desde vai na mesma escrita
+        
+        Nesse caso a atualização é um pipeline: status_desde recebe
+        data_atualizacao só nas ideias cujo status de fato muda ("$status"
+        ainda é o valor anterior dentro do estágio).
+        """
+        if 'status' not in novos_dados:
+            return {"$set": novos_dados}
+        return [{"$set": {
+            **{campo: {"$literal": valor} for campo, valor in novos_dados.items()},
+            "status_desde": {"$cond": [
+                {"$ne": ["$status", {"$literal": novos_dados['status']}]}, novos_dados['data_atualizacao'], "$status_desde"
+            ]}
+        }}]
+    
     def atualizar_ideia(self, ideia_id: str, novos_dados: Dict) -> bool:
         """Atualiza uma ideia existente"""
         try:
@@ -125,18 +302,122 @@ class MongoDBManager:
             # Adiciona timestamp de atualização
             novos_dados['data_atualizacao'] = datetime.now()
             
-            # Atualiza o documento
-            resultado = self.collection.update_one(
+            # Atualiza o documento, recuperando a versão anterior para os observadores
+            antes = self.collection.find_one_and_update(
                 {"_id": ObjectId(ideia_id)},
-                {"$set": novos_dados}
+                self._atualizacao(novos_dados),
+                return_document=ReturnDocument.BEFORE
             )
             
-            return resultado.modified_count > 0
+            if antes is None:
+                return False
+            
+            depois = {**antes, **novos_dados}
+            if 'status' in novos_dados and antes.get('status') != novos_dados['status']:
+                depois['status_desde'] = novos_dados['data_atualizacao']
+            self._notificar('atualizar', antes, depois)
+            return True
             
         except Exception as e:
             st.error(f"❌ Erro ao atualizar ideia: {e}")
             return False
     
+    def atualizar_ideias_em_lote(self, atualizacoes: Dict[str, Dict]) -> int:
+        """Aplica vários $set (id -> campos) em uma única chamada bulk_write"""
+        try:
+            if self.collection is None:
+                if not self.connect():
+                    return 0
+            
+            if not atualizacoes:
+                return 0
+            
+            operacoes = [
+                UpdateOne({"_id": ObjectId(ideia_id)}, {"$set": dados})
+                for ideia_id, dados in atualizacoes.items()
+            ]
+            resultado = self.collection.bulk_write(operacoes, ordered=False)
+            return resultado.modified_count
+            
+        except Exception as e:
+            st.error(f"❌ Erro ao atualizar ideias em lote: {e}")
+            return 0
+    
+    def atualizar_ideias_por_filtro(self, filtros: Dict, novos_dados: Dict) -> int:
+        """Aplica o mesmo $set a todas as ideias do filtro em um único update_many"""
+        try:
+            if self.collection is None:
+                if not self.connect():
+                    return 0
+            
+            # Um único horário local para a escrita e para os eventos dos observadores
+            novos_dados = {**novos_dados, 'data_atualizacao': datetime.now()}
+            posteriores = []
+            for observador in self._observadores_lote:
+                try:
+                    posterior = observador(filtros, novos_dados)
+                    if posterior is not None:
+                        posteriores.append(posterior)
+                except Exception as e:
+                    st.warning(f"⚠️ Falha ao preparar dados derivados da atualização em lote: {e}")
+            
+            resultado = self.collection.update_many(
+                filtros, self._atualizacao(novos_dados)
+            )
+            
+            for posterior in posteriores:
+                try:
+                    posterior()
+                except Exception as e:
+                    st.warning(f"⚠️ Falha ao atualizar dados derivados da atualização em lote: {e}")
+            
+            return resultado.modified_count
+            
+        except Exception as e:
+            st.error(f"❌ Erro ao atualizar ideias em lote: {e}")
+            return 0
+    
+    def deletar_ideias_por_filtro(self, filtros: Dict, tamanho_lote: int = 10000) -> int:
+        """Exclui as ideias do filtro sem trazer os documentos ao cliente
+        
+        Só os _id são lidos, em blocos de até tamanho_lote; cada bloco passa
+        pelos observadores de exclusão (que desfazem os derivados no servidor,
+        agregando pelo mesmo filtro) e sai em um único delete_many.
+        """
+        total = 0
+        try:
+            if self.collection is None:
+                if not self.connect():
+                    return 0
+            
+            cursor = self.collection.find(filtros, {"_id": 1}).batch_size(tamanho_lote)
+            while True:
+                ids = [ideia['_id'] for _, ideia in zip(range(tamanho_lote), cursor)]
+                if not ids:
+                    return total
+                
+                filtro_ids = {"_id": {"$in": ids}}
+                posteriores = []
+                for observador in self._observadores_exclusao:
+                    try:
+                        posterior = observador(filtro_ids, [str(i) for i in ids])
+                        if posterior is not None:
+                            posteriores.append(posterior)
+                    except Exception as e:
+                        st.warning(f"⚠️ Falha ao preparar dados derivados da exclusão em lote: {e}")
+                
+                total += self.collection.delete_many(filtro_ids).deleted_count
+                
+                for posterior in posteriores:
+                    try:
+                        posterior()
+                    except Exception as e:
+                        st.warning(f"⚠️ Falha ao atualizar dados derivados da exclusão em lote: {e}")
+            
+        except Exception as e:
+            st.error(f"❌ Erro ao deletar ideias em lote: {e}")
+            return total
+    
     def deletar_ideia(self, ideia_id: str) -> bool:
         """Deleta uma ideia"""
         try:
@@ -144,21 +425,26 @@ class MongoDBManager:
                 if not self.connect():
                     return False
             
-            resultado = self.collection.delete_one({"_id": ObjectId(ideia_id)})
-            return resultado.deleted_count > 0
+            antes = self.collection.find_one_and_delete({"_id": ObjectId(ideia_id)})
+            
+            if antes is None:
+                return False
+            
+            self._notificar('deletar', antes, None)
+            return True
             
         except Exception as e:
             st.error(f"❌ Erro ao deletar ideia: {e}")
             return False
     
-    def contar_ideias(self) -> int:
-        """Conta o total de ideias"""
+    def contar_ideias(self, filtros: Dict = None) -> int:
+        """Conta o total de ideias (ou as que atendem aos filtros)"""
         try:
             if self.collection is None:
                 if not self.connect():
                     return 0
             
-            return self.collection.count_documents({})
+            return self.collection.count_documents(filtros or {})
             
         except Exception as e:
             st.error(f"❌ Erro ao contar ideias: {e}")
@@ -26,6 +26,7 @@ def criar_navegacao():
             "☁️ Análise de Texto 🔒",
             "📋 Controle de Ideias 🔒",
             "🎮 Gamificação 🔒",
+            "📈 Relatórios 🔒",
             "🔔 Notificações 🔒",
             "🤖 Análise IA 🔒"
         ]
@@ -0,0 +1,220 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from gridfs import GridFS
+from pymongo import ASCENDING, ReturnDocument
+
+from mongodb_connection import mongo_manager
+from Office365_api import SharePoint
+
+# Uploads pendentes para o SharePoint e o conteúdo de cada documento no GridFS
+COLECAO_OUTBOX = "outbox_sharepoint"
+BUCKET_OUTBOX = "outbox_sharepoint_arquivos"
+
+PASTA_PADRAO = "Banco_de_Ideias"  # Pasta no SharePoint para armazenar as ideias
+
+# Documentos enviados por rodada, com uma única autenticação no SharePoint
+TAMANHO_LOTE = 20
+
+# Espera entre tentativas: 30s, 1min, 2min... até 1h (nenhum documento é descartado)
+ESPERA_INICIAL_SEGUNDOS = 30
+ESPERA_MAXIMA_SEGUNDOS = 3600
+
+# Reserva de um processo que parou no meio do envio expira depois disto
+LIMITE_ENVIO_SEGUNDOS = 300
+
+# Intervalo entre rodadas da drenagem periódica (app e modo contínuo da linha de comando)
+INTERVALO_CONTINUO_SEGUNDOS = 30
+
+# Rodadas sem encontrar a ideia de um upload já enviado (o cadastro no MongoDB
+# falhou) antes de o item ser marcado como órfão
+MAX_TENTATIVAS_MARCACAO = 20
+
+_executor = ThreadPoolExecutor(max_workers=1)
+_rodada = None
+_agendador: Optional[threading.Thread] = None
+_trava_agendador = threading.Lock()
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    outbox = mongo_manager.obter_colecao(COLECAO_OUTBOX)
+    if outbox is None:
+        return None
+
+    if not _indices_criados:
+        outbox.create_index([("status", ASCENDING), ("proxima_tentativa", ASCENDING)])
+        outbox.create_index([("status", ASCENDING), ("ideia_marcada", ASCENDING)])
+        mongo_manager.collection.create_index([("id_unico", ASCENDING)])
+        _indices_criados = True
+
+    return outbox
+
+def espera_apos(tentativas: int) -> timedelta:
+    """Backoff exponencial: o dobro da espera a cada falha, limitado a ESPERA_MAXIMA_SEGUNDOS"""
+    return timedelta(seconds=min(ESPERA_INICIAL_SEGUNDOS * 2 ** max(tentativas - 1, 0), ESPERA_MAXIMA_SEGUNDOS))
+
+def enfileirar_upload(nome_arquivo: str, conteudo: bytes, id_unico: str, pasta: str = PASTA_PADRAO) -> Optional[str]:
+    """Guarda o documento no GridFS e registra o upload pendente; retorna o id do item da fila"""
+    outbox = _obter_colecao()
+    if outbox is None:
+        return None
+
+    arquivo_id = GridFS(mongo_manager.db, collection=BUCKET_OUTBOX).put(conteudo, filename=nome_arquivo)
+    resultado = outbox.insert_one({
+        "nome_arquivo": nome_arquivo,
+        "pasta": pasta,
+        "arquivo_id": arquivo_id,
+        "id_unico": id_unico,
+        "status": "pendente",
+        "tentativas": 0,
+        "proxima_tentativa": datetime.now(),
+        "criado_em": datetime.now(),
+    })
+    return str(resultado.inserted_id)
+
+def _reservar(outbox, limite: int) -> List[Dict]:
+    """Marca até `limite` itens vencidos como 'enviando' (um a um, para não disputar itens com outro processo)"""
+    agora = datetime.now()
+    vencidos = {"$or": [
+        {"status": "pendente", "proxima_tentativa": {"$lte": agora}},
+        {"status": "enviando", "reservado_em": {"$lt": agora - timedelta(seconds=LIMITE_ENVIO_SEGUNDOS)}},
+    ]}
+    reservados = []
+    while len(reservados) < limite:
+        item = outbox.find_one_and_update(
+            vencidos,
+            {"$set": {"status": "enviando", "reservado_em": agora}},
+            sort=[("proxima_tentativa", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if item is None:
+            break
+        reservados.append(item)
+    return reservados
+
+def _marcar_ideia(outbox, item: Dict):
+    """Registra na ideia que o documento chegou ao SharePoint"""
+    resultado = mongo_manager.collection.update_one(
+        {"id_unico": item["id_unico"]},
+        {"$set": {"arquivo_sharepoint": item["nome_arquivo"], "sharepoint_enviado": True,
+                  "sharepoint_enviado_em": item.get("enviado_em", datetime.now())}}
+    )
+    if resultado.matched_count:
+        outbox.update_one({"_id": item["_id"]}, {"$set": {"ideia_marcada": True}})
+        return
+
+    # A ideia pode ainda não ter sido gravada; a próxima rodada tenta de novo,
+    # até MAX_TENTATIVAS_MARCACAO (se o cadastro falhou, ela nunca vai existir)
+    tentativas = item.get("tentativas_marcacao", 0) + 1
+    outbox.update_one({"_id": item["_id"]}, {"$set": {
+        "ideia_marcada": False, "tentativas_marcacao": tentativas,
+        **({"status": "orfao"} if tentativas >= MAX_TENTATIVAS_MARCACAO else {})
+    }})
+
+def processar_fila(limite: int = TAMANHO_LOTE) -> Dict[str, int]:
+    """Uma rodada do worker: envia os itens vencidos e reagenda os que falharem
+
+    Cada item é reservado antes do envio, então vários processos podem drenar
+    a fila ao mesmo tempo. Uma falha não perde o documento: o item volta a
+    'pendente' com a próxima tentativa adiada pelo backoff.
+    """
+    outbox = _obter_colecao()
+    if outbox is None:
+        return {"enviados": 0, "falhas": 0}
+
+    for item in outbox.find({"status": "enviado", "ideia_marcada": False}).limit(limite):
+        _marcar_ideia(outbox, item)
+
+    itens = _reservar(outbox, limite)
+    if not itens:
+        return {"enviados": 0, "falhas": 0}
+
+    arquivos = GridFS(mongo_manager.db, collection=BUCKET_OUTBOX)
+    enviados = falhas = 0
+    try:
+        sharepoint = SharePoint()
+        conexao = sharepoint._auth()
+        erro_conexao = None
+    except Exception as e:
+        sharepoint = conexao = None
+        erro_conexao = str(e)
+
+    for item in itens:
+        try:
+            if conexao is None:
+                raise ConnectionError(erro_conexao)
+            conteudo = arquivos.get(item["arquivo_id"]).read()
+            sharepoint.upload_file(item["nome_arquivo"], item["pasta"], conteudo, conexao=conexao)
+        except Exception as e:
+            falhas += 1
+            tentativas = item["tentativas"] + 1
+            outbox.update_one({"_id": item["_id"]}, {"$set": {
+                "status": "pendente", "tentativas": tentativas, "ultimo_erro": str(e),
+                "proxima_tentativa": datetime.now() + espera_apos(tentativas)
+            }})
+            continue
+
+        enviados += 1
+        item["enviado_em"] = datetime.now()
+        outbox.update_one({"_id": item["_id"]}, {
+            "$set": {"status": "enviado", "enviado_em": item["enviado_em"], "tentativas": item["tentativas"] + 1},
+            "$unset": {"arquivo_id": "", "ultimo_erro": ""}
+        })
+        arquivos.delete(item["arquivo_id"])
+        _marcar_ideia(outbox, item)
+
+    return {"enviados": enviados, "falhas": falhas}
+
+def _drenar():
+    while processar_fila()["enviados"]:
+        pass
+
+def drenar_em_segundo_plano():
+    """Agenda uma rodada do worker no processo do app, se não houver outra em andamento"""
+    global _rodada
+    if _rodada is None or _rodada.done():
+        _rodada = _executor.submit(_drenar)
+
+def _drenar_periodicamente(intervalo: int):
+    while True:
+        drenar_em_segundo_plano()
+        time.sleep(intervalo)
+
+def iniciar_drenagem_periodica(intervalo: int = INTERVALO_CONTINUO_SEGUNDOS):
+    """Inicia, uma vez por processo, a thread que drena a fila a cada `intervalo` segundos
+
+    Sem ela, um item que falhou só seria reenviado no próximo cadastro; com
+    o app fora do ar, use python outbox_sharepoint.py --continuo.
+    """
+    global _agendador
+    with _trava_agendador:
+        if _agendador is None or not _agendador.is_alive():
+            _agendador = threading.Thread(
+                target=_drenar_periodicamente, args=(intervalo,), daemon=True, name="outbox_sharepoint"
+            )
+            _agendador.start()
+
+def resumo_fila() -> Dict[str, int]:
+    """Quantidade de itens por status"""
+    outbox = _obter_colecao()
+    if outbox is None:
+        return {}
+    return {doc["_id"]: doc["total"] for doc in outbox.aggregate([{"$group": {"_id": "$status", "total": {"$sum": 1}}}])}
+
+# Worker da fila: python outbox_sharepoint.py [--continuo]
+if __name__ == "__main__":
+    import sys
+
+    while True:
+        resultado = processar_fila()
+        if resultado["enviados"] or resultado["falhas"]:
+            print(f"📤 {resultado['enviados']} enviados, {resultado['falhas']} reagendados")
+            continue
+        if '--continuo' not in sys.argv:
+            break
+        time.sleep(INTERVALO_CONTINUO_SEGUNDOS)
+    print(f"✅ Fila: {resumo_fila()}")
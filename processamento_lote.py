@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from indice_termos import reconstruir_indice
+from mongodb_connection import mongo_manager
+from processamento_texto import calcular_features_lote, VERSAO_FEATURES
+from tfidf_termos import recarregar_motor_tfidf
+
+# Cada item do corpus é (id da ideia, título, descrição)
+ItemCorpus = Tuple[str, str, str]
+
+def _processar_chunk(chunk: List[ItemCorpus]) -> List[Tuple[str, Dict]]:
+    """Calcula as features de um chunk (executado dentro de um processo do pool)"""
+    features = calcular_features_lote([(titulo, descricao) for _, titulo, descricao in chunk])
+    return [(ideia_id, features_ideia) for (ideia_id, _, _), features_ideia in zip(chunk, features)]
+
+def dividir_em_chunks(itens: List[ItemCorpus], tamanho_chunk: int) -> List[List[ItemCorpus]]:
+    """Divide o corpus em chunks de tamanho fixo, preservando a ordem"""
+    return [itens[inicio:inicio + tamanho_chunk] for inicio in range(0, len(itens), tamanho_chunk)]
+
+def processar_corpus(itens: List[ItemCorpus],
+                     tamanho_chunk: int = 500,
+                     max_processos: Optional[int] = None,
+                     ao_progredir: Optional[Callable[[int, int], None]] = None,
+                     cancelamento=None) -> Iterator[List[Tuple[str, Dict]]]:
+    """Processa o corpus em paralelo, devolvendo os resultados chunk a chunk
+
+    - ``max_processos=1`` executa no próprio processo (caminho serial), com o
+      mesmo código dos workers, então os resultados são idênticos;
+    - ``ao_progredir(processados, total)`` é chamado a cada chunk concluído;
+    - ``cancelamento`` é qualquer objeto com ``is_set()`` (ex.: threading.Event);
+      quando sinalizado, os chunks ainda não iniciados são descartados e os já
+      concluídos continuam disponíveis para quem consome o gerador.
+    """
+    total = len(itens)
+    chunks = dividir_em_chunks(itens, tamanho_chunk)
+    processados = 0
+
+    if max_processos is None:
+        max_processos = os.cpu_count() or 1
+
+    if max_processos <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            if cancelamento is not None and cancelamento.is_set():
+                return
+            resultados = _processar_chunk(chunk)
+            processados += len(chunk)
+            if ao_progredir:
+                ao_progredir(processados, total)
+            yield resultados
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_processos, len(chunks))) as executor:
+        pendentes = {executor.submit(_processar_chunk, chunk): len(chunk) for chunk in chunks}
+
+        try:
+            while pendentes:
+                concluidos, _ = wait(pendentes, timeout=0.5, return_when=FIRST_COMPLETED)
+
+                for futuro in concluidos:
+                    processados += pendentes.pop(futuro)
+                    if ao_progredir:
+                        ao_progredir(processados, total)
+                    yield futuro.result()
+
+                if cancelamento is not None and cancelamento.is_set():
+                    break
+        finally:
+            # Cancelamento explícito ou consumidor que abandonou o gerador
+            for futuro in pendentes:
+                futuro.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+def backfill_features_texto(forcar: bool = False,
+                            tamanho_chunk: int = 500,
+                            max_processos: Optional[int] = None,
+                            ao_progredir: Optional[Callable[[int, int], None]] = None,
+                            cancelamento=None) -> int:
+    """Recalcula em paralelo as features das ideias desatualizadas e grava cada chunk ao concluir
+
+    A gravação em lote não passa pelos observadores; por isso, se alguma
+    ideia mudou, o índice de termos é reconstruído com as novas features
+    (senão as edições seguintes descontariam tokens que nunca entraram) e o
+    motor TF-IDF do processo é relido dele.
+    """
+    filtros = {} if forcar else {'features_texto.versao': {'$ne': VERSAO_FEATURES}}
+    ideias = mongo_manager.buscar_ideias(filtros, {'titulo': 1, 'descricao': 1})
+    itens = [(ideia['_id'], ideia.get('titulo', ''), ideia.get('descricao', '')) for ideia in ideias]
+
+    total_atualizadas = 0
+    for resultados in processar_corpus(itens, tamanho_chunk, max_processos, ao_progredir, cancelamento):
+        atualizacoes = {ideia_id: {'features_texto': features} for ideia_id, features in resultados}
+        total_atualizadas += mongo_manager.atualizar_ideias_em_lote(atualizacoes)
+
+    if total_atualizadas:
+        reconstruir_indice()
+        recarregar_motor_tfidf()
+    return total_atualizadas
+
+# Backfill manual: python processamento_lote.py [--forcar] [--processos N]
+if __name__ == "__main__":
+    import sys
+
+    processos = None
+    if '--processos' in sys.argv:
+        processos = int(sys.argv[sys.argv.index('--processos') + 1])
+
+    def imprimir_progresso(processados, total):
+        print(f"  {processados}/{total} ideias processadas", end='\r', flush=True)
+
+    print("Calculando features de texto das ideias...")
+    try:
+        atualizadas = backfill_features_texto(
+            forcar='--forcar' in sys.argv,
+            max_processos=processos,
+            ao_progredir=imprimir_progresso
+        )
+    except KeyboardInterrupt:
+        print("\n⚠️ Backfill interrompido; os chunks concluídos já foram gravados. "
+              "Rode python indice_termos.py para reconstruir o índice de termos.")
+    else:
+        print(f"\n✅ {atualizadas} ideia(s) atualizada(s) para a versão {VERSAO_FEATURES} das features")
@@ -0,0 +1,102 @@
+import re
+from typing import Dict, List, Tuple
+
+from sentimento_lexico import obter_pontuador, tokenizar_sentimento
+
+# Versão do cálculo de features. Incrementar sempre que limpar_texto,
+# as stopwords ou o léxico de sentimento mudarem, para que o backfill
+# (processamento_lote.py) reprocesse as ideias antigas.
+VERSAO_FEATURES = 2
+
+# Campos de texto analisados, na ordem em que aparecem na página de análise
+CAMPOS_TEXTO = ('titulo', 'descricao')
+
+STOPWORDS_PT = {
+    'de', 'da', 'do', 'das', 'dos', 'para', 'com', 'em', 'na', 'no', 'nas', 'nos',
+    'e', 'ou', 'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'que', 'se', 'por',
+    'mais', 'muito', 'ser', 'ter', 'fazer', 'como', 'sobre', 'quando', 'onde',
+    'porque', 'mas', 'também', 'já', 'ainda', 'só', 'bem', 'pode', 'vai', 'tem',
+    'são', 'foi', 'será', 'está', 'estava', 'estão', 'foram', 'sendo', 'sido'
+}
+
+def limpar_texto(texto):
+    """Limpa e processa o texto para análise"""
+    if not texto:
+        return ""
+
+    # Converter para minúsculas
+    texto = texto.lower()
+
+    # Remover caracteres especiais e números
+    texto = re.sub(r'[^a-záàâãéèêíïóôõöúçñ\s]', '', texto)
+
+    # Remover palavras muito curtas
+    palavras = texto.split()
+    palavras = [palavra for palavra in palavras if len(palavra) > 2]
+
+    # Remover stopwords em português
+    palavras_filtradas = [palavra for palavra in palavras if palavra not in STOPWORDS_PT]
+
+    return ' '.join(palavras_filtradas)
+
+def gerar_bigramas(tokens: List[str]) -> List[str]:
+    """Retorna os bigramas de uma lista de tokens, unidos por espaço ("sala aula")"""
+    return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def analisar_sentimento(texto):
+    """Analisa o sentimento do texto com o léxico em português (ver sentimento_lexico)"""
+    return obter_pontuador().classificar_lote([tokenizar_sentimento(texto)])[0]
+
+def calcular_features_lote(itens: List[Tuple[str, str]]) -> List[Dict]:
+    """Calcula as features de vários pares (título, descrição) de uma só vez
+
+    O sentimento de todos os textos do lote é pontuado em uma única chamada
+    vetorizada do pontuador léxico.
+    """
+    textos_por_item = []
+    textos_para_sentimento = []
+
+    for titulo, descricao in itens:
+        textos = []
+        for campo, texto in zip(CAMPOS_TEXTO, (titulo, descricao)):
+            if not texto:
+                continue
+
+            tokens = limpar_texto(texto).split()
+            textos.append({
+                'campo': campo,
+                'tokens': tokens,
+                'total_palavras': len(tokens),
+                'sentimento': None
+            })
+            if texto.strip():
+                textos_para_sentimento.append((textos[-1], tokenizar_sentimento(texto)))
+        textos_por_item.append(textos)
+
+    rotulos = obter_pontuador().classificar_lote([tokens for _, tokens in textos_para_sentimento])
+    for (texto, _), rotulo in zip(textos_para_sentimento, rotulos):
+        texto['sentimento'] = rotulo
+
+    return [
+        {
+            'versao': VERSAO_FEATURES,
+            'textos': textos,
+            'total_palavras': sum(t['total_palavras'] for t in textos)
+        }
+        for textos in textos_por_item
+    ]
+
+def calcular_features_texto(titulo: str, descricao: str) -> Dict:
+    """Calcula tokens, contagem de palavras e sentimento de título e descrição
+
+    O resultado é gravado no documento da ideia (campo ``features_texto``)
+    para que a página de análise apenas agregue valores já calculados.
+    """
+    return calcular_features_lote([(titulo, descricao)])[0]
+
+def obter_features_texto(ideia: Dict) -> Dict:
+    """Retorna as features gravadas na ideia ou as calcula se estiverem ausentes/desatualizadas"""
+    features = ideia.get('features_texto')
+    if features and features.get('versao') == VERSAO_FEATURES:
+        return features
+    return calcular_features_texto(ideia.get('titulo', ''), ideia.get('descricao', ''))
@@ -0,0 +1,270 @@
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne, ReturnDocument, UpdateOne
+
+from mongodb_connection import mongo_manager
+from estatisticas_autores import (
+    CAMPOS_GAMIFICACAO, MAX_ULTIMAS_DATAS, EstatisticasAutor, autor_identificado, calcular_estatisticas
+)
+from regras_gamificacao import pontos_da_ideia
+
+# Um documento por autor, mantido a cada escrita de ideia
+COLECAO_RANKING = "ranking_autores"
+
+# Campos da ideia que mudam a pontuação ou as contagens do autor
+CAMPOS_RANKING = ('autor', 'status', 'prioridade', 'categoria', 'data_criacao')
+
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    ranking = mongo_manager.obter_colecao(COLECAO_RANKING)
+    if ranking is None:
+        return None
+
+    if not _indices_criados:
+        ranking.create_index([("autor", ASCENDING)], unique=True)
+        ranking.create_index([("pontos", DESCENDING), ("autor", ASCENDING)])
+        _indices_criados = True
+
+    return ranking
+
+def _incrementos(ideia: Dict, sinal: int) -> Dict[str, int]:
+    """Campos $inc que somam (1) ou subtraem (-1) a ideia no documento do autor
+
+    `sinal` também pode ser ±n para n ideias iguais nesses campos.
+    """
+    incrementos = {
+        "total_ideias": sinal,
+        "pontos": sinal * pontos_da_ideia(ideia),
+        f"por_status.{ideia.get('status', 'Pendente')}": sinal,
+        f"por_prioridade.{ideia.get('prioridade', 'Média')}": sinal,
+        f"por_categoria.{ideia.get('categoria') or 'Não categorizada'}": sinal,
+    }
+    data_criacao = ideia.get('data_criacao')
+    if isinstance(data_criacao, datetime):
+        incrementos[f"por_mes.{data_criacao.strftime('%Y-%m')}"] = sinal
+    return incrementos
+
+def _aplicar(ranking, ideia: Dict, sinal: int):
+    autor = autor_identificado(ideia)
+    if autor is None:
+        return
+
+    atualizacao = {"$inc": _incrementos(ideia, sinal), "$set": {"atualizado_em": datetime.now()}}
+    data_criacao = ideia.get('data_criacao')
+    if isinstance(data_criacao, datetime):
+        if sinal > 0:
+            atualizacao["$push"] = {"ultimas_datas": {"$each": [data_criacao], "$sort": -1, "$slice": MAX_ULTIMAS_DATAS}}
+        else:
+            atualizacao["$pull"] = {"ultimas_datas": data_criacao}
+
+    documento = ranking.find_one_and_update(
+        {"autor": autor}, atualizacao, upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+    if documento.get("total_ideias", 0) <= 0:
+        ranking.delete_one({"autor": autor, "total_ideias": {"$lte": 0}})
+        return
+
+    # Título e badges derivados das contagens já atualizadas
+    estatisticas = EstatisticasAutor.de_documento(documento)
+    ranking.update_one({"autor": autor}, {"$set": {"titulo": estatisticas.titulo, "badges": estatisticas.badges}})
+
+def atualizar_ranking(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: mantém o ranking a cada cadastro, mudança de status/prioridade ou exclusão"""
+    if evento == 'atualizar' and all(antes.get(c) == depois.get(c) for c in CAMPOS_RANKING):
+        return
+
+    ranking = _obter_colecao()
+    if ranking is None:
+        return
+
+    if antes is not None:
+        _aplicar(ranking, antes, -1)
+    if depois is not None:
+        _aplicar(ranking, depois, 1)
+
+def preparar_ranking_lote(filtros: Dict, novos_dados: Dict) -> Optional[Callable]:
+    """Observador de lote: agrupa no servidor as ideias afetadas por (autor, status, prioridade)
+
+    Mudanças em massa de status/prioridade viram um $inc por autor, sem
+    trazer as ideias ao cliente; mudanças de autor, categoria ou data caem
+    na reconstrução completa.
+    """
+    campos = set(novos_dados) & set(CAMPOS_RANKING)
+    if not campos:
+        return None
+    if campos - {'status', 'prioridade'}:
+        return reconstruir_ranking
+
+    grupos = list(mongo_manager.collection.aggregate([
+        {"$match": {"$and": [filtros, {"autor": {"$nin": [None, "", "Anônimo"]}}]}},
+        {"$group": {
+            "_id": {"autor": "$autor", "status": "$status", "prioridade": "$prioridade"},
+            "total": {"$sum": 1}
+        }}
+    ]))
+
+    def aplicar():
+        incrementos: Dict[str, Counter] = {}
+        for grupo in grupos:
+            antes = grupo['_id']
+            depois = {**antes, **{campo: novos_dados[campo] for campo in campos}}
+            # A ideia sai com os valores antigos e entra com os novos (total e datas não mudam)
+            saldo = Counter(_incrementos(depois, grupo['total']))
+            saldo.subtract(_incrementos(antes, grupo['total']))
+            incrementos.setdefault(antes['autor'], Counter()).update(saldo)
+
+        incrementos = {
+            autor: {campo: valor for campo, valor in saldo.items() if valor}
+            for autor, saldo in incrementos.items()
+        }
+        incrementos = {autor: saldo for autor, saldo in incrementos.items() if saldo}
+        ranking = _obter_colecao()
+        if ranking is None or not incrementos:
+            return
+
+        agora = datetime.now()
+        ranking.bulk_write([
+            UpdateOne({"autor": autor}, {"$inc": saldo, "$set": {"atualizado_em": agora}})
+            for autor, saldo in incrementos.items()
+        ], ordered=False)
+        _atualizar_titulos(ranking, list(incrementos))
+
+    return aplicar
+
+def _atualizar_titulos(ranking, autores: List[str]):
+    """Título e badges recalculados a partir das contagens já atualizadas"""
+    operacoes = []
+    for documento in ranking.find({"autor": {"$in": autores}}, {"_id": 0}):
+        estatisticas = EstatisticasAutor.de_documento(documento)
+        operacoes.append(UpdateOne(
+            {"autor": estatisticas.autor},
+            {"$set": {"titulo": estatisticas.titulo, "badges": estatisticas.badges}}
+        ))
+    if operacoes:
+        ranking.bulk_write(operacoes, ordered=False)
+
+def preparar_exclusao_ranking(filtros: Dict, ids: List[str]) -> Optional[Callable]:
+    """Observador de exclusão: agrupa no servidor as ideias que vão sair e desconta por autor
+
+    Um grupo por (autor, status, prioridade, categoria, mês) basta para
+    montar os $inc negativos; só as datas de criação (para ultimas_datas)
+    vêm por ideia.
+    """
+    ranking = _obter_colecao()
+    if ranking is None:
+        return None
+
+    grupos = list(mongo_manager.collection.aggregate([
+        {"$match": {"$and": [filtros, {"autor": {"$nin": [None, "", "Anônimo"]}}]}},
+        {"$group": {
+            "_id": {
+                "autor": "$autor", "status": "$status", "prioridade": "$prioridade", "categoria": "$categoria",
+                "mes": {"$cond": [{"$eq": [{"$type": "$data_criacao"}, "date"]},
+                                  {"$dateToString": {"format": "%Y-%m", "date": "$data_criacao"}}, None]}
+            },
+            "total": {"$sum": 1},
+            "datas": {"$push": "$data_criacao"}
+        }}
+    ]))
+
+    def descontar():
+        incrementos: Dict[str, Counter] = {}
+        datas: Dict[str, List] = {}
+        for grupo in grupos:
+            ideia = {campo: valor for campo, valor in grupo['_id'].items() if valor is not None}
+            if 'mes' in ideia:
+                ideia['data_criacao'] = datetime.strptime(ideia.pop('mes'), '%Y-%m')
+            incrementos.setdefault(ideia['autor'], Counter()).update(_incrementos(ideia, -grupo['total']))
+            datas.setdefault(ideia['autor'], []).extend(d for d in grupo['datas'] if isinstance(d, datetime))
+        if not incrementos:
+            return
+
+        agora = datetime.now()
+        ranking.bulk_write([
+            UpdateOne({"autor": autor}, {
+                "$inc": dict(saldo),
+                "$pull": {"ultimas_datas": {"$in": datas[autor]}},
+                "$set": {"atualizado_em": agora}
+            })
+            for autor, saldo in incrementos.items()
+        ], ordered=False)
+        ranking.delete_many({"autor": {"$in": list(incrementos)}, "total_ideias": {"$lte": 0}})
+        _atualizar_titulos(ranking, list(incrementos))
+
+    return descontar
+
+def obter_top(limite: int = 50) -> List[EstatisticasAutor]:
+    """Os `limite` autores com mais pontos (ordenação pelo índice de pontos)"""
+    ranking = _obter_colecao()
+    if ranking is None:
+        return []
+    cursor = ranking.find({}, {"_id": 0}).sort([("pontos", DESCENDING), ("autor", ASCENDING)]).limit(limite)
+    return [EstatisticasAutor.de_documento(doc) for doc in cursor]
+
+def obter_autor(autor: str) -> Optional[Dict]:
+    """Documento do autor (estatísticas, título, badges e posição), em consultas pelo índice"""
+    ranking = _obter_colecao()
+    if ranking is None:
+        return None
+
+    documento = ranking.find_one({"autor": autor}, {"_id": 0})
+    if documento is None:
+        return None
+
+    # Posição = autores com mais pontos (ou empatados e antes na ordem alfabética) + 1
+    documento['posicao'] = ranking.count_documents({"$or": [
+        {"pontos": {"$gt": documento.get('pontos', 0)}},
+        {"pontos": documento.get('pontos', 0), "autor": {"$lt": autor}},
+    ]}) + 1
+    return documento
+
+def listar_autores() -> List[str]:
+    """Nomes dos autores do ranking, em ordem alfabética"""
+    ranking = _obter_colecao()
+    if ranking is None:
+        return []
+    return [doc["autor"] for doc in ranking.find({}, {"_id": 0, "autor": 1}).sort("autor", ASCENDING)]
+
+def iterar_estatisticas():
+    """Percorre os documentos do ranking (um por autor) como EstatisticasAutor"""
+    ranking = _obter_colecao()
+    if ranking is None:
+        return
+    for documento in ranking.find({}, {"_id": 0}).batch_size(1000):
+        yield EstatisticasAutor.de_documento(documento)
+
+def reconstruir_ranking() -> int:
+    """Recalcula o ranking inteiro a partir das ideias (uma passada, só os campos necessários)"""
+    ranking = _obter_colecao()
+    if ranking is None:
+        return 0
+
+    resumo = calcular_estatisticas(
+        ideia
+        for lote in mongo_manager.iterar_ideias(projecao=CAMPOS_GAMIFICACAO)
+        for ideia in lote
+    )
+
+    agora = datetime.now()
+    operacoes = [
+        ReplaceOne({"autor": autor}, {**estatisticas.para_documento(), "atualizado_em": agora}, upsert=True)
+        for autor, estatisticas in resumo.autores.items()
+    ]
+    if operacoes:
+        ranking.bulk_write(operacoes, ordered=False)
+    ranking.delete_many({"autor": {"$nin": list(resumo.autores)}})
+    return len(operacoes)
+
+mongo_manager.registrar_observador(atualizar_ranking)
+mongo_manager.registrar_observador_lote(preparar_ranking_lote)
+mongo_manager.registrar_observador_exclusao(preparar_exclusao_ranking)
+
+# Reconstrução manual: python ranking_autores.py
+if __name__ == "__main__":
+    print("Reconstruindo ranking de autores...")
+    print(f"✅ {reconstruir_ranking()} autores no ranking")
@@ -0,0 +1,70 @@
+import os
+import threading
+from typing import Dict
+
+import nltk
+
+# Pacote local com os corpora do NLTK, versionado junto com a aplicação.
+# Os servidores não têm acesso à internet: nada aqui faz download no caminho
+# das requisições. Para (re)gerar o pacote em uma máquina com rede:
+#     python recursos_nltk.py --preparar
+PASTA_NLTK_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+
+# Nome do pacote no downloader -> caminho usado por nltk.data.find
+RECURSOS = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+}
+
+_trava = threading.Lock()
+_status_recursos: Dict[str, bool] = {}
+_caminhos_configurados = False
+
+def configurar_nltk():
+    """Coloca o pacote local como primeiro caminho de busca do NLTK (sem acesso à rede)"""
+    global _caminhos_configurados
+    if _caminhos_configurados:
+        return
+
+    with _trava:
+        if PASTA_NLTK_DATA not in nltk.data.path:
+            nltk.data.path.insert(0, PASTA_NLTK_DATA)
+        _caminhos_configurados = True
+
+def validar_recursos() -> Dict[str, bool]:
+    """Verifica uma única vez, por processo, quais recursos estão disponíveis localmente"""
+    configurar_nltk()
+
+    with _trava:
+        if not _status_recursos:
+            for nome, caminho in RECURSOS.items():
+                try:
+                    nltk.data.find(caminho)
+                    _status_recursos[nome] = True
+                except LookupError:
+                    _status_recursos[nome] = False
+        return dict(_status_recursos)
+
+def preparar_pacote() -> Dict[str, bool]:
+    """Baixa os recursos para PASTA_NLTK_DATA (uso manual, fora do servidor)"""
+    os.makedirs(PASTA_NLTK_DATA, exist_ok=True)
+    resultado = {
+        nome: bool(nltk.download(nome, download_dir=PASTA_NLTK_DATA, quiet=True))
+        for nome in RECURSOS
+    }
+
+    with _trava:
+        _status_recursos.clear()
+    return resultado
+
+# Uso: python recursos_nltk.py [--preparar]
+if __name__ == "__main__":
+    import sys
+
+    if '--preparar' in sys.argv:
+        print(f"Baixando recursos do NLTK para {PASTA_NLTK_DATA}...")
+        for nome, ok in preparar_pacote().items():
+            print(f"{'✅' if ok else '❌'} {nome}")
+
+    for nome, disponivel in validar_recursos().items():
+        print(f"{'✅' if disponivel else '❌'} {nome}: {'disponível' if disponivel else 'ausente'} no pacote local")
@@ -0,0 +1,237 @@
+import copy
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from mongodb_connection import mongo_manager
+
+# Regras ativas (documento único) — editar aqui não exige mudança de código
+COLECAO_REGRAS = "regras_gamificacao"
+ID_REGRAS_ATIVAS = "ativas"
+
+# Depois deste tempo as regras são relidas do banco
+IDADE_MAXIMA_SEGUNDOS = 300
+
+# Métricas por autor disponíveis para badges; contagens por valor usam o
+# prefixo do campo ("status:Aprovada", "prioridade:Alta", "categoria:Gestão")
+METRICAS_BASE = ('total_ideias', 'pontos', 'implementadas', 'ideias_semana', 'ideias_mes')
+PREFIXOS_METRICAS = ('status', 'prioridade', 'categoria')
+
+# Pontos: por ideia enviada e bônus por ideia em cada status/prioridade.
+# Badges: conquistados quando a métrica atinge o mínimo; "especial" separa o
+# card na página e "inicio"/"fim" (YYYY-MM-DD) limitam campanhas no tempo.
+# Títulos: por pontuação mínima.
+REGRAS_PADRAO = {
+    'pontos': {
+        'por_ideia': 10,
+        'status': {'Aprovada': 20, 'Implementada': 50},
+        'prioridade': {'Alta': 15, 'Crítica': 25},
+    },
+    'badges': [
+        {'nome': '🚀 Primeira Ideia', 'descricao': 'Enviou sua primeira ideia', 'metrica': 'total_ideias', 'minimo': 1},
+        {'nome': '💡 Inovador', 'descricao': '5 ideias enviadas', 'metrica': 'total_ideias', 'minimo': 5},
+        {'nome': '🎯 Certeiro', 'descricao': 'Ideia implementada', 'metrica': 'implementadas', 'minimo': 1},
+        {'nome': '🔥 Em Chamas', 'descricao': '3 ideias em uma semana', 'metrica': 'ideias_semana', 'minimo': 3},
+        {'nome': '🌟 Super Inovador', 'descricao': '10+ ideias enviadas', 'metrica': 'total_ideias', 'minimo': 10,
+         'especial': True},
+        {'nome': '🏆 Master', 'descricao': '3+ ideias implementadas', 'metrica': 'implementadas', 'minimo': 3,
+         'especial': True},
+    ],
+    'titulos': [
+        {'nome': '🌱 Novato', 'minimo': 0},
+        {'nome': '💡 Iniciante', 'minimo': 100},
+        {'nome': '🌟 Colaborador', 'minimo': 250},
+        {'nome': '🥉 Idealizador', 'minimo': 500},
+        {'nome': '🥈 Criativo Pro', 'minimo': 750},
+        {'nome': '🥇 Inovador Master', 'minimo': 1000},
+    ],
+}
+
+def _numerico(valor) -> bool:
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+def _validar_itens(itens, secao: str, campos: Sequence[str]):
+    """Cada item de badges/titulos é um objeto com os campos exigidos e 'minimo' numérico"""
+    if not isinstance(itens, list):
+        raise ValueError(f"A seção '{secao}' deve ser uma lista")
+    for item in itens:
+        if not isinstance(item, dict):
+            raise ValueError(f"Item inválido em '{secao}': {item}")
+        for campo in campos:
+            if campo not in item:
+                raise ValueError(f"Item de '{secao}' sem o campo '{campo}': {item}")
+        if not isinstance(item['nome'], str) or not item['nome']:
+            raise ValueError(f"Item de '{secao}' com nome inválido: {item}")
+        if not _numerico(item['minimo']):
+            raise ValueError(f"'minimo' de '{item['nome']}' deve ser numérico")
+
+def validar_regras(regras: Dict) -> Dict:
+    """Confere a estrutura das regras e devolve uma cópia com os títulos em ordem crescente
+
+    Qualquer problema vira ValueError, para a página e obter_regras tratarem
+    regras inválidas sem quebrar.
+    """
+    if not isinstance(regras, dict):
+        raise ValueError("As regras devem ser um objeto JSON")
+    regras = copy.deepcopy(regras)
+    for chave in ('pontos', 'badges', 'titulos'):
+        if chave not in regras:
+            raise ValueError(f"Regras sem a seção '{chave}'")
+
+    pontos = regras['pontos']
+    if not isinstance(pontos, dict):
+        raise ValueError("A seção 'pontos' deve ser um objeto")
+    if not _numerico(pontos.get('por_ideia', 0)):
+        raise ValueError("'pontos.por_ideia' deve ser numérico")
+    for campo in ('status', 'prioridade'):
+        bonus = pontos.get(campo, {})
+        if not isinstance(bonus, dict) or not all(_numerico(v) for v in bonus.values()):
+            raise ValueError(f"Os bônus de 'pontos.{campo}' devem ser numéricos")
+
+    _validar_itens(regras['badges'], 'badges', ('nome', 'metrica', 'minimo'))
+    for badge in regras['badges']:
+        metrica = badge['metrica']
+        if not isinstance(metrica, str) or (
+            metrica not in METRICAS_BASE and metrica.split(':', 1)[0] not in PREFIXOS_METRICAS
+        ):
+            raise ValueError(f"Métrica desconhecida no badge '{badge['nome']}': {metrica}")
+        for campo in ('inicio', 'fim'):
+            if badge.get(campo):
+                try:
+                    datetime.strptime(badge[campo], '%Y-%m-%d')
+                except (TypeError, ValueError):
+                    raise ValueError(f"'{campo}' do badge '{badge['nome']}' deve estar no formato AAAA-MM-DD")
+
+    _validar_itens(regras['titulos'], 'titulos', ('nome', 'minimo'))
+    if not regras['titulos']:
+        raise ValueError("É preciso pelo menos um título")
+    regras['titulos'] = sorted(regras['titulos'], key=lambda t: t['minimo'])
+    return regras
+
+_trava = threading.Lock()
+_regras: Optional[Dict] = None
+_carregadas_em: Optional[float] = None
+
+def obter_regras() -> Dict:
+    """Regras ativas: documento do banco, se existir, senão REGRAS_PADRAO"""
+    global _regras, _carregadas_em
+    with _trava:
+        if _regras is None or time.time() - _carregadas_em > IDADE_MAXIMA_SEGUNDOS:
+            colecao = mongo_manager.obter_colecao(COLECAO_REGRAS)
+            documento = colecao.find_one({"_id": ID_REGRAS_ATIVAS}, {"_id": 0}) if colecao is not None else None
+            try:
+                _regras = validar_regras(documento or REGRAS_PADRAO)
+            except ValueError:
+                _regras = validar_regras(REGRAS_PADRAO)
+            _carregadas_em = time.time()
+        return _regras
+
+def salvar_regras(regras: Dict) -> Dict:
+    """Valida e grava as regras ativas (mudanças de pontos exigem reconstruir o ranking)"""
+    global _regras, _carregadas_em
+    regras = validar_regras(regras)
+    colecao = mongo_manager.obter_colecao(COLECAO_REGRAS)
+    if colecao is not None:
+        colecao.replace_one({"_id": ID_REGRAS_ATIVAS}, {**regras, "atualizado_em": datetime.now()}, upsert=True)
+    with _trava:
+        _regras, _carregadas_em = regras, time.time()
+    return regras
+
+def pontos_da_ideia(ideia: Dict, regras: Optional[Dict] = None) -> int:
+    """Pontos que uma ideia rende ao autor"""
+    pontos = (regras or obter_regras())['pontos']
+    return int(pontos.get('por_ideia', 0)
+               + pontos.get('status', {}).get(ideia.get('status', 'Pendente'), 0)
+               + pontos.get('prioridade', {}).get(ideia.get('prioridade', 'Média'), 0))
+
+def montar_tabela(estatisticas: Sequence) -> pd.DataFrame:
+    """Tabela autores x métricas (uma coluna por métrica, contagens por valor incluídas)
+
+    Aceita qualquer sequência de objetos com os atributos de EstatisticasAutor.
+    """
+    linhas = []
+    for e in estatisticas:
+        linha = {
+            'autor': e.autor,
+            'total_ideias': e.total_ideias,
+            'pontos': e.pontos,
+            'implementadas': e.implementadas,
+            'ideias_semana': e.ideias_semana,
+            'ideias_mes': e.ideias_mes,
+        }
+        for prefixo, contagens in (('status', e.por_status), ('prioridade', e.por_prioridade),
+                                   ('categoria', e.por_categoria)):
+            for valor, quantidade in contagens.items():
+                linha[f"{prefixo}:{valor}"] = quantidade
+        linhas.append(linha)
+
+    tabela = pd.DataFrame(linhas, columns=['autor', *METRICAS_BASE]) if not linhas else pd.DataFrame(linhas)
+    return tabela.set_index('autor').fillna(0)
+
+def _coluna(tabela: pd.DataFrame, metrica: str) -> np.ndarray:
+    if metrica in tabela.columns:
+        return tabela[metrica].to_numpy(dtype=np.float64)
+    return np.zeros(len(tabela))
+
+def badges_vigentes(regras: Dict, hoje: Optional[str] = None) -> List[Dict]:
+    """Badges permanentes e campanhas dentro do período (datas AAAA-MM-DD)"""
+    hoje = hoje or datetime.now().strftime('%Y-%m-%d')
+    return [
+        badge for badge in regras['badges']
+        if (not badge.get('inicio') or badge['inicio'] <= hoje) and (not badge.get('fim') or hoje <= badge['fim'])
+    ]
+
+def avaliar_regras(tabela: pd.DataFrame, regras: Optional[Dict] = None) -> pd.DataFrame:
+    """Avalia pontos, badges e títulos de todos os autores de uma vez
+
+    Pontos são uma combinação linear das contagens (um produto matriz-vetor);
+    badges comparam a matriz autores x métricas com o vetor de mínimos; o
+    título e o próximo nível saem de um searchsorted nos mínimos dos títulos.
+    Retorna, por autor: pontos, titulo, proximo_titulo, proximo_minimo,
+    badges (lista) e total_badges.
+    """
+    regras = regras or obter_regras()
+    if tabela.empty:
+        return pd.DataFrame(columns=['pontos', 'titulo', 'proximo_titulo', 'proximo_minimo', 'badges', 'total_badges'])
+
+    # Pontos: pesos por coluna aplicados à matriz de contagens
+    regras_pontos = regras['pontos']
+    pesos = {'total_ideias': regras_pontos.get('por_ideia', 0)}
+    for prefixo in ('status', 'prioridade'):
+        for valor, bonus in regras_pontos.get(prefixo, {}).items():
+            pesos[f"{prefixo}:{valor}"] = bonus
+    colunas_pontos = list(pesos)
+    matriz_pontos = np.column_stack([_coluna(tabela, c) for c in colunas_pontos])
+    pontos = (matriz_pontos @ np.array([pesos[c] for c in colunas_pontos], dtype=np.float64)).astype(np.int64)
+
+    # Badges vigentes: autores x badges em uma comparação com broadcast
+    badges = badges_vigentes(regras)
+    nomes_badges = np.array([b['nome'] for b in badges], dtype=object)
+    if badges:
+        metricas = np.column_stack([
+            pontos if b['metrica'] == 'pontos' else _coluna(tabela, b['metrica']) for b in badges
+        ])
+        conquistados = metricas >= np.array([b['minimo'] for b in badges], dtype=np.float64)
+    else:
+        conquistados = np.zeros((len(tabela), 0), dtype=bool)
+
+    # Títulos: posição da pontuação entre os mínimos (em ordem crescente)
+    minimos = np.array([t['minimo'] for t in regras['titulos']], dtype=np.float64)
+    nomes_titulos = np.array([t['nome'] for t in regras['titulos']], dtype=object)
+    nivel = np.searchsorted(minimos, pontos, side='right') - 1
+    titulo = nomes_titulos[np.maximum(nivel, 0)]
+    tem_proximo = nivel + 1 < len(minimos)
+    proximo_indice = np.minimum(nivel + 1, len(minimos) - 1)
+
+    return pd.DataFrame({
+        'pontos': pontos,
+        'titulo': titulo,
+        'proximo_titulo': np.where(tem_proximo, nomes_titulos[proximo_indice], None),
+        'proximo_minimo': np.where(tem_proximo, minimos[proximo_indice], np.nan),
+        'badges': [list(nomes_badges[linha]) for linha in conquistados],
+        'total_badges': conquistados.sum(axis=1),
+    }, index=tabela.index)
@@ -0,0 +1,336 @@
+import io
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from docx import Document
+from docx.shared import Inches
+from gridfs import GridFS
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from mongodb_connection import mongo_manager
+from indice_termos import listar_totais, obter_termos_mais_frequentes, obter_totais
+from tendencias_termos import meses_anteriores, obter_tendencias
+from eventos_ideias import ciclo_no_periodo, contar_transicoes
+from snapshots_ranking import obter_snapshot
+
+# Um documento por (tipo, período) e os arquivos gerados no GridFS
+COLECAO_RELATORIOS = "relatorios"
+BUCKET_RELATORIOS = "relatorios_arquivos"
+
+TIPOS_RELATORIO = {"mensal": "Relatório Mensal", "tendencias": "Relatório de Tendências"}
+
+FORMATOS_RELATORIO = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pdf": "application/pdf",
+}
+
+# Relatórios do mês corrente são refeitos depois deste tempo; meses fechados não mudam
+IDADE_MAXIMA_SEGUNDOS = 3600
+
+# Uma geração parada há mais tempo que isto (processo reiniciado) pode ser refeita
+LIMITE_GERACAO_SEGUNDOS = 600
+
+# Meses exibidos na série do relatório de tendências
+MESES_SERIE = 12
+
+_executor = ThreadPoolExecutor(max_workers=1)
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    relatorios = mongo_manager.obter_colecao(COLECAO_RELATORIOS)
+    if relatorios is None:
+        return None
+
+    if not _indices_criados:
+        relatorios.create_index([("tipo", ASCENDING), ("periodo", ASCENDING)], unique=True)
+        _indices_criados = True
+
+    return relatorios
+
+def limites_do_mes(mes: str):
+    inicio = datetime.strptime(mes, '%Y-%m')
+    fim = (inicio + timedelta(days=32)).replace(day=1)
+    return inicio, fim
+
+# Conteúdo dos relatórios: seções com parágrafos, tabela e gráfico opcionais,
+# montadas a partir dos índices e agregados já mantidos pelo sistema
+
+def _agrupar_mes(mes: str) -> Dict[str, Dict[str, int]]:
+    """Ideias criadas no mês por status, categoria e unidade (faixa de data_criacao indexada)"""
+    inicio, fim = limites_do_mes(mes)
+    resultado = mongo_manager.collection.aggregate([
+        {"$match": {"data_criacao": {"$gte": inicio, "$lt": fim}}},
+        {"$facet": {
+            campo: [{"$group": {"_id": {"$ifNull": [f"${campo}", padrao]}, "total": {"$sum": 1}}},
+                    {"$sort": {"total": -1}}]
+            for campo, padrao in (("status", "Pendente"), ("categoria", "Não categorizada"), ("unidade", "Não informada"))
+        }}
+    ])
+    facetas = next(resultado, {})
+    return {campo: {g["_id"]: g["total"] for g in grupos} for campo, grupos in facetas.items()}
+
+def conteudo_mensal(mes: str) -> Dict:
+    inicio, fim = limites_do_mes(mes)
+    totais = obter_totais('mes', mes) or {}
+    grupos = _agrupar_mes(mes)
+    transicoes = contar_transicoes(inicio, fim)
+    snapshot = obter_snapshot(mes)
+    ciclo = ciclo_no_periodo(inicio, fim)
+
+    resumo = [
+        f"Ideias enviadas: {totais.get('total_ideias', sum(grupos.get('status', {}).values()))}",
+        f"Aprovadas no mês: {transicoes.get('Aprovada', 0)}",
+        f"Implementadas no mês: {transicoes.get('Implementada', 0)}",
+        f"Rejeitadas no mês: {transicoes.get('Rejeitada', 0)}",
+    ]
+    for metrica, rotulo in (('ate_decisao', "Tempo médio até a decisão (decididas no mês)"),
+                            ('ate_implementacao', "Tempo médio até a implementação (implementadas no mês)")):
+        if metrica in ciclo:
+            resumo.append(f"{rotulo}: {ciclo[metrica]['media_dias']:.1f} dias ({ciclo[metrica]['quantidade']} ideias)")
+
+    secoes = [
+        {"titulo": "Resumo", "paragrafos": resumo},
+        {
+            "titulo": "Ideias por Categoria",
+            "tabela": {"colunas": ["Categoria", "Ideias"], "linhas": list(grupos.get('categoria', {}).items())},
+            "grafico": {"tipo": "barras", "rotulos": list(grupos.get('categoria', {})),
+                        "valores": list(grupos.get('categoria', {}).values()), "titulo": "Ideias por categoria"},
+        },
+        {
+            "titulo": "Ideias por Unidade",
+            "tabela": {"colunas": ["Unidade", "Ideias"], "linhas": list(grupos.get('unidade', {}).items())},
+        },
+        {
+            "titulo": "Status Atual das Ideias do Mês",
+            "tabela": {"colunas": ["Status", "Ideias"], "linhas": list(grupos.get('status', {}).items())},
+        },
+        {
+            "titulo": "Termos Mais Frequentes",
+            "tabela": {"colunas": ["Termo", "Ocorrências"], "linhas": obter_termos_mais_frequentes('mes', mes, limite=15)},
+        },
+    ]
+
+    if snapshot:
+        destaque = snapshot.get('destaque')
+        vencedor = snapshot.get('vencedor_desafio')
+        mais_pontos = sorted(snapshot['autores'], key=lambda a: -a['pontos_mes'])[:10]
+        secoes.append({
+            "titulo": "Gamificação",
+            "paragrafos": [
+                f"Participantes: {snapshot['participantes']}",
+                f"Destaque do mês: {destaque['autor']} ({destaque['ideias']} ideias)" if destaque else "Destaque do mês: —",
+                f"Desafio ({snapshot['desafio']}): " + (f"{vencedor['autor']} ({vencedor['ideias']} ideias)" if vencedor else "sem participantes"),
+            ],
+            "tabela": {"colunas": ["Colaborador", "Pontos no mês", "Ideias no mês"],
+                       "linhas": [(a['autor'], a['pontos_mes'], a['ideias_mes']) for a in mais_pontos]},
+        })
+
+    return {"titulo": f"{TIPOS_RELATORIO['mensal']} — {inicio:%m/%Y}", "secoes": secoes}
+
+def conteudo_tendencias(mes: str) -> Dict:
+    meses = sorted([mes] + meses_anteriores(mes, MESES_SERIE - 1))
+    por_mes = {total['chave']: total['total_ideias'] for total in listar_totais('mes') if total['chave'] in meses}
+    serie = [por_mes.get(m, 0) for m in meses]
+    emergentes = obter_tendencias(mes, limite=15)
+    categorias = listar_totais('categoria', limite=10)
+
+    variacao = ""
+    if len(serie) > 1 and serie[-2]:
+        variacao = f" ({(serie[-1] - serie[-2]) / serie[-2]:+.0%} em relação ao mês anterior)"
+
+    secoes = [
+        {
+            "titulo": "Volume de Ideias",
+            "paragrafos": [f"Ideias em {mes}: {serie[-1]}{variacao}",
+                           f"Média dos últimos {MESES_SERIE} meses: {sum(serie) / len(serie):.1f}"],
+            "grafico": {"tipo": "linha", "rotulos": meses, "valores": serie, "titulo": "Ideias por mês"},
+        },
+        {
+            "titulo": "Termos Emergentes",
+            "paragrafos": ["Termos com maior crescimento no mês em relação aos meses anteriores."],
+            "tabela": {"colunas": ["Termo", "Ocorrências no mês", "Média anterior", "Crescimento"],
+                       "linhas": [(t['termo'], t['ocorrencias_mes'], f"{t['media_janela']:.1f}", f"{t['crescimento']:.1f}x")
+                                  for t in emergentes]},
+        },
+        {
+            "titulo": "Categorias Mais Populares",
+            "tabela": {"colunas": ["Categoria", "Ideias"], "linhas": [(c['chave'], c['total_ideias']) for c in categorias]},
+            "grafico": {"tipo": "barras", "rotulos": [c['chave'] for c in categorias],
+                        "valores": [c['total_ideias'] for c in categorias], "titulo": "Ideias por categoria (total)"},
+        },
+    ]
+    return {"titulo": f"{TIPOS_RELATORIO['tendencias']} — {datetime.strptime(mes, '%Y-%m'):%m/%Y}", "secoes": secoes}
+
+CONTEUDOS = {"mensal": conteudo_mensal, "tendencias": conteudo_tendencias}
+
+# Renderização
+
+def _figura_grafico(grafico: Dict) -> Figure:
+    # Figure sem pyplot: seguro para gerar em threads
+    figura = Figure(figsize=(7, 3.5))
+    eixo = figura.add_subplot()
+    if grafico['tipo'] == 'linha':
+        eixo.plot(grafico['rotulos'], grafico['valores'], marker='o', color='#1f77b4')
+    else:
+        eixo.bar(grafico['rotulos'], grafico['valores'], color='#ff7f0e')
+    eixo.set_title(grafico['titulo'])
+    eixo.tick_params(axis='x', labelrotation=45, labelsize=8)
+    figura.tight_layout()
+    return figura
+
+def renderizar_docx(conteudo: Dict) -> bytes:
+    doc = Document()
+    doc.add_heading(conteudo['titulo'], 0)
+    doc.add_paragraph(f"Gerado em: {datetime.now():%d/%m/%Y %H:%M}")
+
+    for secao in conteudo['secoes']:
+        doc.add_heading(secao['titulo'], level=1)
+        for paragrafo in secao.get('paragrafos', []):
+            doc.add_paragraph(paragrafo)
+
+        if secao.get('grafico') and secao['grafico']['valores']:
+            imagem = io.BytesIO()
+            _figura_grafico(secao['grafico']).savefig(imagem, format='png', dpi=150)
+            imagem.seek(0)
+            doc.add_picture(imagem, width=Inches(6))
+
+        tabela = secao.get('tabela')
+        if tabela and tabela['linhas']:
+            tabela_doc = doc.add_table(rows=1, cols=len(tabela['colunas']))
+            tabela_doc.style = 'Light Grid Accent 1'
+            for celula, coluna in zip(tabela_doc.rows[0].cells, tabela['colunas']):
+                celula.text = coluna
+            for linha in tabela['linhas']:
+                for celula, valor in zip(tabela_doc.add_row().cells, linha):
+                    celula.text = str(valor)
+
+    doc_bytes = io.BytesIO()
+    doc.save(doc_bytes)
+    return doc_bytes.getvalue()
+
+def _pagina_texto(linhas: List[str]) -> Figure:
+    figura = Figure(figsize=(8.27, 11.69))  # A4
+    y = 0.95
+    for linha in linhas:
+        negrito = linha.startswith('# ')
+        figura.text(0.07, y, linha.lstrip('# '), fontsize=14 if negrito else 9,
+                    weight='bold' if negrito else 'normal', va='top')
+        y -= 0.035 if negrito else 0.022
+    return figura
+
+def renderizar_pdf(conteudo: Dict) -> bytes:
+    # Texto e tabelas em páginas A4 de texto; cada gráfico em uma página própria
+    linhas = [f"# {conteudo['titulo']}", f"Gerado em: {datetime.now():%d/%m/%Y %H:%M}", ""]
+    graficos = []
+    for secao in conteudo['secoes']:
+        linhas += ["", f"# {secao['titulo']}"]
+        for paragrafo in secao.get('paragrafos', []):
+            linhas += textwrap.wrap(paragrafo, 100) or [""]
+        tabela = secao.get('tabela')
+        if tabela and tabela['linhas']:
+            linhas.append(" | ".join(tabela['colunas']))
+            linhas += [textwrap.shorten(" | ".join(str(v) for v in linha), 110) for linha in tabela['linhas']]
+        if secao.get('grafico') and secao['grafico']['valores']:
+            graficos.append(secao['grafico'])
+
+    arquivo = io.BytesIO()
+    with PdfPages(arquivo) as pdf:
+        por_pagina = 38
+        for inicio in range(0, len(linhas), por_pagina):
+            pdf.savefig(_pagina_texto(linhas[inicio:inicio + por_pagina]))
+        for grafico in graficos:
+            pdf.savefig(_figura_grafico(grafico))
+    return arquivo.getvalue()
+
+RENDERIZADORES = {"docx": renderizar_docx, "pdf": renderizar_pdf}
+
+# Cache por período e geração em segundo plano
+
+def periodo_fechado(periodo: str) -> bool:
+    return periodo < datetime.now().strftime('%Y-%m')
+
+def relatorio_definitivo(tipo: str, periodo: str) -> bool:
+    """Mês encerrado e, no relatório mensal, com o ranking já congelado (seção de gamificação)"""
+    return periodo_fechado(periodo) and (tipo != 'mensal' or obter_snapshot(periodo) is not None)
+
+def precisa_gerar(relatorio: Optional[Dict]) -> bool:
+    """Sem relatório, com erro, geração abandonada ou mês corrente desatualizado"""
+    if relatorio is None or relatorio.get('status') == 'erro':
+        return True
+    agora = datetime.now()
+    if relatorio.get('status') == 'gerando':
+        return (agora - relatorio['iniciado_em']).total_seconds() > LIMITE_GERACAO_SEGUNDOS
+    if relatorio.get('definitivo'):
+        return False
+    return (agora - relatorio['gerado_em']).total_seconds() > IDADE_MAXIMA_SEGUNDOS
+
+def gerar_relatorio(tipo: str, periodo: str) -> Dict:
+    """Calcula o relatório, renderiza DOCX e PDF e guarda os arquivos (substitui a versão anterior)"""
+    relatorios = _obter_colecao()
+    try:
+        conteudo = CONTEUDOS[tipo](periodo)
+        arquivos = GridFS(mongo_manager.db, collection=BUCKET_RELATORIOS)
+        ids = {
+            formato: arquivos.put(renderizar(conteudo), filename=f"{tipo}_{periodo}.{formato}")
+            for formato, renderizar in RENDERIZADORES.items()
+        }
+        anterior = relatorios.find_one_and_update(
+            {"tipo": tipo, "periodo": periodo},
+            {"$set": {"status": "pronto", "arquivos": ids, "gerado_em": datetime.now(),
+                      "definitivo": relatorio_definitivo(tipo, periodo)}, "$unset": {"erro": ""}},
+            upsert=True
+        )
+        for arquivo_id in ((anterior or {}).get('arquivos') or {}).values():
+            arquivos.delete(arquivo_id)
+    except Exception as e:
+        relatorios.update_one({"tipo": tipo, "periodo": periodo}, {"$set": {"status": "erro", "erro": str(e)}}, upsert=True)
+        raise
+    return relatorios.find_one({"tipo": tipo, "periodo": periodo})
+
+def solicitar_relatorio(tipo: str, periodo: str, forcar: bool = False) -> Optional[Dict]:
+    """Relatório em cache do período; agenda a geração em segundo plano quando preciso
+
+    Meses fechados são gerados uma vez e servidos direto do cache.
+    """
+    relatorios = _obter_colecao()
+    if relatorios is None:
+        return None
+
+    relatorio = relatorios.find_one({"tipo": tipo, "periodo": periodo})
+    if not forcar and not precisa_gerar(relatorio):
+        return relatorio
+
+    # Só um processo assume a geração de cada relatório
+    filtro = {"tipo": tipo, "periodo": periodo, "status": (relatorio or {}).get('status')}
+    if relatorio is not None:
+        filtro["_id"] = relatorio["_id"]
+    try:
+        marcado = relatorios.find_one_and_update(
+            filtro,
+            {"$set": {"status": "gerando", "iniciado_em": datetime.now()}},
+            upsert=relatorio is None,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        marcado = None  # Outro processo criou o registro ao mesmo tempo
+    if marcado is not None:
+        _executor.submit(gerar_relatorio, tipo, periodo)
+    return marcado or relatorio
+
+def ler_arquivo(relatorio: Dict, formato: str) -> bytes:
+    return GridFS(mongo_manager.db, collection=BUCKET_RELATORIOS).get(relatorio['arquivos'][formato]).read()
+
+# Execução mensal: python relatorios.py [AAAA-MM]
+if __name__ == "__main__":
+    import sys
+
+    periodo = sys.argv[1] if len(sys.argv) > 1 else meses_anteriores(datetime.now().strftime('%Y-%m'), 1)[0]
+    for tipo, nome in TIPOS_RELATORIO.items():
+        gerar_relatorio(tipo, periodo)
+        print(f"✅ {nome} de {periodo} gerado")
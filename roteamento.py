@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+
+from mongodb_connection import mongo_manager
+from modelos_ml import GerenciadorModelo
+
+# Opções de responsável usadas na triagem do controle de ideias
+RESPONSAVEIS = ["TI", "Infraestrutura", "Pedagógico", "RH", "Direção"]
+NAO_ATRIBUIDO = "Não atribuído"
+
+# Nome do modelo na coleção de modelos
+MODELO_RESPONSAVEL = "responsavel"
+
+# Confiança mínima padrão para aceitar sugestões em lote
+CONFIANCA_PADRAO = 0.7
+
+# Categoria e unidade ajudam a separar, por exemplo, Infraestrutura de TI
+gerenciador_responsavel = GerenciadorModelo(
+    MODELO_RESPONSAVEL, "responsavel",
+    campos_contexto=("categoria", "unidade"),
+    rotulos_ignorados=(NAO_ATRIBUIDO,)
+)
+
+# Ideias ainda sem responsável definido
+FILTRO_NAO_ATRIBUIDAS = {"responsavel": {"$in": [None, "", NAO_ATRIBUIDO]}}
+
+def treinar_modelo_responsavel(incremental: bool = True) -> Dict:
+    """(Re)treina o modelo com as atribuições de responsável já feitas na triagem"""
+    return gerenciador_responsavel.treinar(incremental)
+
+def sugerir_responsaveis(tamanho_lote: int = 1000) -> int:
+    """Grava responsavel_sugerido e confianca_responsavel em todas as ideias não atribuídas
+
+    Uma predição vetorizada e um bulk_write por lote: o backlog inteiro é
+    processado em segundos. Retorna quantas ideias receberam sugestão.
+    """
+    classificador, _ = gerenciador_responsavel.obter()
+    if classificador is None:
+        return 0
+
+    projecao = {"descricao": 1, "features_texto": 1, "categoria": 1, "unidade": 1}
+    total = 0
+    for lote in mongo_manager.iterar_ideias(FILTRO_NAO_ATRIBUIDAS, projecao, tamanho_lote):
+        atualizacoes = {
+            ideia['_id']: {"responsavel_sugerido": sugestao, "confianca_responsavel": round(confianca, 4)}
+            for ideia, (sugestao, confianca) in zip(lote, classificador.classificar_lote(lote))
+            if sugestao is not None
+        }
+        mongo_manager.atualizar_ideias_em_lote(atualizacoes)
+        total += len(atualizacoes)
+    return total
+
+def _filtro_aceitaveis(confianca_minima: float, ids: Optional[List[str]] = None) -> Dict:
+    filtro = {
+        **FILTRO_NAO_ATRIBUIDAS,
+        "responsavel_sugerido": {"$in": RESPONSAVEIS},
+        "confianca_responsavel": {"$gte": confianca_minima},
+    }
+    if ids is not None:
+        filtro["_id"] = {"$in": [ObjectId(i) for i in ids]}
+    return filtro
+
+def contar_sugestoes_aceitaveis(confianca_minima: float = CONFIANCA_PADRAO) -> int:
+    """Quantas ideias não atribuídas têm sugestão com confiança suficiente"""
+    if mongo_manager.collection is None and not mongo_manager.connect():
+        return 0
+    return mongo_manager.collection.count_documents(_filtro_aceitaveis(confianca_minima))
+
+def aceitar_sugestoes(confianca_minima: float = CONFIANCA_PADRAO, ids: Optional[List[str]] = None) -> int:
+    """Copia responsavel_sugerido para responsavel com um update_many por responsável
+
+    Vale para todas as ideias não atribuídas com confiança >= confianca_minima
+    (ou só para `ids`, se informado). Cada responsável sugerido vira uma
+    atualização por filtro, que passa pelos observadores em lote (eventos,
+    ranking); são poucas chamadas, uma por pessoa. Retorna quantas ideias
+    foram atribuídas.
+    """
+    if mongo_manager.collection is None and not mongo_manager.connect():
+        return 0
+
+    filtro = _filtro_aceitaveis(confianca_minima, ids)
+    total = 0
+    for responsavel in mongo_manager.collection.distinct("responsavel_sugerido", filtro):
+        total += mongo_manager.atualizar_ideias_por_filtro(
+            {**filtro, "responsavel_sugerido": responsavel}, {"responsavel": responsavel}
+        )
+    return total
+
+def sugerir_responsavel_ideia(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: já grava a sugestão quando uma ideia é cadastrada"""
+    if evento != 'inserir' or depois.get('responsavel') not in (None, "", NAO_ATRIBUIDO):
+        return
+
+    classificador, _ = gerenciador_responsavel.obter()
+    if classificador is None:
+        return
+
+    sugestao, confianca = classificador.classificar_lote([depois])[0]
+    if sugestao is not None:
+        mongo_manager.atualizar_ideias_em_lote({
+            str(depois['_id']): {"responsavel_sugerido": sugestao, "confianca_responsavel": round(confianca, 4)}
+        })
+
+mongo_manager.registrar_observador(sugerir_responsavel_ideia)
+
+# Execução periódica: python roteamento.py [--completo]
+if __name__ == "__main__":
+    import sys
+
+    metadados = treinar_modelo_responsavel(incremental='--completo' not in sys.argv)
+    acuracia = metadados.get('acuracia')
+    print(f"✅ Modelo de responsáveis treinado ({metadados['modo']}): {metadados['exemplos']} exemplos, "
+          f"acurácia {'n/d' if acuracia is None else f'{acuracia:.1%}'}")
+    print(f"🧭 {sugerir_responsaveis()} ideias não atribuídas receberam sugestão")
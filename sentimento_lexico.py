@@ -0,0 +1,237 @@
+import os
+import re
+import warnings
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Limiares de classificação (os mesmos usados historicamente com o TextBlob)
+LIMIAR_POSITIVO = 0.1
+LIMIAR_NEGATIVO = -0.1
+
+# Quantos tokens antes de uma palavra um negador continua valendo ("não é nada bom")
+JANELA_NEGACAO = 3
+
+# Multiplicador aplicado à polaridade de uma palavra negada
+FATOR_NEGACAO = -0.8
+
+NEGADORES_PADRAO = {
+    'não', 'nao', 'nem', 'nunca', 'jamais', 'nenhum', 'nenhuma', 'nada', 'sem', 'tampouco'
+}
+
+INTENSIFICADORES_PADRAO = {
+    'muito': 1.5, 'muita': 1.5, 'muitos': 1.5, 'muitas': 1.5,
+    'bastante': 1.4, 'bem': 1.3, 'super': 1.5, 'mais': 1.3, 'tão': 1.3,
+    'extremamente': 2.0, 'altamente': 1.8, 'totalmente': 1.6, 'completamente': 1.6,
+    'demais': 1.5, 'enorme': 1.4, 'enormemente': 1.8, 'realmente': 1.3,
+    'pouco': 0.5, 'pouca': 0.5, 'menos': 0.6, 'levemente': 0.6, 'meio': 0.7
+}
+
+# Léxico base em português, voltado ao vocabulário das ideias (melhorias,
+# problemas, processos). Pode ser substituído por um léxico completo
+# (ex.: OpLexicon/SentiLex) via PontuadorLexico.carregar_arquivo.
+LEXICO_PADRAO = {
+    # Positivas
+    'bom': 0.6, 'boa': 0.6, 'bons': 0.6, 'boas': 0.6, 'ótimo': 0.9, 'ótima': 0.9,
+    'ótimos': 0.9, 'ótimas': 0.9, 'excelente': 1.0, 'excelentes': 1.0,
+    'melhor': 0.6, 'melhores': 0.6, 'melhorar': 0.5, 'melhoria': 0.5, 'melhorias': 0.5,
+    'melhora': 0.5, 'aprimorar': 0.5, 'aprimoramento': 0.5, 'otimizar': 0.5,
+    'otimização': 0.5, 'eficiente': 0.6, 'eficientes': 0.6, 'eficiência': 0.6,
+    'eficaz': 0.6, 'eficazes': 0.6, 'facilitar': 0.5, 'facilita': 0.5, 'fácil': 0.5,
+    'fáceis': 0.5, 'prático': 0.4, 'prática': 0.4, 'práticos': 0.4, 'ágil': 0.5,
+    'agilidade': 0.5, 'rápido': 0.4, 'rápida': 0.4, 'inovador': 0.6, 'inovadora': 0.6,
+    'inovação': 0.5, 'criativo': 0.5, 'criativa': 0.5, 'benefício': 0.6,
+    'benefícios': 0.6, 'beneficiar': 0.6, 'vantagem': 0.5, 'vantagens': 0.5,
+    'sucesso': 0.8, 'positivo': 0.6, 'positiva': 0.6, 'satisfação': 0.7,
+    'satisfeito': 0.7, 'satisfeitos': 0.7, 'feliz': 0.8, 'felizes': 0.8,
+    'alegria': 0.8, 'engajamento': 0.5, 'engajar': 0.4, 'motivação': 0.5,
+    'motivar': 0.5, 'motivado': 0.5, 'motivados': 0.5, 'incentivar': 0.4,
+    'incentivo': 0.4, 'valorizar': 0.5, 'valorização': 0.5, 'qualidade': 0.4,
+    'seguro': 0.4, 'segura': 0.4, 'segurança': 0.3, 'economia': 0.4,
+    'economizar': 0.5, 'sustentável': 0.5, 'sustentabilidade': 0.4,
+    'acolhimento': 0.5, 'acolhedor': 0.6, 'integração': 0.4, 'colaboração': 0.5,
+    'apoio': 0.4, 'apoiar': 0.4, 'oportunidade': 0.5, 'oportunidades': 0.5,
+    'ganho': 0.5, 'ganhos': 0.5, 'aumentar': 0.2, 'crescimento': 0.4,
+    'moderno': 0.4, 'moderna': 0.4, 'modernizar': 0.4, 'interessante': 0.5,
+    'importante': 0.3, 'útil': 0.5, 'úteis': 0.5, 'agradável': 0.6,
+    'confortável': 0.5, 'conforto': 0.5, 'bem-estar': 0.6,
+    'resolver': 0.4, 'solução': 0.4, 'soluções': 0.4, 'adorar': 0.9, 'gostar': 0.6,
+    'gosto': 0.5, 'ideal': 0.6, 'incrível': 0.9, 'maravilhoso': 1.0,
+    # Negativas
+    'ruim': -0.7, 'ruins': -0.7, 'péssimo': -1.0, 'péssima': -1.0, 'pior': -0.7,
+    'piores': -0.7, 'piorar': -0.6, 'problema': -0.5, 'problemas': -0.5,
+    'problemático': -0.6, 'dificuldade': -0.5, 'dificuldades': -0.5, 'difícil': -0.5,
+    'difíceis': -0.5, 'dificultar': -0.5, 'dificulta': -0.5, 'lento': -0.5,
+    'lenta': -0.5, 'lentidão': -0.6, 'demora': -0.5, 'demorado': -0.5,
+    'atraso': -0.5, 'atrasos': -0.5, 'falha': -0.6, 'falhas': -0.6, 'falta': -0.4,
+    'faltam': -0.4, 'erro': -0.5, 'erros': -0.5, 'desperdício': -0.7,
+    'desperdiçar': -0.6, 'caro': -0.4, 'cara': -0.3, 'custoso': -0.4,
+    'prejuízo': -0.7, 'prejuízos': -0.7, 'prejudicar': -0.6, 'prejudica': -0.6,
+    'insatisfação': -0.7, 'insatisfeito': -0.7, 'insatisfeitos': -0.7,
+    'reclamação': -0.6, 'reclamações': -0.6, 'reclamar': -0.5, 'triste': -0.7,
+    'tristeza': -0.7, 'desmotivação': -0.6, 'desmotivado': -0.6, 'evasão': -0.6,
+    'perda': -0.6, 'perdas': -0.6, 'perder': -0.5, 'risco': -0.4, 'riscos': -0.4,
+    'perigo': -0.6, 'perigoso': -0.7, 'inseguro': -0.6, 'insegurança': -0.6,
+    'quebrado': -0.6, 'quebrada': -0.6, 'danificado': -0.6, 'sujo': -0.6,
+    'sujeira': -0.6, 'barulho': -0.4, 'desconforto': -0.5, 'confuso': -0.5,
+    'confusa': -0.5, 'complicado': -0.5, 'complicada': -0.5, 'burocracia': -0.5,
+    'burocrático': -0.5, 'ineficiente': -0.6, 'ineficiência': -0.6, 'obsoleto': -0.5,
+    'precário': -0.7, 'precária': -0.7, 'insuficiente': -0.5, 'inadequado': -0.5,
+    'inadequada': -0.5, 'estresse': -0.6, 'cansaço': -0.5, 'conflito': -0.5,
+    'conflitos': -0.5, 'odiar': -0.9, 'horrível': -1.0, 'terrível': -1.0,
+}
+
+_PADRAO_TOKEN = re.compile(r'[a-záàâãéèêíïóôõöúçñ]+(?:-[a-záàâãéèêíïóôõöúçñ]+)*')
+
+def tokenizar_sentimento(texto: str) -> List[str]:
+    """Tokeniza preservando negadores e intensificadores (sem remover stopwords)"""
+    if not texto:
+        return []
+    return _PADRAO_TOKEN.findall(texto.lower())
+
+def classificar_polaridade(polaridade: float) -> str:
+    """Converte uma polaridade em [-1, 1] no rótulo usado pela aplicação"""
+    if polaridade > LIMIAR_POSITIVO:
+        return 'positivo'
+    elif polaridade < LIMIAR_NEGATIVO:
+        return 'negativo'
+    return 'neutro'
+
+class PontuadorLexico:
+    """Pontuador de sentimento baseado em léxico, vetorizado por lote
+
+    O vocabulário (léxico + negadores + intensificadores) é mantido como um
+    array ordenado; cada token do lote é convertido em índice com
+    ``np.searchsorted`` e todo o cálculo (negação, intensificação, soma por
+    texto) é feito com operações de array sobre o lote inteiro.
+    """
+
+    def __init__(self,
+                 lexico: Optional[Dict[str, float]] = None,
+                 negadores: Optional[Iterable[str]] = None,
+                 intensificadores: Optional[Dict[str, float]] = None):
+        self.lexico = dict(LEXICO_PADRAO if lexico is None else lexico)
+        self.negadores = set(NEGADORES_PADRAO if negadores is None else negadores)
+        self.intensificadores = dict(INTENSIFICADORES_PADRAO if intensificadores is None else intensificadores)
+
+        vocabulario = sorted(set(self.lexico) | self.negadores | set(self.intensificadores))
+        self._vocabulario = np.array(vocabulario, dtype=str)
+
+        # Índice 0 é reservado para palavras fora do vocabulário
+        tamanho = len(vocabulario) + 1
+        self._polaridade = np.zeros(tamanho, dtype=np.float64)
+        self._negador = np.zeros(tamanho, dtype=bool)
+        self._intensidade = np.ones(tamanho, dtype=np.float64)
+
+        for i, palavra in enumerate(vocabulario, start=1):
+            self._polaridade[i] = self.lexico.get(palavra, 0.0)
+            self._negador[i] = palavra in self.negadores
+            self._intensidade[i] = self.intensificadores.get(palavra, 1.0)
+
+    @classmethod
+    def carregar_arquivo(cls, caminho: str, **kwargs) -> 'PontuadorLexico':
+        """Carrega um léxico externo
+
+        Aceita o formato do OpLexicon v3 (``termo,classe,polaridade,anotação``)
+        ou linhas ``palavra<TAB>polaridade``. Linhas vazias e iniciadas por ``#``
+        são ignoradas; linhas fora do formato são contadas e avisadas.
+        """
+        lexico = {}
+        rejeitadas = 0
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                linha = linha.strip()
+                if not linha or linha.startswith('#'):
+                    continue
+
+                # A polaridade é a 2ª coluna no formato com TAB e a 3ª no OpLexicon
+                if '\t' in linha:
+                    partes, coluna_polaridade = linha.split('\t'), 1
+                else:
+                    partes, coluna_polaridade = linha.split(','), 2
+                try:
+                    lexico[partes[0].strip().lower()] = float(partes[coluna_polaridade])
+                except (ValueError, IndexError):
+                    rejeitadas += 1
+
+        if rejeitadas:
+            warnings.warn(f"Léxico {caminho}: {rejeitadas} linhas fora do formato foram ignoradas")
+        if not lexico:
+            warnings.warn(f"Léxico {caminho}: nenhuma entrada carregada; verifique o formato do arquivo")
+        return cls(lexico=lexico, **kwargs)
+
+    def _indices(self, tokens: np.ndarray) -> np.ndarray:
+        """Mapeia tokens para índices do vocabulário (0 = desconhecido)"""
+        if len(self._vocabulario) == 0 or len(tokens) == 0:
+            return np.zeros(len(tokens), dtype=np.int64)
+
+        posicoes = np.searchsorted(self._vocabulario, tokens)
+        posicoes = np.minimum(posicoes, len(self._vocabulario) - 1)
+        encontrados = self._vocabulario[posicoes] == tokens
+        return np.where(encontrados, posicoes + 1, 0)
+
+    def pontuar_lote(self, textos_tokenizados: List[List[str]]) -> np.ndarray:
+        """Retorna a polaridade em [-1, 1] de cada texto tokenizado do lote"""
+        n_textos = len(textos_tokenizados)
+        if n_textos == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        tamanhos = np.fromiter((len(t) for t in textos_tokenizados), dtype=np.int64, count=n_textos)
+        total_tokens = int(tamanhos.sum())
+        if total_tokens == 0:
+            return np.zeros(n_textos, dtype=np.float64)
+
+        tokens = np.array([token for texto in textos_tokenizados for token in texto], dtype=str)
+        documento = np.repeat(np.arange(n_textos), tamanhos)
+        indices = self._indices(tokens)
+
+        base = self._polaridade[indices]
+
+        # Intensificador vale para a palavra imediatamente seguinte no mesmo texto
+        multiplicador = np.ones(total_tokens, dtype=np.float64)
+        mesmo_texto = documento[1:] == documento[:-1]
+        multiplicador[1:] = np.where(mesmo_texto, self._intensidade[indices[:-1]], 1.0)
+
+        # Negador vale para as próximas JANELA_NEGACAO palavras no mesmo texto
+        negador = self._negador[indices]
+        negado = np.zeros(total_tokens, dtype=bool)
+        for deslocamento in range(1, JANELA_NEGACAO + 1):
+            if deslocamento >= total_tokens:
+                break
+            mesmo_texto = documento[deslocamento:] == documento[:-deslocamento]
+            negado[deslocamento:] |= negador[:-deslocamento] & mesmo_texto
+
+        valores = base * multiplicador * np.where(negado, FATOR_NEGACAO, 1.0)
+
+        soma = np.bincount(documento, weights=valores, minlength=n_textos)
+        opinativas = np.bincount(documento, weights=(base != 0).astype(np.float64), minlength=n_textos)
+
+        polaridades = np.divide(soma, opinativas, out=np.zeros(n_textos, dtype=np.float64), where=opinativas > 0)
+        return np.clip(polaridades, -1.0, 1.0)
+
+    def classificar_lote(self, textos_tokenizados: List[List[str]]) -> List[str]:
+        """Classifica cada texto do lote em positivo/neutro/negativo"""
+        polaridades = self.pontuar_lote(textos_tokenizados)
+        rotulos = np.full(len(polaridades), 'neutro', dtype=object)
+        rotulos[polaridades > LIMIAR_POSITIVO] = 'positivo'
+        rotulos[polaridades < LIMIAR_NEGATIVO] = 'negativo'
+        return rotulos.tolist()
+
+_pontuador_padrao: Optional[PontuadorLexico] = None
+
+def obter_pontuador() -> PontuadorLexico:
+    """Retorna o pontuador em uso
+
+    Usa o léxico indicado na variável de ambiente LEXICO_SENTIMENTO, se houver,
+    para que os processos do backfill paralelo carreguem o mesmo léxico.
+    """
+    global _pontuador_padrao
+    if _pontuador_padrao is None:
+        caminho = os.environ.get('LEXICO_SENTIMENTO')
+        _pontuador_padrao = PontuadorLexico.carregar_arquivo(caminho) if caminho else PontuadorLexico()
+    return _pontuador_padrao
+
+def configurar_pontuador(pontuador: PontuadorLexico):
+    """Substitui o léxico usado pela aplicação (lembre de incrementar VERSAO_FEATURES)"""
+    global _pontuador_padrao
+    _pontuador_padrao = pontuador
@@ -0,0 +1,306 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import Binary, ObjectId
+from pymongo import ASCENDING, UpdateOne
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+from mongodb_connection import mongo_manager
+from modelos_ml import NUM_FEATURES, carregar_modelo, salvar_modelo, texto_da_descricao
+from processamento_texto import limpar_texto
+
+# Vetor de cada ideia (float32 normalizado, em bytes), atualizado a cada escrita
+COLECAO_VETORES = "vetores_ideias"
+
+# Nome do modelo de embedding na coleção de modelos
+MODELO_EMBEDDING = "embedding_ideias"
+
+# Dimensão dos vetores: 100k ideias x 128 x 4 bytes = ~50 MB em memória
+DIMENSOES = 128
+
+# Máximo de ideias usadas para ajustar o TF-IDF/SVD (amostra do banco)
+MAX_IDEIAS_TREINO = 50000
+
+# Depois deste tempo o índice em memória é relido do banco
+IDADE_MAXIMA_SEGUNDOS = 3600
+
+class EmbeddingTexto:
+    """TF-IDF (hashing de palavras e bigramas) reduzido por SVD e normalizado
+
+    Guarda só o idf e os componentes do SVD em float32, então transformar um
+    texto novo é um produto esparso x denso — sem precisar reajustar nada
+    quando uma ideia é cadastrada.
+    """
+
+    def __init__(self):
+        self.vetorizador = HashingVectorizer(
+            n_features=NUM_FEATURES, ngram_range=(1, 2), alternate_sign=False, norm=None
+        )
+        self.tfidf = TfidfTransformer(sublinear_tf=True)
+        self.componentes: Optional[np.ndarray] = None
+
+    def ajustar(self, textos: List[str]) -> 'EmbeddingTexto':
+        contagens = self.vetorizador.transform(textos)
+        pesos = self.tfidf.fit_transform(contagens)
+        dimensoes = max(1, min(DIMENSOES, pesos.shape[0] - 1, pesos.shape[1] - 1))
+        svd = TruncatedSVD(n_components=dimensoes, random_state=42).fit(pesos)
+        self.componentes = svd.components_.T.astype(np.float32)
+        return self
+
+    def transformar(self, textos: List[str]) -> np.ndarray:
+        """Matriz textos x DIMENSOES, com linhas de norma 1 (zeros para texto vazio)"""
+        pesos = self.tfidf.transform(self.vetorizador.transform(textos))
+        vetores = np.asarray(pesos @ self.componentes, dtype=np.float32)
+        normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+        return np.divide(vetores, normas, out=np.zeros_like(vetores), where=normas > 0)
+
+class IndiceVetorial:
+    """Matriz ideias x dimensões em memória, com busca exata por produto interno
+
+    Os vetores são normalizados, então o produto interno é o cosseno. Uma
+    busca é um único produto matriz-vetor mais argpartition: ~1-3 ms para
+    100 mil ideias, sem laços em Python. Remoções trocam a linha removida
+    pela última para manter a matriz compacta.
+    """
+
+    def __init__(self, dimensoes: int):
+        self._trava = threading.Lock()
+        self.ids: List[str] = []
+        self.posicoes: Dict[str, int] = {}
+        self._matriz = np.zeros((1024, dimensoes), dtype=np.float32)
+        self.carregado_em: Optional[float] = None
+
+    @property
+    def matriz(self) -> np.ndarray:
+        return self._matriz[:len(self.ids)]
+
+    def adicionar(self, ideia_id: str, vetor: np.ndarray):
+        with self._trava:
+            posicao = self.posicoes.get(ideia_id)
+            if posicao is None:
+                posicao = len(self.ids)
+                if posicao >= len(self._matriz):
+                    self._matriz = np.vstack([self._matriz, np.zeros_like(self._matriz)])
+                self.ids.append(ideia_id)
+                self.posicoes[ideia_id] = posicao
+            self._matriz[posicao] = vetor
+
+    def remover(self, ideia_id: str):
+        with self._trava:
+            posicao = self.posicoes.pop(ideia_id, None)
+            if posicao is None:
+                return
+            ultimo = len(self.ids) - 1
+            if posicao != ultimo:
+                self._matriz[posicao] = self._matriz[ultimo]
+                self.ids[posicao] = self.ids[ultimo]
+                self.posicoes[self.ids[posicao]] = posicao
+            self.ids.pop()
+
+    def vetor(self, ideia_id: str) -> Optional[np.ndarray]:
+        with self._trava:
+            posicao = self.posicoes.get(ideia_id)
+            return None if posicao is None else self._matriz[posicao].copy()
+
+    def buscar(self, vetor: np.ndarray, k: int = 5, excluir: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Os k vetores mais próximos (id, similaridade de cosseno)"""
+        with self._trava:
+            total = len(self.ids)
+            if total == 0 or not vetor.any():
+                return []
+
+            similaridades = self.matriz @ vetor
+            if excluir in self.posicoes:
+                similaridades[self.posicoes[excluir]] = -np.inf
+
+            k = min(k, total)
+            melhores = np.argpartition(-similaridades, k - 1)[:k]
+            melhores = melhores[np.argsort(-similaridades[melhores])]
+            return [
+                (self.ids[i], float(similaridades[i]))
+                for i in melhores if np.isfinite(similaridades[i]) and similaridades[i] > 0
+            ]
+
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    vetores = mongo_manager.obter_colecao(COLECAO_VETORES)
+    if vetores is None:
+        return None
+
+    if not _indices_criados:
+        vetores.create_index([("ideia_id", ASCENDING)], unique=True)
+        _indices_criados = True
+
+    return vetores
+
+def _para_binario(vetor: np.ndarray) -> Binary:
+    return Binary(vetor.astype(np.float32).tobytes())
+
+_trava_servico = threading.RLock()
+_embedding: Optional[EmbeddingTexto] = None
+_versao_embedding: Optional[int] = None
+_embedding_carregado_em: Optional[float] = None
+_indice: Optional[IndiceVetorial] = None
+
+def obter_embedding() -> Optional[EmbeddingTexto]:
+    """Só o modelo de embedding, sem ler os vetores gravados (usado no caminho de escrita)"""
+    global _embedding, _versao_embedding, _embedding_carregado_em, _indice
+    with _trava_servico:
+        if _embedding is not None and time.time() - _embedding_carregado_em <= IDADE_MAXIMA_SEGUNDOS:
+            return _embedding
+
+        embedding, metadados = carregar_modelo(MODELO_EMBEDDING)
+        if embedding is None:
+            return None
+        if metadados.get('versao') != _versao_embedding:
+            # Índice montado com outro modelo: a próxima busca relê os vetores
+            _embedding, _versao_embedding, _indice = embedding, metadados.get('versao'), None
+        _embedding_carregado_em = time.time()
+        return _embedding
+
+def obter_servico() -> Tuple[Optional[EmbeddingTexto], Optional[IndiceVetorial]]:
+    """Embedding e índice do processo, carregados do banco na primeira busca ou quando expirados"""
+    global _indice
+    with _trava_servico:
+        if _indice is not None and time.time() - _indice.carregado_em <= IDADE_MAXIMA_SEGUNDOS:
+            return _embedding, _indice
+
+        embedding = obter_embedding()
+        vetores = _obter_colecao()
+        if embedding is None or vetores is None:
+            return None, None
+
+        indice = IndiceVetorial(embedding.componentes.shape[1])
+        documentos = list(vetores.find({}, {"_id": 0, "ideia_id": 1, "vetor": 1}).batch_size(10000))
+        if documentos:
+            matriz = np.frombuffer(b"".join(doc["vetor"] for doc in documentos), dtype=np.float32)
+            indice._matriz = matriz.reshape(len(documentos), -1).copy()
+            indice.ids = [doc["ideia_id"] for doc in documentos]
+            indice.posicoes = {ideia_id: i for i, ideia_id in enumerate(indice.ids)}
+        indice.carregado_em = time.time()
+
+        _indice = indice
+        return embedding, indice
+
+def indexar_ideias(ideias: List[Dict], embedding: EmbeddingTexto):
+    """Calcula e grava os vetores de um lote de ideias (e atualiza o índice já carregado)"""
+    vetores = _obter_colecao()
+    if vetores is None or not ideias:
+        return
+
+    matriz = embedding.transformar([texto_da_descricao(ideia) for ideia in ideias])
+    vetores.bulk_write([
+        UpdateOne({"ideia_id": str(ideia['_id'])}, {"$set": {"vetor": _para_binario(vetor)}}, upsert=True)
+        for ideia, vetor in zip(ideias, matriz)
+    ], ordered=False)
+
+    if _indice is not None and _embedding is embedding:
+        for ideia, vetor in zip(ideias, matriz):
+            _indice.adicionar(str(ideia['_id']), vetor)
+
+def atualizar_indice_vetorial(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: grava o vetor das ideias novas ou editadas
+
+    Só calcula o vetor da ideia escrita; a matriz com todos os vetores é
+    carregada pelas buscas (obter_servico), nunca no cadastro.
+    """
+    if evento == 'deletar':
+        vetores = _obter_colecao()
+        if vetores is not None:
+            vetores.delete_one({"ideia_id": str(antes['_id'])})
+        if _indice is not None:
+            _indice.remover(str(antes['_id']))
+        return
+
+    if evento == 'atualizar' and antes.get('descricao') == depois.get('descricao'):
+        return
+
+    embedding = obter_embedding()
+    if embedding is not None:
+        indexar_ideias([depois], embedding)
+
+def preparar_exclusao_vetores(filtros: Dict, ids: List[str]) -> Optional[Callable]:
+    """Observador de exclusão: remove os vetores das ideias excluídas (banco e índice em memória)"""
+    vetores = _obter_colecao()
+    if vetores is None:
+        return None
+
+    def remover():
+        vetores.delete_many({"ideia_id": {"$in": ids}})
+        if _indice is not None:
+            for ideia_id in ids:
+                _indice.remover(ideia_id)
+    return remover
+
+def _detalhar(resultados: List[Tuple[str, float]]) -> List[Dict]:
+    if not resultados:
+        return []
+    detalhes = {
+        str(doc["_id"]): doc
+        for doc in mongo_manager.collection.find(
+            {"_id": {"$in": [ObjectId(ideia_id) for ideia_id, _ in resultados]}},
+            {"titulo": 1, "autor": 1, "categoria": 1, "unidade": 1, "status": 1, "descricao": 1}
+        )
+    }
+    return [
+        {**{k: v for k, v in detalhes[ideia_id].items() if k != '_id'}, '_id': ideia_id, 'similaridade': similaridade}
+        for ideia_id, similaridade in resultados if ideia_id in detalhes
+    ]
+
+def ideias_relacionadas(ideia_id: str, k: int = 5) -> List[Dict]:
+    """As k ideias mais parecidas com uma ideia cadastrada (com título, autor, etc.)"""
+    _, indice = obter_servico()
+    if indice is None:
+        return []
+    vetor = indice.vetor(ideia_id)
+    if vetor is None:
+        return []
+    return _detalhar(indice.buscar(vetor, k, excluir=ideia_id))
+
+def buscar_por_texto(texto: str, k: int = 5) -> List[Dict]:
+    """As k ideias mais parecidas com um texto livre"""
+    embedding, indice = obter_servico()
+    if indice is None or not limpar_texto(texto):
+        return []
+    vetor = embedding.transformar([limpar_texto(texto)])[0]
+    return _detalhar(indice.buscar(vetor, k))
+
+def reconstruir_indice_vetorial(tamanho_lote: int = 1000) -> int:
+    """Reajusta o embedding com o banco atual e recalcula todos os vetores"""
+    global _embedding, _versao_embedding, _indice
+    projecao = {"descricao": 1, "features_texto": 1}
+    textos = []
+    for lote in mongo_manager.iterar_ideias(projecao=projecao, tamanho_lote=tamanho_lote):
+        textos.extend(texto for texto in map(texto_da_descricao, lote) if texto)
+        if len(textos) >= MAX_IDEIAS_TREINO:
+            break
+    if len(textos) < 2:
+        return 0
+
+    embedding = EmbeddingTexto().ajustar(textos[:MAX_IDEIAS_TREINO])
+    salvar_modelo(MODELO_EMBEDDING, embedding, {'ideias_treino': min(len(textos), MAX_IDEIAS_TREINO),
+                                                 'dimensoes': int(embedding.componentes.shape[1])})
+
+    vetores = _obter_colecao()
+    vetores.delete_many({})
+    with _trava_servico:
+        _embedding, _versao_embedding, _indice = None, None, None
+
+    total = 0
+    for lote in mongo_manager.iterar_ideias(projecao=projecao, tamanho_lote=tamanho_lote):
+        indexar_ideias(lote, embedding)
+        total += len(lote)
+    return total
+
+mongo_manager.registrar_observador(atualizar_indice_vetorial)
+mongo_manager.registrar_observador_exclusao(preparar_exclusao_vetores)
+
+# Reconstrução manual (carga inicial ou reajuste periódico): python similaridade.py
+if __name__ == "__main__":
+    print("Ajustando embedding e recalculando vetores...")
+    print(f"✅ {reconstruir_indice_vetorial()} ideias indexadas")
@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from mongodb_connection import mongo_manager
+from indice_termos import listar_totais
+from ranking_autores import iterar_estatisticas
+from tendencias_termos import meses_anteriores
+
+# Um documento por mês: o desafio do mês e, depois de fechado, o ranking congelado
+COLECAO_SNAPSHOTS = "snapshots_ranking"
+
+# Categoria do desafio quando ainda não há ideias categorizadas
+DESAFIO_PADRAO = "Sustentabilidade"
+
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    snapshots = mongo_manager.obter_colecao(COLECAO_SNAPSHOTS)
+    if snapshots is None:
+        return None
+
+    if not _indices_criados:
+        snapshots.create_index([("mes", ASCENDING)], unique=True)
+        snapshots.create_index([("fechado", ASCENDING), ("mes", DESCENDING)])
+        _indices_criados = True
+
+    return snapshots
+
+def mes_atual() -> str:
+    return datetime.now().strftime('%Y-%m')
+
+def desafio_do_mes(mes: Optional[str] = None) -> str:
+    """Categoria do desafio do mês, fixada na primeira consulta (a mais popular naquele momento)"""
+    mes = mes or mes_atual()
+    snapshots = _obter_colecao()
+    mais_popular = listar_totais('categoria', limite=1)
+    categoria = mais_popular[0]['chave'] if mais_popular else DESAFIO_PADRAO
+    if snapshots is None:
+        return categoria
+
+    documento = snapshots.find_one_and_update(
+        {"mes": mes},
+        {"$setOnInsert": {"mes": mes, "desafio": categoria, "fechado": False}},
+        upsert=True,
+        projection={"_id": 0, "desafio": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return documento.get("desafio", categoria)
+
+def fechar_mes(mes: Optional[str] = None, refazer: bool = False) -> Optional[Dict]:
+    """Congela o ranking ao fim de `mes` (padrão: o mês anterior) em um único documento
+
+    Lê só a coleção ranking_autores (um documento por autor) e o snapshot do
+    mês anterior: pontos e contagens por categoria são acumulados, então o que
+    cada autor fez no mês é a diferença entre os dois snapshots, e as ideias
+    criadas no mês vêm de por_mes. Rode logo após a virada do mês; fechado
+    depois, o acumulado inclui a atividade posterior. O primeiro snapshot não
+    tem base e atribui todo o histórico ao mês. Retorna o documento gravado,
+    ou None se o mês já estava fechado (use refazer=True para recalcular).
+    """
+    mes = mes or meses_anteriores(mes_atual(), 1)[0]
+    snapshots = _obter_colecao()
+    if snapshots is None:
+        return None
+    if not refazer and snapshots.count_documents({"mes": mes, "fechado": True}, limit=1):
+        return None
+
+    desafio = desafio_do_mes(mes)
+    anterior = snapshots.find_one({"fechado": True, "mes": {"$lt": mes}}, {"_id": 0}, sort=[("mes", DESCENDING)])
+    base = {a['autor']: a for a in anterior['autores']} if anterior else {}
+
+    autores = []
+    for estatisticas in iterar_estatisticas():
+        antes = base.get(estatisticas.autor, {})
+        por_categoria = dict(estatisticas.por_categoria)
+        autores.append({
+            'autor': estatisticas.autor,
+            'pontos': estatisticas.pontos,
+            'total_ideias': estatisticas.total_ideias,
+            'por_categoria': por_categoria,
+            'ideias_mes': estatisticas.por_mes[mes],
+            'pontos_mes': estatisticas.pontos - antes.get('pontos', 0),
+            'ideias_desafio': por_categoria.get(desafio, 0) - antes.get('por_categoria', {}).get(desafio, 0),
+            'posicao_anterior': antes.get('posicao'),
+        })
+
+    autores.sort(key=lambda a: (-a['pontos'], a['autor']))
+    for posicao, autor in enumerate(autores, start=1):
+        autor['posicao'] = posicao
+
+    ativos = [a for a in autores if a['ideias_mes'] > 0]
+    no_desafio = [a for a in autores if a['ideias_desafio'] > 0]
+    destaque = max(ativos, key=lambda a: a['ideias_mes'], default=None)
+    vencedor = max(no_desafio, key=lambda a: a['ideias_desafio'], default=None)
+
+    documento = {
+        "mes": mes,
+        "desafio": desafio,
+        "fechado": True,
+        "fechado_em": datetime.now(),
+        "autores": autores,
+        "participantes": len(ativos),
+        "participantes_desafio": len(no_desafio),
+        "ideias_desafio": sum(a['ideias_desafio'] for a in no_desafio),
+        "destaque": destaque and {"autor": destaque['autor'], "ideias": destaque['ideias_mes']},
+        "vencedor_desafio": vencedor and {"autor": vencedor['autor'], "ideias": vencedor['ideias_desafio']},
+    }
+    snapshots.replace_one({"mes": mes}, documento, upsert=True)
+    return documento
+
+def listar_meses_fechados() -> List[str]:
+    """Meses com ranking congelado, do mais recente para o mais antigo"""
+    snapshots = _obter_colecao()
+    if snapshots is None:
+        return []
+    cursor = snapshots.find({"fechado": True}, {"_id": 0, "mes": 1}).sort("mes", DESCENDING)
+    return [doc["mes"] for doc in cursor]
+
+def obter_snapshot(mes: str) -> Optional[Dict]:
+    """Ranking congelado do mês (uma leitura pelo índice), ou None se o mês não foi fechado"""
+    snapshots = _obter_colecao()
+    if snapshots is None:
+        return None
+    return snapshots.find_one({"mes": mes, "fechado": True}, {"_id": 0})
+
+# Execução mensal: python snapshots_ranking.py [AAAA-MM] [--refazer]
+if __name__ == "__main__":
+    import sys
+
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    resultado = fechar_mes(argumentos[0] if argumentos else None, refazer='--refazer' in sys.argv)
+    if resultado is None:
+        print("ℹ️ Mês já fechado (use --refazer para recalcular)")
+    else:
+        print(f"✅ Ranking de {resultado['mes']} congelado: {len(resultado['autores'])} autores, "
+              f"{resultado['participantes']} participantes no mês")
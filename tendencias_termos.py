@@ -0,0 +1,151 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from pymongo import ASCENDING
+
+from mongodb_connection import mongo_manager
+from indice_termos import COLECAO_TERMOS, COLECAO_TOTAIS, UNIGRAMA, BIGRAMA
+
+# Resultados calculados por mês/janela, reaproveitados enquanto o mês não mudar
+COLECAO_TENDENCIAS = "tendencias_termos"
+
+# Meses anteriores usados como base de comparação
+JANELA_PADRAO = 3
+
+# Quantos termos mais frequentes do mês entram como candidatos
+MAX_CANDIDATOS = 500
+
+# Ocorrências mínimas no mês para um termo ser considerado emergente
+MIN_OCORRENCIAS = 3
+
+_indices_criados = False
+
+def _obter_colecoes():
+    global _indices_criados
+    termos = mongo_manager.obter_colecao(COLECAO_TERMOS)
+    totais = mongo_manager.obter_colecao(COLECAO_TOTAIS)
+    tendencias = mongo_manager.obter_colecao(COLECAO_TENDENCIAS)
+    if termos is None or totais is None or tendencias is None:
+        return None, None, None
+
+    if not _indices_criados:
+        tendencias.create_index([("mes", ASCENDING), ("janela", ASCENDING)], unique=True)
+        _indices_criados = True
+
+    return termos, totais, tendencias
+
+def meses_anteriores(mes: str, quantidade: int) -> List[str]:
+    """Retorna os `quantidade` meses (YYYY-MM) imediatamente anteriores a `mes`"""
+    ano, numero = map(int, mes.split('-'))
+    meses = []
+    for _ in range(quantidade):
+        numero -= 1
+        if numero == 0:
+            ano, numero = ano - 1, 12
+        meses.append(f"{ano:04d}-{numero:02d}")
+    return meses
+
+def listar_meses() -> List[str]:
+    """Meses com ideias indexadas, do mais recente para o mais antigo"""
+    _, totais, _ = _obter_colecoes()
+    if totais is None:
+        return []
+    return sorted(
+        (doc["chave"] for doc in totais.find({"escopo": "mes", "total_ideias": {"$gt": 0}}, {"chave": 1})),
+        reverse=True
+    )
+
+def log_verossimilhanca(a: np.ndarray, b: np.ndarray, n1: float, n0: float) -> np.ndarray:
+    """G² de Dunning para a frequência a/n1 (mês) contra b/n0 (janela), vetorizado"""
+    total = n1 + n0
+    esperado_a = n1 * (a + b) / total
+    esperado_b = n0 * (a + b) / total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        termo_a = np.where(a > 0, a * np.log(a / esperado_a), 0.0)
+        termo_b = np.where(b > 0, b * np.log(b / esperado_b), 0.0)
+    return 2.0 * (termo_a + termo_b)
+
+def calcular_tendencias(mes: str, janela: int = JANELA_PADRAO, limite: int = 20) -> List[Dict]:
+    """Ranqueia os termos do mês pelo crescimento em relação à janela anterior
+
+    Lê apenas os candidatos do mês (top MAX_CANDIDATOS pelo índice) e as contagens
+    desses mesmos termos nos meses da janela: o custo não depende do histórico.
+    """
+    termos, totais, _ = _obter_colecoes()
+    if termos is None:
+        return []
+
+    total_mes = totais.find_one({"escopo": "mes", "chave": mes}) or {}
+    palavras_mes = total_mes.get("total_palavras", 0)
+    if not palavras_mes:
+        return []
+
+    candidatos = list(termos.find(
+        {"escopo": "mes", "chave": mes, "n": {"$in": [UNIGRAMA, BIGRAMA]}, "frequencia": {"$gte": MIN_OCORRENCIAS}},
+        {"_id": 0, "termo": 1, "frequencia": 1}
+    ).sort("frequencia", -1).limit(MAX_CANDIDATOS))
+    if not candidatos:
+        return []
+
+    meses_janela = meses_anteriores(mes, janela)
+    palavras_janela = sum(
+        doc.get("total_palavras", 0)
+        for doc in totais.find({"escopo": "mes", "chave": {"$in": meses_janela}}, {"total_palavras": 1})
+    )
+
+    posicao = {doc["termo"]: i for i, doc in enumerate(candidatos)}
+    contagem_mes = np.array([doc["frequencia"] for doc in candidatos], dtype=np.float64)
+    contagem_janela = np.zeros(len(candidatos), dtype=np.float64)
+
+    for doc in termos.find(
+        {"escopo": "mes", "chave": {"$in": meses_janela}, "termo": {"$in": list(posicao)}},
+        {"_id": 0, "termo": 1, "frequencia": 1}
+    ):
+        contagem_janela[posicao[doc["termo"]]] += doc["frequencia"]
+
+    # Taxas por mil palavras, com suavização para termos ausentes na janela
+    suavizacao = 0.5
+    taxa_mes = (contagem_mes + suavizacao) / (palavras_mes + suavizacao) * 1000
+    taxa_janela = (contagem_janela + suavizacao) / (max(palavras_janela, 0) + suavizacao) * 1000
+    crescimento = taxa_mes / taxa_janela
+
+    significancia = log_verossimilhanca(contagem_mes, contagem_janela, palavras_mes, max(palavras_janela, 1))
+    emergentes = np.flatnonzero(crescimento > 1.0)
+    ordem = emergentes[np.lexsort((-crescimento[emergentes], -significancia[emergentes]))][:limite]
+
+    return [
+        {
+            'termo': candidatos[i]["termo"],
+            'ocorrencias_mes': int(contagem_mes[i]),
+            'media_janela': float(contagem_janela[i] / max(len(meses_janela), 1)),
+            'crescimento': float(crescimento[i]),
+            'significancia': float(significancia[i]),
+        }
+        for i in ordem
+    ]
+
+def obter_tendencias(mes: Optional[str] = None, janela: int = JANELA_PADRAO, limite: int = 20) -> List[Dict]:
+    """Tendências do mês, recalculadas só quando o mês ou sua janela receberam ideias novas"""
+    _, totais, tendencias = _obter_colecoes()
+    if totais is None:
+        return []
+
+    mes = mes or datetime.now().strftime('%Y-%m')
+    meses_envolvidos = [mes] + meses_anteriores(mes, janela)
+    assinatura = {
+        doc["chave"]: doc.get("total_palavras", 0)
+        for doc in totais.find({"escopo": "mes", "chave": {"$in": meses_envolvidos}}, {"chave": 1, "total_palavras": 1})
+    }
+
+    em_cache = tendencias.find_one({"mes": mes, "janela": janela})
+    if em_cache and em_cache.get("assinatura") == assinatura and em_cache.get("limite", 0) >= limite:
+        return em_cache["termos"][:limite]
+
+    resultado = calcular_tendencias(mes, janela, limite)
+    tendencias.update_one(
+        {"mes": mes, "janela": janela},
+        {"$set": {"termos": resultado, "limite": limite, "assinatura": assinatura, "calculado_em": datetime.now()}},
+        upsert=True
+    )
+    return resultado
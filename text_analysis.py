@@ -1,115 +1,69 @@
 import streamlit as st
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
-from textblob import TextBlob
-import nltk
-from collections import Counter
-import re
+from recursos_nltk import validar_recursos
 import pandas as pd
 import plotly.express as px
 from mongodb_connection import mongo_manager
-import numpy as np
 from datetime import datetime
+from indice_termos import obter_termos_mais_frequentes, obter_totais
+from tfidf_termos import extrair_termos_distintivos
+from acumuladores_texto import acumular_ideias
+from tendencias_termos import JANELA_PADRAO, listar_meses, obter_tendencias
 
-# Baixar recursos do NLTK se necessário
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    try:
-        nltk.download('punkt', quiet=True)
-    except:
-        pass
+# Ideias lidas por vez do MongoDB; limita o pico de memória da página
+TAMANHO_LOTE_ANALISE = 1000
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    try:
-        nltk.download('stopwords', quiet=True)
-    except:
-        pass
-
-def limpar_texto(texto):
-    """Limpa e processa o texto para análise"""
-    if not texto:
-        return ""
-    
-    # Converter para minúsculas
-    texto = texto.lower()
-    
-    # Remover caracteres especiais e números
-    texto = re.sub(r'[^a-záàâãéèêíïóôõöúçñ\s]', '', texto)
-    
-    # Remover palavras muito curtas
-    palavras = texto.split()
-    palavras = [palavra for palavra in palavras if len(palavra) > 2]
-    
-    # Remover stopwords em português
-    stopwords_pt = {
-        'de', 'da', 'do', 'das', 'dos', 'para', 'com', 'em', 'na', 'no', 'nas', 'nos',
-        'e', 'ou', 'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'que', 'se', 'por',
-        'mais', 'muito', 'ser', 'ter', 'fazer', 'como', 'sobre', 'quando', 'onde',
-        'porque', 'mas', 'também', 'já', 'ainda', 'só', 'bem', 'pode', 'vai', 'tem',
-        'são', 'foi', 'será', 'está', 'estava', 'estão', 'foram', 'sendo', 'sido'
-    }
-    
-    palavras_filtradas = [palavra for palavra in palavras if palavra not in stopwords_pt]
-    
-    return ' '.join(palavras_filtradas)
-
-def analisar_sentimento(texto):
-    """Analisa o sentimento do texto usando TextBlob"""
-    try:
-        blob = TextBlob(texto)
-        polaridade = blob.sentiment.polarity
-        
-        if polaridade > 0.1:
-            return 'positivo'
-        elif polaridade < -0.1:
-            return 'negativo'
-        else:
-            return 'neutro'
-    except:
-        return 'neutro'
+# Recursos do NLTK vêm apenas do pacote local (nunca há download na importação);
+# a verificação é feita uma vez, na inicialização, e o resultado fica em cache
+RECURSOS_NLTK = validar_recursos()
 
 def criar_analise_texto():
     st.header("☁️ Análise de Texto das Ideias")
     
-    # Buscar dados do MongoDB
-    ideias = mongo_manager.buscar_ideias()
-    
-    if not ideias:
+    ausentes = [nome for nome, disponivel in RECURSOS_NLTK.items() if not disponivel]
+    if ausentes:
+        st.caption(f"ℹ️ Recursos do NLTK ausentes no pacote local: {', '.join(ausentes)} "
+                   "(gere com: python recursos_nltk.py --preparar)")
+    
+    # Frequências de termos vêm do índice incremental; sem ele (ainda não
+    # construído: python indice_termos.py) as palavras são contadas no streaming
+    totais_indice = obter_totais()
+    
+    # Percorrer o banco em lotes, somando tudo em acumuladores (título e
+    # descrição só são usados se as features estiverem ausentes)
+    acumulador = acumular_ideias(
+        mongo_manager.iterar_ideias(
+            projecao={'titulo': 1, 'descricao': 1, 'categoria': 1, 'data_criacao': 1, 'features_texto': 1},
+            tamanho_lote=TAMANHO_LOTE_ANALISE
+        ),
+        contar_palavras=not totais_indice
+    )
+    
+    if not acumulador.total_ideias:
         st.warning("⚠️ Nenhuma ideia encontrada no banco de dados.")
         st.info("💡 Cadastre algumas ideias primeiro para ver as análises de texto.")
         return
     
-    # Coletar textos das ideias
-    textos_titulos = []
-    textos_descricoes = []
-    textos_completos = []
-    
-    for ideia in ideias:
-        titulo = ideia.get('titulo', '')
-        descricao = ideia.get('descricao', '')
-        
-        if titulo:
-            textos_titulos.append(titulo)
-            textos_completos.append(titulo)
-        
-        if descricao:
-            textos_descricoes.append(descricao)
-            textos_completos.append(descricao)
-    
-    if not textos_completos:
+    if not acumulador.total_textos:
         st.info("📝 Nenhum texto disponível para análise.")
         return
     
+    if totais_indice:
+        frequencias_nuvem = dict(obter_termos_mais_frequentes(limite=100))
+        palavras_mais_comuns = obter_termos_mais_frequentes(limite=20)
+        total_palavras_geral = totais_indice['total_palavras']
+        palavras_unicas = totais_indice['vocabulario']
+    else:
+        frequencias_nuvem = dict(acumulador.palavras.most_common(100))
+        palavras_mais_comuns = acumulador.palavras.most_common(20)
+        total_palavras_geral = acumulador.total_palavras
+        palavras_unicas = len(acumulador.palavras)
+    
     # Nuvem de palavras
     st.subheader("☁️ Nuvem de Palavras Mais Frequentes")
     
-    # Processar texto para nuvem de palavras
-    texto_para_nuvem = ' '.join([limpar_texto(texto) for texto in textos_completos])
-    
-    if texto_para_nuvem.strip():
+    if frequencias_nuvem:
         try:
             wordcloud = WordCloud(
                 width=800, 
@@ -119,7 +73,7 @@ def criar_analise_texto():
                 max_words=100,
                 relative_scaling=0.5,
                 min_font_size=10
-            ).generate(texto_para_nuvem)
+            ).generate_from_frequencies(frequencias_nuvem)
             
             fig, ax = plt.subplots(figsize=(12, 6))
             ax.imshow(wordcloud, interpolation='bilinear')
@@ -135,16 +89,11 @@ def criar_analise_texto():
     # Análise de sentimentos
     st.subheader("😊 Análise de Sentimentos")
     
-    # Analisar sentimentos de títulos e descrições
-    sentimentos = []
-    for texto in textos_completos:
-        if texto.strip():
-            sentimento = analisar_sentimento(texto)
-            sentimentos.append(sentimento)
+    # Sentimentos de títulos e descrições calculados no cadastro
+    contador_sentimentos = acumulador.sentimentos
     
-    if sentimentos:
-        contador_sentimentos = Counter(sentimentos)
-        total_textos = len(sentimentos)
+    if contador_sentimentos:
+        total_textos = sum(contador_sentimentos.values())
         
         positivos = contador_sentimentos.get('positivo', 0)
         neutros = contador_sentimentos.get('neutro', 0)
@@ -196,17 +145,7 @@ def criar_analise_texto():
     # Palavras-chave mais frequentes
     st.subheader("🔤 Palavras-chave Mais Frequentes")
     
-    # Processar todos os textos para extrair palavras-chave
-    todas_palavras = []
-    for texto in textos_completos:
-        texto_limpo = limpar_texto(texto)
-        if texto_limpo:
-            todas_palavras.extend(texto_limpo.split())
-    
-    if todas_palavras:
-        contador_palavras = Counter(todas_palavras)
-        palavras_mais_comuns = contador_palavras.most_common(20)
-        
+    if total_palavras_geral:
         if palavras_mais_comuns:
             df_palavras = pd.DataFrame(palavras_mais_comuns, columns=['Palavra', 'Frequência'])
             
@@ -234,86 +173,68 @@ def criar_analise_texto():
     # Análise por categoria
     st.subheader("📊 Análise por Categoria")
     
-    # Agrupar textos por categoria
-    textos_por_categoria = {}
-    for ideia in ideias:
-        categoria = ideia.get('categoria', 'Não categorizada')
-        titulo = ideia.get('titulo', '')
-        descricao = ideia.get('descricao', '')
+    if acumulador.por_categoria:
+        # Termos mais distintivos (TF-IDF) de cada categoria
+        distintivos_categoria = extrair_termos_distintivos('categoria', limite=5) if totais_indice else {}
         
-        if categoria not in textos_por_categoria:
-            textos_por_categoria[categoria] = []
-        
-        if titulo:
-            textos_por_categoria[categoria].append(titulo)
-        if descricao:
-            textos_por_categoria[categoria].append(descricao)
-    
-    if textos_por_categoria:
         # Calcular estatísticas por categoria
         stats_categoria = []
         
-        for categoria, textos in textos_por_categoria.items():
-            if textos:
-                # Contar palavras totais
-                total_palavras = sum(len(limpar_texto(texto).split()) for texto in textos)
-                
-                # Analisar sentimentos
-                sentimentos_cat = [analisar_sentimento(texto) for texto in textos if texto.strip()]
-                positivos_cat = sentimentos_cat.count('positivo')
-                
-                # Palavras mais comuns da categoria
-                palavras_cat = []
-                for texto in textos:
-                    palavras_cat.extend(limpar_texto(texto).split())
-                
+        for categoria, grupo in acumulador.por_categoria.items():
+            if grupo['textos']:
+                # Palavra mais comum da categoria (top-1 do índice quando disponível)
                 palavra_mais_comum = ''
-                if palavras_cat:
-                    palavra_mais_comum = Counter(palavras_cat).most_common(1)[0][0]
+                if totais_indice:
+                    top_categoria = obter_termos_mais_frequentes('categoria', categoria, limite=1)
+                    if top_categoria:
+                        palavra_mais_comum = top_categoria[0][0]
+                elif grupo['palavras']:
+                    palavra_mais_comum = grupo['palavras'].most_common(1)[0][0]
                 
                 stats_categoria.append({
                     'Categoria': categoria,
-                    'Textos': len(textos),
-                    'Total Palavras': total_palavras,
-                    'Sentimentos Positivos': positivos_cat,
-                    'Palavra Mais Comum': palavra_mais_comum
+                    'Textos': grupo['textos'],
+                    'Total Palavras': grupo['total_palavras'],
+                    'Sentimentos Positivos': grupo['positivos'],
+                    'Palavra Mais Comum': palavra_mais_comum,
+                    'Termos Distintivos': ', '.join(termo for termo, _ in distintivos_categoria.get(categoria, []))
                 })
         
         if stats_categoria:
             df_stats = pd.DataFrame(stats_categoria)
             st.dataframe(df_stats, use_container_width=True)
     
+    # Termos distintivos por unidade e por mês
+    if totais_indice:
+        st.subheader("🔎 Termos Distintivos")
+        
+        agrupamento = st.selectbox("Agrupar por", ["Unidade", "Mês"], key="agrupamento_tfidf")
+        escopo_tfidf = 'unidade' if agrupamento == "Unidade" else 'mes'
+        distintivos = extrair_termos_distintivos(escopo_tfidf, limite=8)
+        
+        if distintivos:
+            df_distintivos = pd.DataFrame([
+                {
+                    agrupamento: grupo,
+                    'Termos Distintivos': ', '.join(termo for termo, _ in termos)
+                }
+                for grupo, termos in sorted(distintivos.items())
+            ])
+            st.dataframe(df_distintivos, use_container_width=True, hide_index=True)
+        else:
+            st.info("📝 Termos insuficientes para calcular termos distintivos.")
+    
     # Análise temporal
     st.subheader("📅 Análise Temporal")
     
-    # Agrupar por mês
-    textos_por_mes = {}
-    for ideia in ideias:
-        data_criacao = ideia.get('data_criacao')
-        if isinstance(data_criacao, datetime):
-            mes_ano = data_criacao.strftime('%Y-%m')
-            
-            if mes_ano not in textos_por_mes:
-                textos_por_mes[mes_ano] = []
-            
-            titulo = ideia.get('titulo', '')
-            descricao = ideia.get('descricao', '')
-            
-            if titulo:
-                textos_por_mes[mes_ano].append(titulo)
-            if descricao:
-                textos_por_mes[mes_ano].append(descricao)
-    
-    if textos_por_mes:
-        # Calcular volume de texto por mês
+    if acumulador.por_mes:
+        # Volume de texto por mês
         dados_temporais = []
-        for mes, textos in sorted(textos_por_mes.items()):
-            total_palavras = sum(len(limpar_texto(texto).split()) for texto in textos)
-            
+        for mes, grupo in sorted(acumulador.por_mes.items()):
             dados_temporais.append({
                 'Mês': datetime.strptime(mes, '%Y-%m').strftime('%b/%Y'),
-                'Total Palavras': total_palavras,
-                'Número de Textos': len(textos)
+                'Total Palavras': grupo['total_palavras'],
+                'Número de Textos': grupo['textos']
             })
         
         if dados_temporais:
@@ -329,24 +250,59 @@ def criar_analise_texto():
             fig_temporal.update_layout(xaxis_tickangle=-45)
             st.plotly_chart(fig_temporal, use_container_width=True)
     
+    # Termos emergentes: crescimento do mês contra os meses anteriores
+    meses_indexados = listar_meses() if totais_indice else []
+    if meses_indexados:
+        st.subheader("🚀 Termos Emergentes")
+        
+        mes_tendencia = st.selectbox(
+            "Mês de referência",
+            meses_indexados,
+            format_func=lambda mes: datetime.strptime(mes, '%Y-%m').strftime('%b/%Y'),
+            key="mes_tendencias"
+        )
+        tendencias = obter_tendencias(mes_tendencia, JANELA_PADRAO, limite=15)
+        
+        if tendencias:
+            df_tendencias = pd.DataFrame(tendencias).rename(columns={
+                'termo': 'Termo',
+                'ocorrencias_mes': 'Ocorrências no Mês',
+                'media_janela': f'Média ({JANELA_PADRAO} meses anteriores)',
+                'crescimento': 'Crescimento (x)',
+                'significancia': 'Significância (G²)'
+            })
+            
+            fig_tendencias = px.bar(
+                df_tendencias,
+                x='Crescimento (x)',
+                y='Termo',
+                orientation='h',
+                color='Significância (G²)',
+                color_continuous_scale='viridis',
+                title='O que começou a aparecer neste mês'
+            )
+            fig_tendencias.update_layout(yaxis={'categoryorder': 'total ascending'})
+            st.plotly_chart(fig_tendencias, use_container_width=True)
+            st.dataframe(df_tendencias.round(2), use_container_width=True, hide_index=True)
+        else:
+            st.info("📝 Nenhum termo com crescimento relevante neste mês.")
+    
     # Estatísticas gerais
     st.subheader("📈 Estatísticas Gerais")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total de Textos", len(textos_completos))
+        st.metric("Total de Textos", acumulador.total_textos)
     
     with col2:
-        total_palavras_geral = len(todas_palavras) if todas_palavras else 0
         st.metric("Total de Palavras", total_palavras_geral)
     
     with col3:
-        palavras_unicas = len(set(todas_palavras)) if todas_palavras else 0
         st.metric("Palavras Únicas", palavras_unicas)
     
     with col4:
-        media_palavras = (total_palavras_geral / len(textos_completos)) if textos_completos else 0
+        media_palavras = (total_palavras_geral / acumulador.total_textos) if acumulador.total_textos else 0
         st.metric("Média Palavras/Texto", f"{media_palavras:.1f}")
     
     # Botão para atualizar análise
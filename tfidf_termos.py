@@ -0,0 +1,225 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from mongodb_connection import mongo_manager
+from indice_termos import (
+    CAMPOS_INDEXADOS, COLECAO_TERMOS, COLECAO_TOTAIS, chaves_da_ideia, contar_termos_ideia
+)
+
+# Escopos em que os termos distintivos podem ser extraídos
+ESCOPOS_TFIDF = ('categoria', 'unidade', 'mes')
+
+# Depois deste tempo o motor é recarregado do índice, para incorporar
+# escritas feitas por outros processos do servidor
+IDADE_MAXIMA_SEGUNDOS = 3600
+
+# Chave esparsa (linha, coluna) compactada em um único inteiro
+_DESLOCAMENTO_LINHA = 32
+_MASCARA_COLUNA = (1 << _DESLOCAMENTO_LINHA) - 1
+
+class MotorTFIDF:
+    """TF-IDF por grupo (categoria, unidade, mês) sobre matrizes esparsas
+
+    Vocabulário, frequência de documentos (número de ideias em que cada termo
+    aparece) e contagens por grupo ficam em memória, carregados uma vez do
+    índice de termos e atualizados a cada escrita de ideia. A extração monta
+    uma matriz CSR grupos x termos e pondera tudo com operações vetorizadas.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.vocabulario: Dict[str, int] = {}
+        self.termos: List[str] = []
+        self.total_ideias = 0
+        self.carregado_em: Optional[float] = None
+        self._documentos = np.zeros(1024, dtype=np.int64)
+        self._bigrama = np.zeros(1024, dtype=bool)
+        self._linhas: Dict[str, Dict[str, int]] = {escopo: {} for escopo in ESCOPOS_TFIDF}
+        self._contagens: Dict[str, Dict[int, int]] = {escopo: {} for escopo in ESCOPOS_TFIDF}
+        # Matriz CSR de contagens por escopo, reaproveitada enquanto não houver escrita
+        self._versao = 0
+        self._matrizes: Dict[str, Tuple[int, sparse.csr_matrix, List[str]]] = {}
+
+    def _coluna(self, termo: str) -> int:
+        coluna = self.vocabulario.get(termo)
+        if coluna is None:
+            coluna = len(self.termos)
+            self.vocabulario[termo] = coluna
+            self.termos.append(termo)
+            if coluna >= len(self._documentos):
+                self._documentos = np.concatenate([self._documentos, np.zeros_like(self._documentos)])
+                self._bigrama = np.concatenate([self._bigrama, np.zeros_like(self._bigrama)])
+            self._bigrama[coluna] = ' ' in termo
+        return coluna
+
+    def _linha(self, escopo: str, chave: str) -> int:
+        linhas = self._linhas[escopo]
+        if chave not in linhas:
+            linhas[chave] = len(linhas)
+        return linhas[chave]
+
+    def carregar(self):
+        """Carrega vocabulário, frequência de documentos e contagens do índice de termos"""
+        termos = mongo_manager.obter_colecao(COLECAO_TERMOS)
+        totais = mongo_manager.obter_colecao(COLECAO_TOTAIS)
+        if termos is None or totais is None:
+            return
+
+        with self._trava:
+            self.vocabulario, self.termos = {}, []
+            self._documentos = np.zeros(1024, dtype=np.int64)
+            self._bigrama = np.zeros(1024, dtype=bool)
+            self._linhas = {escopo: {} for escopo in ESCOPOS_TFIDF}
+            self._contagens = {escopo: {} for escopo in ESCOPOS_TFIDF}
+            self._matrizes = {}
+            self._versao += 1
+
+            cursor = termos.find(
+                {"escopo": {"$in": ('global',) + ESCOPOS_TFIDF}, "frequencia": {"$gt": 0}},
+                {"_id": 0, "escopo": 1, "chave": 1, "termo": 1, "frequencia": 1, "documentos": 1}
+            ).batch_size(10000)
+
+            for doc in cursor:
+                coluna = self._coluna(doc["termo"])
+                if doc["escopo"] == 'global':
+                    self._documentos[coluna] = doc.get("documentos", 0)
+                else:
+                    linha = self._linha(doc["escopo"], doc["chave"])
+                    self._contagens[doc["escopo"]][(linha << _DESLOCAMENTO_LINHA) | coluna] = doc["frequencia"]
+
+            global_totais = totais.find_one({"escopo": "global", "chave": ""}) or {}
+            self.total_ideias = global_totais.get("total_ideias", 0)
+            self.carregado_em = time.time()
+
+    def aplicar(self, ideia: Dict, sinal: int):
+        """Soma (1) ou subtrai (-1) a contribuição de uma ideia"""
+        unigramas, bigramas, _ = contar_termos_ideia(ideia)
+        frequencias = {**unigramas, **bigramas}
+        chaves = dict(chaves_da_ideia(ideia))
+
+        with self._trava:
+            self._versao += 1
+            self.total_ideias += sinal
+            for termo, frequencia in frequencias.items():
+                coluna = self._coluna(termo)
+                self._documentos[coluna] += sinal
+
+                for escopo in ESCOPOS_TFIDF:
+                    if escopo not in chaves:
+                        continue
+                    chave_esparsa = (self._linha(escopo, chaves[escopo]) << _DESLOCAMENTO_LINHA) | coluna
+                    contagens = self._contagens[escopo]
+                    novo_valor = contagens.get(chave_esparsa, 0) + sinal * frequencia
+                    if novo_valor > 0:
+                        contagens[chave_esparsa] = novo_valor
+                    else:
+                        contagens.pop(chave_esparsa, None)
+
+    def _matriz_contagens(self, escopo: str) -> Tuple[sparse.csr_matrix, List[str]]:
+        """Monta (ou reaproveita) a matriz grupos x termos do escopo; chamar com a trava"""
+        em_cache = self._matrizes.get(escopo)
+        if em_cache and em_cache[0] == self._versao:
+            return em_cache[1], em_cache[2]
+
+        contagens = self._contagens[escopo]
+        chaves_esparsas = np.fromiter(contagens.keys(), dtype=np.int64, count=len(contagens))
+        valores = np.fromiter(contagens.values(), dtype=np.float64, count=len(contagens))
+        linhas = chaves_esparsas >> _DESLOCAMENTO_LINHA
+        colunas = chaves_esparsas & _MASCARA_COLUNA
+
+        nomes_grupos = sorted(self._linhas[escopo], key=self._linhas[escopo].get)
+        matriz = sparse.csr_matrix((valores, (linhas, colunas)), shape=(len(nomes_grupos), len(self.termos)))
+
+        self._matrizes[escopo] = (self._versao, matriz, nomes_grupos)
+        return matriz, nomes_grupos
+
+    def termos_distintivos(self, escopo: str, limite: int = 10, incluir_bigramas: bool = True,
+                           min_documentos: int = 2) -> Dict[str, List[Tuple[str, float]]]:
+        """Retorna, para cada grupo do escopo, os termos com maior TF-IDF
+
+        TF é a frequência relativa do termo no grupo; IDF usa o número de ideias
+        que contêm o termo (idf suavizado, como no scikit-learn). Termos presentes
+        em menos de ``min_documentos`` ideias são ignorados para evitar ruído.
+        """
+        with self._trava:
+            if not self._contagens[escopo]:
+                return {}
+
+            matriz, nomes_grupos = self._matriz_contagens(escopo)
+            n_termos = matriz.shape[1]
+            documentos = self._documentos[:n_termos].copy()
+            bigrama = self._bigrama[:n_termos].copy()
+            total_ideias = max(self.total_ideias, 1)
+            termos = self.termos
+
+        idf = np.log((1 + total_ideias) / (1 + np.maximum(documentos, 0))) + 1.0
+        elegiveis = documentos >= min_documentos
+        if not incluir_bigramas:
+            elegiveis &= ~bigrama
+        idf[~elegiveis] = 0.0
+
+        totais_grupo = np.asarray(matriz.sum(axis=1)).ravel()
+        inverso_totais = np.divide(1.0, totais_grupo, out=np.zeros_like(totais_grupo), where=totais_grupo > 0)
+        pesos = (sparse.diags(inverso_totais) @ matriz @ sparse.diags(idf)).tocsr()
+        pesos.eliminate_zeros()
+
+        resultado = {}
+        for linha, grupo in enumerate(nomes_grupos):
+            inicio, fim = pesos.indptr[linha], pesos.indptr[linha + 1]
+            if inicio == fim:
+                continue
+
+            dados = pesos.data[inicio:fim]
+            indices = pesos.indices[inicio:fim]
+            k = min(limite, len(dados))
+            melhores = np.argpartition(-dados, k - 1)[:k]
+            melhores = melhores[np.argsort(-dados[melhores])]
+            resultado[grupo] = [(termos[indices[i]], float(dados[i])) for i in melhores]
+
+        return resultado
+
+_motor: Optional[MotorTFIDF] = None
+_trava_motor = threading.Lock()
+
+def obter_motor_tfidf() -> MotorTFIDF:
+    """Retorna o motor do processo, carregando-o na primeira chamada ou quando expirado"""
+    global _motor
+    with _trava_motor:
+        if _motor is None or _motor.carregado_em is None or time.time() - _motor.carregado_em > IDADE_MAXIMA_SEGUNDOS:
+            motor = MotorTFIDF()
+            motor.carregar()
+            _motor = motor
+        return _motor
+
+def extrair_termos_distintivos(escopo: str, limite: int = 10, incluir_bigramas: bool = True) -> Dict[str, List[Tuple[str, float]]]:
+    """Termos mais distintivos de cada categoria, unidade ou mês"""
+    return obter_motor_tfidf().termos_distintivos(escopo, limite, incluir_bigramas)
+
+def atualizar_motor_tfidf(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: aplica a escrita ao motor já carregado neste processo"""
+    if _motor is None or _motor.carregado_em is None:
+        return  # Será carregado do índice (já atualizado) no próximo uso
+    if evento == 'atualizar' and all(antes.get(c) == depois.get(c) for c in CAMPOS_INDEXADOS):
+        return
+
+    if antes is not None:
+        _motor.aplicar(antes, -1)
+    if depois is not None:
+        _motor.aplicar(depois, 1)
+
+def recarregar_motor_tfidf():
+    """Descarta o motor do processo; o próximo uso o relê do índice de termos"""
+    global _motor
+    with _trava_motor:
+        _motor = None
+
+def descartar_motor_tfidf(filtros: Dict, ids: List[str]) -> Optional[Callable]:
+    """Observador de exclusão: o motor é relido do índice (já descontado) no próximo uso"""
+    return recarregar_motor_tfidf
+
+mongo_manager.registrar_observador(atualizar_motor_tfidf)
+mongo_manager.registrar_observador_exclusao(descartar_motor_tfidf)
@@ -0,0 +1,248 @@
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from pymongo import ASCENDING, UpdateOne
+from sklearn.cluster import MiniBatchKMeans
+
+from mongodb_connection import mongo_manager
+from modelos_ml import carregar_modelo, salvar_modelo, texto_da_descricao
+from similaridade import obter_embedding, obter_servico
+
+# Resumo pré-calculado de cada tópico (tamanho, termos e ideias representativas)
+COLECAO_TOPICOS = "topicos"
+
+# Nome do modelo na coleção de modelos
+MODELO_TOPICOS = "topicos"
+
+NUM_TOPICOS = 12
+TERMOS_POR_TOPICO = 8
+REPRESENTANTES_POR_TOPICO = 3
+TAMANHO_LOTE = 1024
+
+# Ajustes incrementais acumulados antes de regravar o modelo no banco
+SALVAR_A_CADA = 25
+
+IDADE_MAXIMA_SEGUNDOS = 3600
+
+_trava = threading.Lock()
+_modelo: Optional[MiniBatchKMeans] = None
+_carregado_em: Optional[float] = None
+_ajustes_pendentes = 0
+_indices_criados = False
+
+def _obter_colecao():
+    global _indices_criados
+    topicos = mongo_manager.obter_colecao(COLECAO_TOPICOS)
+    if topicos is None:
+        return None
+
+    if not _indices_criados:
+        topicos.create_index([("topico", ASCENDING)], unique=True)
+        mongo_manager.collection.create_index([("topico", ASCENDING)])
+        _indices_criados = True
+
+    return topicos
+
+def obter_modelo_topicos() -> Optional[MiniBatchKMeans]:
+    """Modelo de tópicos do processo (None se ainda não foi treinado)"""
+    global _modelo, _carregado_em
+    with _trava:
+        if _carregado_em is None or time.time() - _carregado_em > IDADE_MAXIMA_SEGUNDOS:
+            _modelo, _ = carregar_modelo(MODELO_TOPICOS)
+            _carregado_em = time.time()
+        return _modelo
+
+def _definir_modelo(modelo: MiniBatchKMeans, metadados: Dict):
+    global _modelo, _carregado_em, _ajustes_pendentes
+    salvar_modelo(MODELO_TOPICOS, modelo, metadados)
+    with _trava:
+        _modelo, _carregado_em, _ajustes_pendentes = modelo, time.time(), 0
+
+def _atribuir(ids: List[str], matriz: np.ndarray, modelo: MiniBatchKMeans) -> int:
+    """Grava o tópico previsto para cada ideia, em lotes"""
+    total = 0
+    for inicio in range(0, len(ids), TAMANHO_LOTE):
+        rotulos = modelo.predict(matriz[inicio:inicio + TAMANHO_LOTE])
+        total += len(rotulos)
+        mongo_manager.atualizar_ideias_em_lote({
+            ideia_id: {"topico": int(rotulo)}
+            for ideia_id, rotulo in zip(ids[inicio:inicio + TAMANHO_LOTE], rotulos)
+        })
+    return total
+
+def treinar_topicos(completo: bool = False) -> Dict:
+    """Ajusta os tópicos sobre os vetores do índice de similaridade
+
+    No modo incremental (padrão) o modelo existente recebe partial_fit apenas
+    com as ideias ainda sem tópico, que são então atribuídas. O modo completo
+    reinicia os centróides, percorre todos os vetores em mini-lotes e
+    reatribui todas as ideias. Ao final o resumo dos tópicos é recalculado.
+    """
+    _, indice = obter_servico()
+    if indice is None or not indice.ids:
+        raise ValueError("Construa o índice de similaridade antes de calcular os tópicos")
+
+    modelo = None if completo else obter_modelo_topicos()
+    ids = list(indice.ids)
+    matriz = indice.matriz.copy()
+
+    if modelo is None:
+        if len(ids) < 2:
+            raise ValueError("São necessárias pelo menos duas ideias para formar tópicos")
+        modelo = MiniBatchKMeans(
+            n_clusters=min(NUM_TOPICOS, len(ids)), batch_size=TAMANHO_LOTE, n_init=3, random_state=42
+        )
+        ordem = np.random.RandomState(42).permutation(len(ids))
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            modelo.partial_fit(matriz[ordem[inicio:inicio + TAMANHO_LOTE]])
+        # Ideias fora do índice (sem descrição) não mantêm tópicos do modelo antigo
+        mongo_manager.collection.update_many({"topico": {"$exists": True}}, {"$unset": {"topico": ""}})
+        modo = 'completo'
+    else:
+        sem_topico = {
+            ideia['_id']
+            for lote in mongo_manager.iterar_ideias({"topico": {"$exists": False}}, {"_id": 1})
+            for ideia in lote
+        }
+        posicoes = [indice.posicoes[ideia_id] for ideia_id in sem_topico if ideia_id in indice.posicoes]
+        ids = [indice.ids[p] for p in posicoes]
+        matriz = matriz[posicoes]
+        for inicio in range(0, len(ids), TAMANHO_LOTE):
+            modelo.partial_fit(matriz[inicio:inicio + TAMANHO_LOTE])
+        modo = 'incremental'
+
+    atribuidas = _atribuir(ids, matriz, modelo)
+    metadados = {'topicos': int(modelo.n_clusters), 'atualizado_em': datetime.now(), 'modo': modo}
+    _definir_modelo(modelo, metadados)
+    resumir_topicos()
+    return {**metadados, 'atribuidas': atribuidas}
+
+def resumir_topicos() -> int:
+    """Recalcula tamanho, termos característicos e ideias representativas de cada tópico"""
+    topicos = _obter_colecao()
+    modelo = obter_modelo_topicos()
+    _, indice = obter_servico()
+    if topicos is None or modelo is None or indice is None:
+        return 0
+
+    membros: Dict[int, List[str]] = {}
+    termos: Dict[int, Counter] = {}
+    filtro = {"topico": {"$exists": True}}
+    for lote in mongo_manager.iterar_ideias(filtro, {"topico": 1, "descricao": 1, "features_texto": 1}):
+        for ideia in lote:
+            topico = ideia['topico']
+            membros.setdefault(topico, []).append(ideia['_id'])
+            termos.setdefault(topico, Counter()).update(set(texto_da_descricao(ideia).split()))
+
+    # Termos frequentes no tópico e raros nos demais (df por tópico, como um idf)
+    presenca = Counter(termo for contagem in termos.values() for termo in contagem)
+    total_topicos = max(len(termos), 1)
+
+    centroides = modelo.cluster_centers_
+    centroides = centroides / np.maximum(np.linalg.norm(centroides, axis=1, keepdims=True), 1e-12)
+
+    documentos = []
+    for topico, ids in membros.items():
+        pontuacoes = {
+            termo: frequencia * math.log(1 + total_topicos / presenca[termo])
+            for termo, frequencia in termos[topico].items()
+        }
+        principais = sorted(pontuacoes, key=pontuacoes.get, reverse=True)[:TERMOS_POR_TOPICO]
+
+        posicoes = [indice.posicoes[i] for i in ids if i in indice.posicoes]
+        representantes = []
+        if posicoes and topico < len(centroides):
+            proximidade = indice.matriz[posicoes] @ centroides[topico]
+            melhores = np.argsort(-proximidade)[:REPRESENTANTES_POR_TOPICO]
+            representantes = [indice.ids[posicoes[i]] for i in melhores]
+
+        documentos.append({
+            "topico": int(topico),
+            "tamanho": len(ids),
+            "termos": principais,
+            "representantes": representantes,
+            "atualizado_em": datetime.now()
+        })
+
+    topicos.delete_many({})
+    if documentos:
+        topicos.insert_many(documentos)
+    return len(documentos)
+
+def obter_topicos() -> List[Dict]:
+    """Resumo pré-calculado dos tópicos, do maior para o menor"""
+    topicos = _obter_colecao()
+    if topicos is None:
+        return []
+    return list(topicos.find({}, {"_id": 0}).sort("tamanho", -1))
+
+def atualizar_topico_ideia(evento: str, antes: Optional[Dict], depois: Optional[Dict]):
+    """Observador do MongoDBManager: atribui o tópico das ideias novas e ajusta o modelo"""
+    global _ajustes_pendentes
+    topicos = _obter_colecao()
+    if topicos is None:
+        return
+
+    if evento == 'deletar':
+        if antes.get('topico') is not None:
+            topicos.update_one({"topico": antes['topico']}, {"$inc": {"tamanho": -1}})
+        return
+
+    if evento == 'atualizar' and antes.get('descricao') == depois.get('descricao'):
+        return
+
+    modelo = obter_modelo_topicos()
+    embedding = obter_embedding()
+    if modelo is None or embedding is None:
+        return
+
+    vetor = embedding.transformar([texto_da_descricao(depois)])
+    if not vetor.any():
+        return
+
+    with _trava:
+        topico = int(modelo.predict(vetor)[0])
+        modelo.partial_fit(vetor)
+        _ajustes_pendentes += 1
+        salvar = _ajustes_pendentes >= SALVAR_A_CADA
+
+    mongo_manager.atualizar_ideias_em_lote({str(depois['_id']): {"topico": topico}})
+    if antes is not None and antes.get('topico') is not None:
+        topicos.update_one({"topico": antes['topico']}, {"$inc": {"tamanho": -1}})
+    topicos.update_one({"topico": topico}, {"$inc": {"tamanho": 1}}, upsert=True)
+
+    if salvar:
+        _definir_modelo(modelo, {'topicos': int(modelo.n_clusters), 'atualizado_em': datetime.now(), 'modo': 'incremental'})
+
+def preparar_exclusao_topicos(filtros: Dict, ids: List[str]) -> Optional[Callable]:
+    """Observador de exclusão: conta no servidor as ideias de cada tópico e desconta após a exclusão"""
+    topicos = _obter_colecao()
+    if topicos is None:
+        return None
+
+    grupos = list(mongo_manager.collection.aggregate([
+        {"$match": {"$and": [filtros, {"topico": {"$ne": None}}]}},
+        {"$group": {"_id": "$topico", "total": {"$sum": 1}}}
+    ]))
+
+    def descontar():
+        if grupos:
+            topicos.bulk_write([
+                UpdateOne({"topico": grupo['_id']}, {"$inc": {"tamanho": -grupo['total']}}) for grupo in grupos
+            ], ordered=False)
+    return descontar
+
+mongo_manager.registrar_observador(atualizar_topico_ideia)
+mongo_manager.registrar_observador_exclusao(preparar_exclusao_topicos)
+
+# Execução periódica: python topicos.py [--completo]
+if __name__ == "__main__":
+    import sys
+
+    resultado = treinar_topicos(completo='--completo' in sys.argv)
+    print(f"✅ {resultado['topicos']} tópicos ({resultado['modo']}), {resultado['atribuidas']} ideias atribuídas")